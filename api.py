@@ -0,0 +1,426 @@
+"""HTTP API around one warm StockResearchSystem per worker process.
+
+    python api.py --port 8000 [--workers 2]
+
+    POST /analyses                      {"query": "...", "symbols": [...], "mode": "pipeline"}
+                                        -> 202 {"id", "status_url", "events_url", ...}
+    POST /analyses                      {"resume": "<run_id of a failed analysis>"}
+    GET  /analyses/{id}                 status, timings, usage and recommendations
+    GET  /analyses/{id}/events          progress as server-sent events, ends with "done"
+    GET  /analyses/{id}/recommendations structured recommendation rows
+    GET  /analyses/{id}/live            recommendations re-scored against live quotes
+    GET  /healthz, /readyz, /metrics    as served by metrics.py
+
+Runs execute as tasks on the worker's event loop; at most ``API_MAX_CONCURRENT_RUNS``
+run at once and the rest wait their turn. Finished jobs are kept in memory, oldest
+evicted beyond ``API_MAX_JOBS``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from archive import RunArchive
+from checkpoints import COMPLETED as CHECKPOINT_COMPLETED
+from coalescing import RunCoalescer
+from exporters import record_to_row
+from main import OrchestrationMode, StockResearchSystem
+from metrics import METRICS
+from settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+WATCHLIST_QUERY = (
+    "Analyze these NSE stocks: {symbols}. "
+    "Provide trading recommendations for the next trading sessions."
+)
+SYMBOL = re.compile(r"^[A-Z0-9&-]{1,20}$")
+MAX_SYMBOLS = 20
+# Seconds between SSE keep-alive comments on a quiet stream
+KEEPALIVE_SECONDS = 15.0
+
+PENDING, RUNNING, COMPLETED, FAILED = "pending", "running", "completed", "failed"
+
+
+@dataclass
+class AnalysisJob:
+    id: str
+    query: Optional[str]
+    mode: str
+    status: str = PENDING
+    submitted_at: float = field(default_factory=time.time)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    resume: Optional[str] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        # Also reaches jobs attached to a coalesced run, which replays its events
+        if event["event"] == "started" and self.status == PENDING:
+            self.status = RUNNING
+        self.events.append({**event, "at": time.time()})
+        # Wake every waiting stream; they re-read events from their own offset
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """Checkpointed run id, known once the run has started"""
+        started = (e for e in self.events if e["event"] == "started")
+        return next((e["run_id"] for e in started), None)
+
+    def recommendations(self) -> List[Dict[str, Any]]:
+        if self.results is None:
+            return []
+        return [
+            record_to_row(
+                record,
+                run_id=self.results["run_id"],
+                date=self.results["timestamp"][:10],
+            )
+            for record in self.results.get("recommendations", [])
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "query": self.query,
+            "submitted_at": self.submitted_at,
+            "run_id": self.run_id,
+            "resume": self.resume,
+            "error": self.error,
+        }
+        if self.results is not None:
+            summary.update(
+                run_id=self.results["run_id"],
+                run_status=self.results["status"],
+                duration_seconds=self.results["duration_seconds"],
+                coalesced=self.results.get("coalesced"),
+                timings=self.results["timings"],
+                usage=self.results["usage"]["total"],
+                recommendations=self.recommendations(),
+            )
+        return summary
+
+
+class AnalysisService:
+    """Queues analyses onto one shared system and keeps their progress and results"""
+
+    def __init__(
+        self,
+        system: StockResearchSystem,
+        max_concurrent_runs: int = 8,
+        max_jobs: int = 500,
+        coalescer: Optional[RunCoalescer] = None,
+    ):
+        self.system = system
+        self.coalescer = coalescer
+        self.max_jobs = max_jobs
+        self.jobs: OrderedDict[str, AnalysisJob] = OrderedDict()
+        self._slots = asyncio.Semaphore(max_concurrent_runs)
+        self._tasks: set = set()
+
+    def submit(
+        self, query: Optional[str], mode: str, resume: Optional[str] = None
+    ) -> AnalysisJob:
+        if resume:
+            # Repeated resumes of one run share its job rather than racing it
+            pending = next(
+                (j for j in self.jobs.values() if j.resume == resume and not j.done),
+                None,
+            )
+            if pending is not None:
+                return pending
+        job = AnalysisJob(id=str(uuid.uuid4()), query=query, mode=mode, resume=resume)
+        self.jobs[job.id] = job
+        self._evict()
+        task = asyncio.create_task(self._run(job))
+        # Keep a reference until the task ends so it is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _evict(self) -> None:
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((j for j in self.jobs.values() if j.done), None)
+            if oldest is None:
+                return
+            del self.jobs[oldest.id]
+
+    async def _run(self, job: AnalysisJob) -> None:
+        job.publish({"event": "queued"})
+
+        async def run(progress) -> Dict[str, Any]:
+            async with self._slots:
+                return await self.system.analyze_stocks(
+                    job.query, mode=job.mode, progress=progress, resume=job.resume
+                )
+
+        try:
+            # A resumed run continues its own checkpoints, so it is never shared
+            if self.coalescer is None or job.resume:
+                job.results = await run(job.publish)
+            else:
+                # Identical requests share one run (and its events) or its result
+                job.results = await self.coalescer.run(
+                    job.query, job.mode, run, progress=job.publish
+                )
+            job.status = COMPLETED
+        except Exception as e:
+            logger.exception("API analysis failed", extra={"job_id": job.id})
+            job.error = str(e)
+            job.status = FAILED
+        job.publish({"event": "done", "status": job.status})
+
+    async def events(self, job: AnalysisJob) -> AsyncIterator[str]:
+        """Past and future events of ``job`` in SSE wire format"""
+        sent = 0
+        while True:
+            changed = job.changed
+            for event in job.events[sent:]:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            sent = len(job.events)
+            if job.done and sent and job.events[-1]["event"] == "done":
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def build_query(payload: Dict[str, Any]) -> Optional[str]:
+    """The run's query from ``query`` and/or a ``symbols`` watchlist"""
+    query = payload.get("query")
+    symbols = payload.get("symbols") or []
+    if query is not None and not isinstance(query, str):
+        raise ValueError("query must be a string")
+    if not isinstance(symbols, list):
+        raise ValueError("symbols must be a list of NSE symbols")
+    symbols = [str(s).strip().upper() for s in symbols]
+    invalid = [s for s in symbols if not SYMBOL.match(s)]
+    if invalid:
+        raise ValueError(f"Invalid NSE symbols: {', '.join(invalid)}")
+    if len(symbols) > MAX_SYMBOLS:
+        raise ValueError(f"At most {MAX_SYMBOLS} symbols per analysis")
+    if symbols:
+        watchlist = WATCHLIST_QUERY.format(symbols=", ".join(symbols))
+        return f"{watchlist} {query}" if query else watchlist
+    return query or None
+
+
+def resumable_run(system: StockResearchSystem, run_id: Any) -> Tuple[str, str]:
+    """Query and mode of a checkpointed run that can still be resumed"""
+    if not isinstance(run_id, str) or not run_id:
+        raise ValueError("resume must be the run_id of a failed analysis")
+    if system.checkpoints is None:
+        raise ValueError("Resuming runs requires CHECKPOINT_RUNS")
+    run = system.checkpoints.get_run(run_id)
+    if run is None:
+        raise ValueError(f"No checkpointed run {run_id}")
+    if run["status"] == CHECKPOINT_COMPLETED:
+        raise ValueError(f"Run {run_id} already completed")
+    if system.checkpoints.is_running(run_id):
+        raise ValueError(f"Run {run_id} is still running")
+    return run["query"], run["mode"]
+
+
+def _service(request: Request) -> AnalysisService:
+    return request.app.state.service
+
+
+def _job(request: Request) -> Optional[AnalysisJob]:
+    return _service(request).jobs.get(request.path_params["job_id"])
+
+
+def _not_found(request: Request) -> JSONResponse:
+    return JSONResponse(
+        {"error": f"Unknown analysis {request.path_params['job_id']}"}, 404
+    )
+
+
+async def submit_analysis(request: Request) -> JSONResponse:
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "Expected a JSON object"}, 400)
+    resume = payload.get("resume")
+    try:
+        if resume is not None:
+            query, mode = resumable_run(_service(request).system, resume)
+        else:
+            query = build_query(payload)
+            mode = OrchestrationMode(
+                payload.get("mode") or request.app.state.settings.orchestration_mode
+            ).value
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+
+    job = _service(request).submit(query, mode, resume=resume)
+    base = f"/analyses/{job.id}"
+    return JSONResponse(
+        {
+            "id": job.id,
+            "status": job.status,
+            "status_url": base,
+            "events_url": f"{base}/events",
+            "recommendations_url": f"{base}/recommendations",
+        },
+        202,
+    )
+
+
+async def get_analysis(request: Request) -> JSONResponse:
+    job = _job(request)
+    if job is None:
+        return _not_found(request)
+    return JSONResponse(job.summary())
+
+
+async def get_recommendations(request: Request) -> JSONResponse:
+    job = _job(request)
+    if job is None:
+        return _not_found(request)
+    if not job.done:
+        return JSONResponse({"id": job.id, "status": job.status}, 409)
+    return JSONResponse(
+        {"id": job.id, "status": job.status, "recommendations": job.recommendations()}
+    )
+
+
+async def get_live_scores(request: Request) -> JSONResponse:
+    job = _job(request)
+    if job is None:
+        return _not_found(request)
+    if not job.done:
+        return JSONResponse({"id": job.id, "status": job.status}, 409)
+    records = (job.results or {}).get("recommendations", [])
+    scores = await _service(request).system.rescore_live(records) if records else []
+    return JSONResponse({"id": job.id, "status": job.status, "live": scores})
+
+
+async def stream_events(request: Request) -> StreamingResponse:
+    job = _job(request)
+    if job is None:
+        return _not_found(request)
+    return StreamingResponse(
+        _service(request).events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def healthz(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok\n")
+
+
+async def readyz(request: Request) -> PlainTextResponse:
+    failing = METRICS.failing_checks()
+    if failing:
+        return PlainTextResponse("not ready: " + ", ".join(failing) + "\n", 503)
+    return PlainTextResponse("ready\n")
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def create_app(
+    system: Optional[StockResearchSystem] = None, settings: Optional[Settings] = None
+) -> Starlette:
+    """ASGI app; without ``system`` each worker builds and warms up its own"""
+    settings = settings or get_settings()
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        owned = system is None
+        research = system or StockResearchSystem(
+            settings=settings, archive=RunArchive(settings.archive_path)
+        )
+        METRICS.add_readiness_check("research_system", lambda: research.ready)
+        # Warm up before accepting traffic: MCP session, models and agents
+        await research.initialize()
+        app.state.service = AnalysisService(
+            research,
+            max_concurrent_runs=settings.api_max_concurrent_runs,
+            max_jobs=settings.api_max_jobs,
+            coalescer=RunCoalescer(
+                settings.coalesce_result_ttl, settings.coalesce_window_seconds
+            ),
+        )
+        logger.info("API ready", extra={"owned_system": owned})
+        try:
+            yield
+        finally:
+            await app.state.service.close()
+            METRICS.remove_readiness_check("research_system")
+            if owned:
+                await research.close()
+
+    app = Starlette(
+        routes=[
+            Route("/analyses", submit_analysis, methods=["POST"]),
+            Route("/analyses/{job_id}", get_analysis),
+            Route("/analyses/{job_id}/events", stream_events),
+            Route("/analyses/{job_id}/recommendations", get_recommendations),
+            Route("/analyses/{job_id}/live", get_live_scores),
+            Route("/healthz", healthz),
+            Route("/readyz", readyz),
+            Route("/metrics", metrics),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    return app
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Serve the stock research HTTP API")
+    parser.add_argument("--host", default=settings.api_host)
+    parser.add_argument("--port", type=int, default=settings.api_port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, each with its own warm system and MCP session",
+    )
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "api:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_config=None,
+    )
@@ -0,0 +1,169 @@
+"""Load-test the HTTP API over real sockets with the offline stub model and tools.
+
+    python api_load_test.py --requests 50 --concurrency 25 --model-latency 0.3
+
+Starts the API in-process on a free port around a stub-backed system, then has
+``--concurrency`` clients each submit analyses, follow their SSE progress stream to
+the end and fetch the recommendations. Reports throughput, submit and end-to-end
+latency percentiles, SSE event counts and errors.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+import uvicorn
+
+from api import create_app
+from load_test import StubChatModel, make_stub_tools
+from main import OrchestrationMode, StockResearchSystem
+from tooling import RateLimiter, ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def run_client(client: httpx.AsyncClient, mode: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    response = await client.post(
+        "/analyses", json={"symbols": ["RELIANCE", "TCS"], "mode": mode}
+    )
+    response.raise_for_status()
+    submitted = time.perf_counter() - started
+    job = response.json()
+
+    events = []
+    async with client.stream("GET", job["events_url"]) as stream:
+        async for line in stream.aiter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[6:]))
+
+    result = (await client.get(job["recommendations_url"])).json()
+    return {
+        "submit_seconds": submitted,
+        "total_seconds": time.perf_counter() - started,
+        "events": len(events),
+        "status": result["status"],
+        "recommendations": len(result.get("recommendations", [])),
+    }
+
+
+async def run_api_load_test(args: argparse.Namespace) -> None:
+    system = StockResearchSystem(
+        track_daily_usage=False,
+        cache_pages=False,
+        tool_cache=ToolResultCache(ttl=args.cache_ttl),
+        rate_limiter=RateLimiter(
+            rate=args.tool_rate,
+            burst=args.tool_concurrency,
+            max_concurrency=args.tool_concurrency,
+        ),
+    )
+    await system.initialize(
+        tools=make_stub_tools(args.tool_latency, []),
+        model=StubChatModel(latency=args.model_latency, call_tools=True, sessions=[]),
+    )
+    app = create_app(
+        system=system,
+        settings=system.settings.with_overrides(
+            api_max_concurrent_runs=args.max_concurrent_runs
+        ),
+    )
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_config=None)
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    pending = iter(range(args.requests))
+    outcomes: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        for _ in pending:
+            try:
+                outcomes.append(await run_client(client, args.mode))
+            except Exception as e:
+                errors.append(repr(e))
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits
+    ) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    server.should_exit = True
+    await serving
+
+    totals = [o["total_seconds"] for o in outcomes]
+    submits = [o["submit_seconds"] for o in outcomes]
+    print(f"requests:            {args.requests} ({args.mode})")
+    print(f"client concurrency:  {args.concurrency}")
+    print(f"server run slots:    {args.max_concurrent_runs}")
+    print(f"wall time:           {wall:.2f}s")
+    if outcomes:
+        print(f"throughput:          {len(outcomes) / wall:.2f} analyses/s")
+        print(
+            f"submit p50 / p95:    {statistics.median(submits) * 1000:.1f}ms / "
+            f"{_percentile(submits, 0.95) * 1000:.1f}ms"
+        )
+        print(
+            f"end-to-end p50/p95:  {statistics.median(totals):.2f}s / "
+            f"{_percentile(totals, 0.95):.2f}s"
+        )
+        print(
+            f"SSE events per run:  {min(o['events'] for o in outcomes)}-"
+            f"{max(o['events'] for o in outcomes)}"
+        )
+        print(
+            f"completed:           "
+            f"{sum(1 for o in outcomes if o['status'] == 'completed')}"
+        )
+        print(
+            f"with recommendations: "
+            f"{sum(1 for o in outcomes if o['recommendations'])}"
+        )
+    print(f"errors:              {len(errors)}")
+    for error in errors[:5]:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-concurrent-runs", type=int, default=16)
+    parser.add_argument(
+        "--mode",
+        choices=[m.value for m in OrchestrationMode],
+        default=OrchestrationMode.PIPELINE.value,
+    )
+    parser.add_argument("--model-latency", type=float, default=0.3)
+    parser.add_argument("--tool-latency", type=float, default=0.2)
+    parser.add_argument("--tool-rate", type=float, default=50.0)
+    parser.add_argument("--tool-concurrency", type=int, default=16)
+    parser.add_argument("--cache-ttl", type=float, default=300.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run_api_load_test(args))
@@ -2,16 +2,41 @@
 import streamlit as st
 import asyncio
 import json
-from datetime import datetime
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
 import re
-from typing import Dict, List, Any
+from pathlib import Path
+from typing import Dict, List, Any, Optional
 
 # Import our refactored system
-from main import StockResearchSystem, extract_recommendations
+from archive import RunArchive
+from charts import (
+    INDICATOR_WARMUP_BARS,
+    create_comparison_chart,
+    create_symbol_chart,
+    load_chart_data,
+)
+from checkpoints import get_checkpoint_store
+from coalescing import shared_coalescer
+from exporters import EXPORT_FORMATS, export_archive, export_records
+from fundamentals import get_fundamentals_store
+from main import (
+    StockResearchSystem,
+    OrchestrationMode,
+    extract_recommendations,
+    format_results_for_display,
+    parse_stock_recommendations,
+)
+from metrics import start_metrics_server
+from profiling import Profiler, profiled
+from portfolio_risk import PortfolioRisk, portfolio_risk
+from price_store import PriceStore
+from settings import get_settings
+from symbol_master import get_symbol_master
 
 # Page configuration
 st.set_page_config(
@@ -105,14 +130,30 @@ def init_session_state():
         st.session_state.system = None
 
 
-def validate_api_keys(bright_data_key: str, openai_key: str) -> tuple:
+@st.cache_resource
+def get_archive() -> RunArchive:
+    """Run archive shared by all Streamlit sessions"""
+    return RunArchive(get_settings().archive_path)
+
+
+@st.cache_resource
+def get_price_store() -> PriceStore:
+    """Local OHLCV price store shared by all Streamlit sessions, split/bonus adjusted"""
+    settings = get_settings()
+    path = settings.price_adjustment_path
+    return PriceStore(
+        settings.price_store_path, get_fundamentals_store(path) if path else None
+    )
+
+
+def validate_api_keys(bright_data_key: str, groq_key: str) -> tuple:
     """Validate API keys format"""
     errors = []
 
     if not bright_data_key or len(bright_data_key.strip()) < 10:
         errors.append("Bright Data API token appears to be invalid (too short)")
 
-    if not openai_key or len(openai_key.strip()) < 10:
+    if not groq_key or len(groq_key.strip()) < 10:
         errors.append("GROQ API key appears to be invalid (too short)")
 
     return len(errors) == 0, errors
@@ -130,19 +171,32 @@ def create_sidebar():
         unsafe_allow_html=True,
     )
 
-    # API Key inputs
+    settings = get_settings()
+
+    # API Key inputs; blank inputs fall back to the configured keys
     bright_data_api = st.sidebar.text_input(
         "🌐 Bright Data API Token",
         type="password",
         help="Get your API token from Bright Data dashboard",
-        placeholder="Enter your Bright Data API token...",
+        placeholder=(
+            "Using BRIGHT_DATA_API_TOKEN from environment"
+            if settings.bright_data_api_token
+            else "Enter your Bright Data API token..."
+        ),
     )
 
-    openai_api = st.sidebar.text_input(
+    groq_api = st.sidebar.text_input(
         "🤖 GROQ API Key",
         type="password",
         help="Get your API key from Groq platform",
-        placeholder="gsk_...",
+        placeholder=(
+            "Using GROQ_API_KEY from environment"
+            if settings.groq_api_key
+            else "gsk_..."
+        ),
+    )
+    settings = settings.with_overrides(
+        bright_data_api_token=bright_data_api, groq_api_key=groq_api
     )
 
     st.sidebar.markdown("---")
@@ -160,6 +214,17 @@ def create_sidebar():
         help="Select the type of analysis you want to perform",
     )
 
+    orchestration_mode = st.sidebar.radio(
+        "Orchestration Mode",
+        [OrchestrationMode.SUPERVISOR.value, OrchestrationMode.PIPELINE.value],
+        index=[m.value for m in OrchestrationMode].index(settings.orchestration_mode),
+        format_func=lambda mode: {
+            "supervisor": "🧭 Supervisor (LLM-routed)",
+            "pipeline": "⚡ Pipeline (fixed order, fewer LLM calls)",
+        }[mode],
+        help="Pipeline mode runs the agents in a fixed order without supervisor LLM round-trips",
+    )
+
     custom_query = st.sidebar.text_area(
         "Custom Query (Optional)",
         placeholder="Enter specific requirements or stocks to analyze...",
@@ -217,7 +282,45 @@ def create_sidebar():
     """
     )
 
-    return analyze_button, bright_data_api, openai_api, analysis_type, custom_query
+    return (
+        analyze_button,
+        settings.bright_data_api_token,
+        settings.groq_api_key,
+        analysis_type,
+        custom_query,
+        orchestration_mode,
+    )
+
+
+def select_resumable_run() -> Optional[str]:
+    """Sidebar picker for failed or interrupted runs; returns the run to resume"""
+    settings = get_settings()
+    if not settings.checkpoint_runs:
+        return None
+    runs = get_checkpoint_store(
+        settings.checkpoint_path, settings.checkpoint_retention_hours
+    ).resumable_runs()
+    if not runs:
+        return None
+
+    st.sidebar.markdown("### ⏯️ Resume Failed Runs")
+    labels = {
+        run["thread_id"]: (
+            f"{datetime.fromtimestamp(run['updated_at']):%d %b %H:%M} · "
+            f"{run['mode']} · {(run['query'] or '')[:40]}"
+        )
+        for run in runs
+    }
+    run_id = st.sidebar.selectbox(
+        "Run", list(labels), format_func=labels.get, label_visibility="collapsed"
+    )
+    resume = st.sidebar.button(
+        "⏯️ Resume Run",
+        use_container_width=True,
+        disabled=st.session_state.analysis_running,
+        help="Continue from the last completed agent step",
+    )
+    return run_id if resume else None
 
 
 def display_header():
@@ -235,15 +338,26 @@ def display_header():
 
 
 def parse_recommendations_from_text(text: str) -> List[Dict[str, Any]]:
-    """Parse recommendations from the text output"""
+    """Parse recommendations from the text output
+
+    Symbols are checked against the NSE symbol master: near misses are corrected
+    and unknown symbols skipped.
+    """
     recommendations = []
+    settings = get_settings()
+    symbols = get_symbol_master(settings.symbol_master_path, settings.sector_map_path)
 
-    # Split text into sections for each stock
-    sections = re.split(r"([A-Z]{2,10})\s*-\s*([A-Za-z\s&]+)", text)
+    # Split text into sections for each stock (symbols like M&M and BAJAJ-AUTO)
+    sections = re.split(
+        r"(?<![\w&-])([A-Z][A-Z0-9&\-]{0,19})[ \t]+-[ \t]+([A-Za-z0-9 .,&'()\-]+)",
+        text,
+    )
 
     for i in range(1, len(sections), 3):
         if i + 1 < len(sections):
-            symbol = sections[i].strip()
+            symbol = symbols.validate(sections[i], sections[i + 1].strip())
+            if symbol is None:
+                continue
             company = sections[i + 1].strip()
             content = sections[i + 2] if i + 2 < len(sections) else ""
 
@@ -283,10 +397,9 @@ def parse_recommendations_from_text(text: str) -> List[Dict[str, Any]]:
     return recommendations
 
 
-def display_recommendations(text_output: str):
+@profiled("render:display_recommendations", "render")
+def display_recommendations(recommendations: List[Dict[str, Any]]):
     """Display parsed recommendations in a structured format"""
-    recommendations = parse_recommendations_from_text(text_output)
-
     if not recommendations:
         st.warning("No structured recommendations found in the analysis output.")
         return
@@ -331,45 +444,198 @@ def display_recommendations(text_output: str):
             st.metric("Confidence", rec["confidence"])
 
 
+@profiled("render:display_usage", "render")
+def display_usage(usage: Dict[str, Any]):
+    """Token and cost breakdown per agent for one run"""
+    if not usage.get("total"):
+        return
+
+    total = usage["total"]
+    budget = usage.get("budget") or {}
+    if budget.get("exceeded"):
+        st.warning(
+            f"⚠️ {budget['exceeded'].title()} token budget exceeded "
+            f"({'run stopped' if budget['on_exceed'] == 'stop' else 'switched to fallback model'})"
+        )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Tokens", f"{total['total_tokens']:,}")
+    with col2:
+        st.metric("Estimated Cost", f"${total['cost_usd']:.4f}")
+    with col3:
+        st.metric("LLM Calls", total["calls"])
+
+    by_agent = pd.DataFrame.from_dict(usage.get("by_agent", {}), orient="index")
+    if not by_agent.empty:
+        st.bar_chart(by_agent[["input_tokens", "output_tokens"]])
+        st.dataframe(by_agent, use_container_width=True)
+
+
+def results_cache_key(results: Dict[str, Any]) -> str:
+    """Stable key identifying a run for the render caches"""
+    return results.get("run_id") or results.get("timestamp", "")
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+@profiled("render:build_results_view", "render")
+def build_results_view(run_id: str, _results: Dict[str, Any]) -> Dict[str, Any]:
+    """Format, parse and chart a run once; each rerun gets its own copy of the view"""
+    report = format_results_for_display(_results)
+    recommendations = parse_recommendations_from_text(report)
+    return {
+        "report": report,
+        "recommendations": recommendations,
+        "chart": create_performance_chart(recommendations),
+        "timestamp": _results.get("timestamp", datetime.now().isoformat()),
+    }
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def serialize_transcript(run_id: str, _results: Dict[str, Any]) -> str:
+    """Serialize the raw transcript only when it is first requested"""
+    return json.dumps(_results, default=str, ensure_ascii=False)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_portfolio_risk(run_id: str, _records: tuple) -> Optional[PortfolioRisk]:
+    """Size and measure a run's book once; None when there is nothing to size"""
+    settings = get_settings()
+    try:
+        return portfolio_risk(
+            _records,
+            store=get_price_store(),
+            capital=settings.portfolio_capital,
+            risk_per_trade=settings.risk_per_trade,
+            max_position=settings.max_position_weight,
+        )
+    except ValueError:
+        return None
+
+
+@profiled("render:display_portfolio_risk", "render")
+def display_portfolio_risk(results: Dict[str, Any]):
+    """Position sizes and book-level risk for the run's BUY/SELL calls"""
+    records = results.get("recommendations") or []
+    risk = build_portfolio_risk(results_cache_key(results), tuple(records))
+    if risk is None:
+        st.info(
+            "Portfolio risk needs BUY/SELL recommendations with local price history."
+        )
+        return
+
+    summary = risk.summary
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Gross Exposure", f"{summary['gross_exposure_pct']:.1f}%")
+    with col2:
+        st.metric(
+            "Correlation-Adjusted",
+            f"{summary['correlation_adjusted_exposure_pct']:.1f}%",
+        )
+    with col3:
+        st.metric("Annual Volatility", f"{summary['annual_volatility_pct']:.1f}%")
+    with col4:
+        st.metric(
+            f"VaR 95% ({summary['horizon_days']}d)",
+            f"₹{summary['var_95_horizon']:,.0f}",
+        )
+    st.caption(
+        f"Historical max drawdown {summary['historical_max_drawdown_pct']:.1f}% • "
+        f"loss if every stop is hit ₹{summary['all_stops_hit_loss']:,.0f}"
+    )
+    st.dataframe(
+        risk.positions[
+            [
+                "symbol",
+                "action",
+                "confidence",
+                "entry_price",
+                "stop_loss",
+                "weight",
+                "shares",
+                "daily_volatility_pct",
+                "risk_contribution_pct",
+            ]
+        ],
+        use_container_width=True,
+    )
+
+
+def display_profile(results: Dict[str, Any], render_profiler: Optional[Profiler]):
+    """Slowest operations of the profiled run and of this page render"""
+    profile = results.get("profile")
+    if profile:
+        st.markdown("**Slowest operations in the run**")
+        st.dataframe(pd.DataFrame(profile["top"]), use_container_width=True)
+        folded = Path(profile["folded_path"])
+        if folded.exists():
+            st.download_button(
+                "🔥 Download Flamegraph Stacks",
+                data=folded.read_bytes(),
+                file_name=folded.name,
+                help="Folded stacks for flamegraph.pl, inferno or speedscope",
+            )
+        if profile.get("pstats_path"):
+            st.caption(f"cProfile stats: {profile['pstats_path']}")
+    else:
+        st.info("Enable ⏱️ Profile Runs before starting an analysis to profile it.")
+
+    if render_profiler is not None and render_profiler.spans:
+        st.markdown("**Slowest rendering steps on this page**")
+        st.dataframe(pd.DataFrame(render_profiler.top(10)), use_container_width=True)
+
+
+@profiled("render:display_analysis_results", "render")
 def display_analysis_results(results: Dict[str, Any]):
     """Display the complete analysis results"""
     if not results:
         st.info("No analysis results to display.")
         return
 
-    # Format and display the complete output
-    formatted_output = st.session_state.system.format_results_for_display(results)
+    run_key = results_cache_key(results)
+    view = build_results_view(run_key, results)
 
     # Display timestamp
     col1, col2 = st.columns([3, 1])
     with col1:
         st.markdown("## 📊 Complete Analysis Report")
     with col2:
-        timestamp = results.get("timestamp", datetime.now().isoformat())
-        st.markdown(f"**Generated:** {timestamp[:19].replace('T', ' ')}")
+        st.markdown(f"**Generated:** {view['timestamp'][:19].replace('T', ' ')}")
 
-    # Try to parse and display recommendations
-    display_recommendations(formatted_output)
+    # Display the parsed recommendations
+    display_recommendations(view["recommendations"])
 
     st.markdown("---")
 
+    with st.expander("💰 Token Usage", expanded=False):
+        display_usage(results.get("usage") or {})
+
+    with st.expander("📐 Portfolio Risk", expanded=False):
+        display_portfolio_risk(results)
+
     # Display full analysis in expandable section
     with st.expander("📋 View Complete Analysis Report", expanded=False):
         st.markdown("### Raw Analysis Output")
-        st.text(formatted_output)
+        st.text(view["report"])
 
-        # Display raw data for debugging
+        # Display raw data for debugging, serialized lazily
         if st.checkbox("Show raw data (for debugging)"):
-            st.json(results)
+            st.json(serialize_transcript(run_key, results), expanded=False)
 
 
 async def run_analysis(
-    bright_data_api: str, openai_api: str, analysis_type: str, custom_query: str
+    bright_data_api: str,
+    groq_api: str,
+    analysis_type: str,
+    custom_query: str,
+    orchestration_mode: str = OrchestrationMode.SUPERVISOR.value,
+    resume: Optional[str] = None,
 ):
-    """Run the stock analysis asynchronously"""
+    """Run the stock analysis asynchronously, or resume a failed run by its id"""
     try:
         # Initialize the system
-        system = StockResearchSystem(bright_data_api, openai_api)
+        system = StockResearchSystem(bright_data_api, groq_api, archive=get_archive())
         st.session_state.system = system
 
         # Create query based on analysis type
@@ -385,9 +651,31 @@ async def run_analysis(
                 analysis_type, query_map["Short-term Trading (1-7 days)"]
             )
 
-        # Run analysis
-        results = await system.analyze_stocks(query)
-        return results
+        settings = get_settings()
+        record = None
+        if settings.record_runs:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            record = settings.cassette_dir / f"{stamp}.jsonl.gz"
+
+        async def run(progress) -> Dict[str, Any]:
+            # The MCP session is closed in the task that opened it
+            async with system:
+                if resume:
+                    return await system.analyze_stocks(resume=resume, progress=progress)
+                return await system.analyze_stocks(
+                    query, mode=orchestration_mode, record=record, progress=progress
+                )
+
+        if resume or record is not None:
+            # Resumed runs continue their own checkpoints and a recorded
+            # cassette must come from this session's own run
+            return await run(None)
+
+        # Identical requests from other sessions join this run or reuse its result
+        coalescer = shared_coalescer(
+            settings.coalesce_result_ttl, settings.coalesce_window_seconds
+        )
+        return await coalescer.run(query, orchestration_mode, run)
 
     except Exception as e:
         return {"error": str(e), "status": "error"}
@@ -399,14 +687,19 @@ def main():
     display_header()
 
     # Create sidebar and get inputs
-    analyze_button, bright_data_api, openai_api, analysis_type, custom_query = (
-        create_sidebar()
-    )
+    (
+        analyze_button,
+        bright_data_api,
+        groq_api,
+        analysis_type,
+        custom_query,
+        orchestration_mode,
+    ) = create_sidebar()
 
     # Main content area
     if analyze_button:
         # Validate inputs
-        is_valid, errors = validate_api_keys(bright_data_api, openai_api)
+        is_valid, errors = validate_api_keys(bright_data_api, groq_api)
 
         if not is_valid:
             st.error("❌ Please fix the following issues:")
@@ -427,15 +720,30 @@ def main():
                 # Run the analysis
                 results = asyncio.run(
                     run_analysis(
-                        bright_data_api, openai_api, analysis_type, custom_query
+                        bright_data_api,
+                        groq_api,
+                        analysis_type,
+                        custom_query,
+                        orchestration_mode,
                     )
                 )
 
                 if results.get("status") == "error":
                     st.error(f"❌ Analysis failed: {results.get('error')}")
                     status.update(label="❌ Analysis Failed", state="error")
+                elif results.get("status") == "budget_exceeded":
+                    st.session_state.analysis_results = results
+                    status.update(
+                        label="⚠️ Analysis stopped: token budget exceeded",
+                        state="error",
+                    )
                 else:
                     st.session_state.analysis_results = results
+                    if results.get("coalesced") in ("follower", "cached"):
+                        st.info(
+                            "♻️ Shared the result of an identical analysis run "
+                            "in the last few minutes"
+                        )
                     st.write("✅ Market data analysis completed")
                     st.write("📰 News sentiment analysis completed")
                     st.write("🎯 Generating trading recommendations...")
@@ -559,6 +867,7 @@ def main():
 
 
 # Additional utility functions for enhanced features
+@profiled("render:create_performance_chart", "render")
 def create_performance_chart(recommendations: List[Dict]):
     """Create a performance visualization chart"""
     if not recommendations:
@@ -608,19 +917,44 @@ def create_performance_chart(recommendations: List[Dict]):
     return fig
 
 
-def export_results_to_csv(results: Dict[str, Any]) -> str:
-    """Export analysis results to CSV format"""
-    try:
-        formatted_output = st.session_state.system.format_results_for_display(results)
-        recommendations = parse_recommendations_from_text(formatted_output)
+def write_results_export(results: Dict[str, Any], fmt: str) -> Path:
+    """Stream a run's typed recommendation records to an export file on disk"""
+    records = results.get("recommendations")
+    if records is None:
+        records = parse_stock_recommendations(format_results_for_display(results))
 
-        if recommendations:
-            df = pd.DataFrame(recommendations)
-            return df.to_csv(index=False)
-        else:
-            return "No recommendations found to export."
-    except Exception as e:
-        return f"Error exporting data: {str(e)}"
+    _, suffix, _ = EXPORT_FORMATS[fmt]
+    run_id = results.get("run_id", "run")
+    path = (
+        get_settings().export_path
+        / f"nse_analysis_{run_id}_{datetime.now():%Y%m%d_%H%M}{suffix}"
+    )
+    return export_records(
+        records,
+        path,
+        fmt,
+        run_id=results.get("run_id"),
+        date=results.get("timestamp", "")[:10],
+    )
+
+
+def offer_export_download(export_path: str, container=st.sidebar):
+    """Offer a prepared export file for download without keeping it in session state"""
+    path = Path(export_path)
+    if not path.exists():
+        return
+
+    fmt = next(
+        f for f, (_, suffix, _) in EXPORT_FORMATS.items() if suffix == path.suffix
+    )
+    with path.open("rb") as f:
+        container.download_button(
+            label=f"💾 Save {EXPORT_FORMATS[fmt][0]} File",
+            data=f,
+            file_name=path.name,
+            mime=EXPORT_FORMATS[fmt][2],
+            use_container_width=True,
+        )
 
 
 def add_export_functionality():
@@ -629,35 +963,261 @@ def add_export_functionality():
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 📤 Export Results")
 
-        if st.sidebar.button("📊 Download as CSV", use_container_width=True):
-            csv_data = export_results_to_csv(st.session_state.analysis_results)
-            st.sidebar.download_button(
-                label="💾 Save CSV File",
-                data=csv_data,
-                file_name=f"nse_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                mime="text/csv",
+        fmt = st.sidebar.selectbox(
+            "Export Format",
+            list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f][0],
+        )
+
+        if st.sidebar.button("📊 Prepare Export", use_container_width=True):
+            # Only the file path is kept in session state, never the payload
+            st.session_state.export_path = str(
+                write_results_export(st.session_state.analysis_results, fmt)
+            )
+
+        if st.session_state.get("export_path"):
+            offer_export_download(st.session_state.export_path)
+
+
+async def rescore_live(
+    bright_data_api: str, groq_api: str, recommendations: List[Any]
+) -> List[Dict[str, Any]]:
+    """Poll live quotes once and re-score the recommendations (no LLM calls)"""
+    # The MCP session is closed in the task that opened it
+    async with StockResearchSystem(bright_data_api, groq_api) as system:
+        return await system.rescore_live(recommendations)
+
+
+def display_live_rescoring(
+    bright_data_api: str, groq_api: str, results: Dict[str, Any]
+):
+    """Re-score the run's recommendations against current prices on request"""
+    st.markdown("## 📡 Live Re-scoring")
+    recommendations = results.get("recommendations") or []
+    if not recommendations:
+        st.info("No structured recommendations to re-score.")
+        return
+    if st.button(
+        "📡 Re-score with live quotes",
+        help="Scrape current prices and re-check targets, stops and technicals",
+    ):
+        with st.spinner("Polling live quotes..."):
+            try:
+                scores = asyncio.run(
+                    rescore_live(bright_data_api, groq_api, recommendations)
+                )
+                # Keyed by run so a new analysis doesn't show stale scores
+                st.session_state.live_scores = (results_cache_key(results), scores)
+            except Exception as e:
+                st.error(f"❌ Live quotes failed: {e}")
+    key, scores = st.session_state.get("live_scores") or (None, None)
+    if key != results_cache_key(results) or scores is None:
+        return
+    if scores:
+        st.dataframe(pd.DataFrame(scores), use_container_width=True, hide_index=True)
+    else:
+        st.warning("No live prices were returned for these symbols.")
+
+
+def display_history_view(page_size: int = 100):
+    """Browse archived runs and recommendations straight from the indexed archive"""
+    archive = get_archive()
+    st.markdown("## 📚 Run History")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        symbol = st.text_input("Symbol", placeholder="e.g. RELIANCE").strip().upper()
+    with col2:
+        action = st.selectbox("Action", ["All", "BUY", "SELL", "HOLD"])
+    with col3:
+        date_range = st.date_input("Date range", value=())
+    with col4:
+        status = st.selectbox(
+            "Run status", ["All", "completed", "budget_exceeded", "error"]
+        )
+    status = None if status == "All" else status
+    start, end = (list(date_range) + [None, None])[:2]
+
+    if symbol or action != "All":
+        recommendations = archive.query_recommendations(
+            symbol=symbol or None,
+            action=None if action == "All" else action,
+            start=start,
+            end=end,
+            limit=5000,
+        )
+        st.markdown(f"**{len(recommendations)} matching recommendations**")
+        if recommendations:
+            st.dataframe(
+                pd.DataFrame(recommendations).drop(columns=["id", "reasoning"]),
                 use_container_width=True,
+                hide_index=True,
+            )
+
+        fmt = st.selectbox(
+            "Export all matches as",
+            list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f][0],
+        )
+        if st.button("📤 Export matches"):
+            _, suffix, _ = EXPORT_FORMATS[fmt]
+            st.session_state.history_export_path = str(
+                export_archive(
+                    archive,
+                    get_settings().export_path
+                    / f"nse_history_{datetime.now():%Y%m%d_%H%M%S}{suffix}",
+                    fmt,
+                    symbol=symbol or None,
+                    action=None if action == "All" else action,
+                    start=start,
+                    end=end,
+                )
             )
+        if st.session_state.get("history_export_path"):
+            offer_export_download(st.session_state.history_export_path, st)
+        return
+
+    total = archive.count_runs(start=start, end=end, status=status)
+    if not total:
+        st.info("No matching archived runs.")
+        return
+
+    pages = (total - 1) // page_size + 1
+    page = st.number_input(
+        f"Page (of {pages}, {total} runs)", min_value=1, max_value=pages, value=1
+    )
+    runs = archive.list_runs(
+        limit=page_size,
+        offset=(page - 1) * page_size,
+        start=start,
+        end=end,
+        status=status,
+    )
+    st.dataframe(pd.DataFrame(runs), use_container_width=True, hide_index=True)
+
+    run_id = st.selectbox(
+        "Inspect run",
+        [run["run_id"] for run in runs],
+        format_func=lambda rid: next(
+            f"{r['created_at'][:19].replace('T', ' ')} · {r['mode']} · "
+            f"{r['status']} · {rid[:8]}"
+            for r in runs
+            if r["run_id"] == rid
+        ),
+    )
+    run = archive.get_run(run_id)
+    if run is None:
+        return
+
+    if run["error"]:
+        st.error(f"❌ Run failed: {run['error']}")
+
+    if run["recommendations"]:
+        st.dataframe(
+            pd.DataFrame(run["recommendations"]).drop(columns=["id", "run_id"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+    if run["timings"]:
+        st.bar_chart(pd.Series(run["timings"], name="seconds"))
+    display_usage(run["usage"])
+    with st.expander("📋 Archived report", expanded=False):
+        st.text(run["report"] or "")
+
+
+@st.cache_resource(max_entries=64, ttl=600, show_spinner=False)
+def build_symbol_chart(symbol: str, start, end):
+    """Build (once per symbol and range) the candlestick/volume/RSI/MACD chart"""
+    frames = load_chart_data(
+        get_price_store(), [symbol], start, end, warmup_bars=INDICATOR_WARMUP_BARS
+    )
+    return create_symbol_chart(frames[symbol], symbol, start=start) if frames else None
+
+
+@st.cache_resource(max_entries=16, ttl=600, show_spinner=False)
+def build_comparison_chart(symbols: tuple, start, end):
+    """Build (once per symbol set and range) the rebased comparison chart"""
+    frames = load_chart_data(get_price_store(), symbols, start, end)
+    if not frames:
+        return None
+    closes = pd.DataFrame({symbol: frame["close"] for symbol, frame in frames.items()})
+    return create_comparison_chart(closes)
+
+
+@profiled("render:display_price_charts", "render")
+def display_price_charts(recommended_symbols: List[str]):
+    """Interactive price and indicator charts for recommended symbols from local data"""
+    stored_symbols = get_price_store().symbols()
+    st.markdown("## 📈 Price & Indicator Charts")
+    if not stored_symbols:
+        st.info("No local price history found. Populate data/prices/ to enable charts.")
+        return
+
+    defaults = [s for s in recommended_symbols if s in stored_symbols]
+    selected = st.multiselect(
+        "Symbols", stored_symbols, default=defaults or stored_symbols[:1]
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.date_input("From", value=datetime.now() - timedelta(days=365))
+    with col2:
+        end = st.date_input("To", value=datetime.now())
+
+    if not selected:
+        return
+
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    comparison = build_comparison_chart(tuple(selected), start, end)
+    if comparison:
+        st.plotly_chart(comparison, use_container_width=True)
+
+    # Only the focused symbol's detailed chart is built and sent to the browser
+    focus = st.selectbox("Detailed chart", selected)
+    chart = build_symbol_chart(focus, start, end)
+    if chart:
+        st.plotly_chart(chart, use_container_width=True)
+    else:
+        st.info(f"No price history for {focus} in the selected range.")
 
 
 # Enhanced main function with additional features
 def enhanced_main():
     """Enhanced main function with additional features"""
     init_session_state()
+    settings = get_settings()
+    if settings.metrics_port:
+        # Once per process; later reruns get the running server
+        start_metrics_server(settings.metrics_host, settings.metrics_port)
     display_header()
 
     # Create sidebar and get inputs
-    analyze_button, bright_data_api, openai_api, analysis_type, custom_query = (
-        create_sidebar()
-    )
+    (
+        analyze_button,
+        bright_data_api,
+        groq_api,
+        analysis_type,
+        custom_query,
+        orchestration_mode,
+    ) = create_sidebar()
+    resume_run = select_resumable_run()
 
     # Add export functionality
     add_export_functionality()
 
+    profile_runs = st.sidebar.toggle(
+        "⏱️ Profile Runs",
+        help="Time startup, agents, LLM and tool calls and page rendering (slower)",
+    )
+    render_profiler = Profiler() if profile_runs else None
+
+    if st.sidebar.toggle("📚 Run History", help="Browse archived runs"):
+        display_history_view()
+        return
+
     # Main content area
-    if analyze_button:
+    if analyze_button or resume_run:
         # Validate inputs
-        is_valid, errors = validate_api_keys(bright_data_api, openai_api)
+        is_valid, errors = validate_api_keys(bright_data_api, groq_api)
 
         if not is_valid:
             st.error("❌ Please fix the following issues:")
@@ -676,17 +1236,39 @@ def enhanced_main():
 
             try:
                 # Run the analysis
-                results = asyncio.run(
-                    run_analysis(
-                        bright_data_api, openai_api, analysis_type, custom_query
+                profiler = Profiler(cprofile=True) if profile_runs else None
+                with profiler.activate() if profiler else nullcontext():
+                    results = asyncio.run(
+                        run_analysis(
+                            bright_data_api,
+                            groq_api,
+                            analysis_type,
+                            custom_query,
+                            orchestration_mode,
+                            resume=resume_run,
+                        )
+                    )
+                if profiler is not None and results.get("run_id"):
+                    results["profile"] = profiler.save(
+                        get_settings().profile_dir, results["run_id"]
                     )
-                )
 
                 if results.get("status") == "error":
                     st.error(f"❌ Analysis failed: {results.get('error')}")
                     status.update(label="❌ Analysis Failed", state="error")
+                elif results.get("status") == "budget_exceeded":
+                    st.session_state.analysis_results = results
+                    status.update(
+                        label="⚠️ Analysis stopped: token budget exceeded",
+                        state="error",
+                    )
                 else:
                     st.session_state.analysis_results = results
+                    if results.get("coalesced") in ("follower", "cached"):
+                        st.info(
+                            "♻️ Shared the result of an identical analysis run "
+                            "in the last few minutes"
+                        )
                     st.write("✅ Market data analysis completed")
                     st.write("📰 News sentiment analysis completed")
                     st.write("🎯 Generating trading recommendations...")
@@ -707,19 +1289,30 @@ def enhanced_main():
 
     # Display results if available
     if st.session_state.analysis_results:
-        display_analysis_results(st.session_state.analysis_results)
+        with render_profiler.activate() if render_profiler else nullcontext():
+            display_analysis_results(st.session_state.analysis_results)
 
-        # Add performance visualization
-        formatted_output = st.session_state.system.format_results_for_display(
-            st.session_state.analysis_results
-        )
-        recommendations = parse_recommendations_from_text(formatted_output)
+            # Add performance visualization from the cached view model
+            view = build_results_view(
+                results_cache_key(st.session_state.analysis_results),
+                st.session_state.analysis_results,
+            )
+
+            if view["chart"]:
+                st.markdown("---")
+                st.plotly_chart(view["chart"], use_container_width=True)
 
-        if recommendations:
             st.markdown("---")
-            chart = create_performance_chart(recommendations)
-            if chart:
-                st.plotly_chart(chart, use_container_width=True)
+            display_price_charts([rec["symbol"] for rec in view["recommendations"]])
+
+            st.markdown("---")
+            display_live_rescoring(
+                bright_data_api, groq_api, st.session_state.analysis_results
+            )
+
+        if profile_runs:
+            with st.expander("⏱️ Profile", expanded=True):
+                display_profile(st.session_state.analysis_results, render_profiler)
 
     elif not st.session_state.analysis_running:
         # Show welcome message and instructions
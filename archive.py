@@ -0,0 +1,321 @@
+import json
+import logging
+import math
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PATH = Path("data") / "research_archive.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    query TEXT,
+    mode TEXT,
+    status TEXT,
+    duration_seconds REAL,
+    total_tokens INTEGER,
+    timings TEXT,
+    usage TEXT,
+    report TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (run_date, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, run_date);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    company_name TEXT,
+    action TEXT NOT NULL,
+    confidence TEXT,
+    current_price REAL,
+    target_price REAL,
+    stop_loss REAL,
+    entry_low REAL,
+    entry_high REAL,
+    time_horizon TEXT,
+    reasoning TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recommendations_symbol ON recommendations (symbol, run_date);
+CREATE INDEX IF NOT EXISTS idx_recommendations_date ON recommendations (run_date);
+CREATE INDEX IF NOT EXISTS idx_recommendations_action ON recommendations (action, run_date);
+CREATE INDEX IF NOT EXISTS idx_recommendations_run ON recommendations (run_id);
+
+CREATE TABLE IF NOT EXISTS market_snapshots (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (run_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_symbol ON market_snapshots (symbol, run_date);
+"""
+
+RECOMMENDATION_FIELDS = (
+    "symbol",
+    "company_name",
+    "action",
+    "confidence",
+    "current_price",
+    "target_price",
+    "stop_loss",
+    "entry_low",
+    "entry_high",
+    "time_horizon",
+    "reasoning",
+)
+
+RUN_COLUMNS = (
+    "run_id",
+    "created_at",
+    "run_date",
+    "query",
+    "mode",
+    "status",
+    "duration_seconds",
+    "total_tokens",
+    "timings",
+    "usage",
+    "report",
+    "error",
+)
+
+RUN_LIST_COLUMNS = (
+    "run_id, created_at, run_date, query, mode, status, duration_seconds, "
+    "total_tokens, error"
+)
+
+
+def _record_to_row(record: Any) -> Dict[str, Any]:
+    row = asdict(record) if is_dataclass(record) else dict(record)
+    values = {field: row.get(field) for field in RECOMMENDATION_FIELDS}
+    # Prices that could not be parsed are NaN on the record; store them as NULL
+    return {
+        field: (
+            value.value
+            if isinstance(value, Enum)
+            else None if isinstance(value, float) and math.isnan(value) else value
+        )
+        for field, value in values.items()
+    }
+
+
+class RunArchive:
+    """SQLite archive of runs, their recommendations and market snapshots.
+
+    Failed runs are stored too, with their error, timings and token usage.
+
+    Only structured data is stored and queried; raw agent transcripts are not
+    persisted, so listing and filtering thousands of runs stays index-bound.
+    """
+
+    def __init__(self, path: Path = ARCHIVE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            if columns and "error" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN error TEXT")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call keeps the archive safe across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_run(self, results: Dict[str, Any], report: str = "") -> str:
+        """Persist an ``analyze_stocks`` result and its final report text.
+
+        A failed run has ``status`` ``"error"`` and an ``error``; resuming it later
+        replaces the stored run.
+        """
+        run_id = results["run_id"]
+        created_at = results["timestamp"]
+        run_date = created_at[:10]
+        usage = results.get("usage") or {}
+
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(RUN_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                (
+                    run_id,
+                    created_at,
+                    run_date,
+                    results.get("query"),
+                    results.get("mode"),
+                    results.get("status"),
+                    results.get("duration_seconds"),
+                    usage.get("total", {}).get("total_tokens"),
+                    json.dumps(results.get("timings", {})),
+                    json.dumps(usage),
+                    report,
+                    results.get("error"),
+                ),
+            )
+            conn.execute("DELETE FROM recommendations WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                f"INSERT INTO recommendations (run_id, run_date, {', '.join(RECOMMENDATION_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(RECOMMENDATION_FIELDS))})",
+                [
+                    (run_id, run_date, *_record_to_row(rec).values())
+                    for rec in results.get("recommendations", [])
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO market_snapshots VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, run_date, symbol, json.dumps(payload, default=str))
+                    for symbol, payload in results.get("prefetched", {}).items()
+                ],
+            )
+
+        logger.info("Run archived", extra={"run_id": run_id})
+        return run_id
+
+    def list_runs(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """List runs newest first, without loading reports or transcripts"""
+        clauses, params = self._date_range(start, end, status)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {RUN_LIST_COLUMNS} FROM runs {clauses} "
+                "ORDER BY run_date DESC, created_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_runs(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> int:
+        clauses, params = self._date_range(start, end, status)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM runs {clauses}", params
+            ).fetchone()[0]
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Load one run with its recommendations and market snapshots"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            recommendations = conn.execute(
+                "SELECT * FROM recommendations WHERE run_id = ? ORDER BY id", (run_id,)
+            ).fetchall()
+            snapshots = conn.execute(
+                "SELECT symbol, payload FROM market_snapshots WHERE run_id = ?",
+                (run_id,),
+            ).fetchall()
+
+        run = dict(row)
+        run["timings"] = json.loads(run["timings"] or "{}")
+        run["usage"] = json.loads(run["usage"] or "{}")
+        run["recommendations"] = [dict(rec) for rec in recommendations]
+        run["market_snapshots"] = {
+            s["symbol"]: json.loads(s["payload"]) for s in snapshots
+        }
+        return run
+
+    def query_recommendations(
+        self,
+        symbol: Optional[str] = None,
+        action: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Filter archived recommendations by symbol, action and date (``YYYY-MM-DD``).
+
+        Rows carry a ``date`` key so they can be passed straight to the backtester.
+        """
+        sql, params = self._recommendations_query(symbol, action, start, end, limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def iter_recommendations(
+        self,
+        symbol: Optional[str] = None,
+        action: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        batch_size: int = 10_000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream matching recommendations in batches, for exports of large result sets"""
+        sql, params = self._recommendations_query(symbol, action, start, end)
+        with self._connect() as conn:
+            cursor = conn.execute(sql, params)
+            while rows := cursor.fetchmany(batch_size):
+                yield [dict(row) for row in rows]
+
+    def _recommendations_query(
+        self,
+        symbol: Optional[str],
+        action: Optional[str],
+        start: Optional[str],
+        end: Optional[str],
+        limit: Optional[int] = None,
+    ):
+        clauses, params = self._date_range(start, end)
+        conditions = [clauses.removeprefix("WHERE ")] if clauses else []
+        if symbol:
+            conditions.append("symbol = ?")
+            params.append(symbol)
+        if action:
+            conditions.append("action = ?")
+            params.append(action)
+
+        sql = "SELECT *, run_date AS date FROM recommendations"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY run_date DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    @staticmethod
+    def _date_range(
+        start: Optional[str], end: Optional[str], status: Optional[str] = None
+    ):
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if start:
+            conditions.append("run_date >= ?")
+            params.append(str(start)[:10])
+        if end:
+            conditions.append("run_date <= ?")
+            params.append(str(end)[:10])
+        clauses = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return clauses, params
@@ -0,0 +1,330 @@
+import argparse
+import logging
+import re
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from fundamentals import FundamentalsStore
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON_DAYS = 5
+TRADING_DAYS_PER_WEEK = 5
+
+RECOMMENDATION_COLUMNS = [
+    "date",
+    "symbol",
+    "action",
+    "confidence",
+    "entry_price",
+    "target_price",
+    "stop_loss",
+    "horizon_days",
+]
+
+
+def horizon_to_days(
+    time_horizon: Optional[str], default: int = DEFAULT_HORIZON_DAYS
+) -> int:
+    """Convert a horizon such as '1-3 days' or '1-2 weeks' to trading days (upper bound)"""
+    match = re.search(
+        r"(\d+)(?:\s*-\s*(\d+))?\s*(day|week)", str(time_horizon or ""), re.I
+    )
+    if not match:
+        return default
+    days = int(match.group(2) or match.group(1))
+    return days * TRADING_DAYS_PER_WEEK if match.group(3).lower() == "week" else days
+
+
+def recommendations_to_frame(
+    records: Iterable[Any], as_of: Optional[str | pd.Timestamp] = None
+) -> pd.DataFrame:
+    """Normalize stored recommendation records into the backtester's input frame.
+
+    Records may be ``StockRecommendation`` instances or dicts; each needs a date,
+    either on the record (``date``/``timestamp``) or via ``as_of``.
+    """
+    rows = []
+    for record in records:
+        row = asdict(record) if is_dataclass(record) else dict(record)
+        row = {k: v.value if isinstance(v, Enum) else v for k, v in row.items()}
+
+        entry_low, entry_high = row.get("entry_low"), row.get("entry_high")
+        entry = row.get("entry_price")
+        if entry is None and entry_low is not None and entry_high is not None:
+            entry = (entry_low + entry_high) / 2
+        if entry is None:
+            entry = row.get("current_price")
+
+        rows.append(
+            {
+                "date": row.get("date") or row.get("timestamp") or as_of,
+                "symbol": row["symbol"],
+                "action": str(row["action"]).upper(),
+                "confidence": str(row.get("confidence") or "MEDIUM").upper(),
+                "entry_price": entry,
+                "target_price": row.get("target_price"),
+                "stop_loss": row.get("stop_loss"),
+                "horizon_days": row.get("horizon_days")
+                or horizon_to_days(row.get("time_horizon")),
+            }
+        )
+
+    frame = pd.DataFrame(rows, columns=RECOMMENDATION_COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"]).dt.normalize()
+    for column in ("entry_price", "target_price", "stop_loss"):
+        frame[column] = pd.to_numeric(
+            frame[column].astype(str).str.replace(",", ""), errors="coerce"
+        )
+    frame["horizon_days"] = frame["horizon_days"].astype(int)
+    return frame
+
+
+def run_backtest(
+    recommendations: pd.DataFrame, panel: Dict[str, pd.DataFrame]
+) -> pd.DataFrame:
+    """Evaluate every recommendation against the bars that followed it.
+
+    All recommendations are evaluated at once on (n_recommendations × horizon)
+    matrices gathered from the wide OHLC panel. The recommended entry is a limit
+    order: it fills on the first bar that trades through it, at that bar's open
+    when the open is already better, and is ``unfilled`` if no bar within the
+    horizon reaches it. Without an entry price the trade fills at the next open.
+    Target and stop count from the fill bar; when both fall on the same bar the
+    stop is assumed to have been hit first. Trades whose horizon hasn't passed
+    yet are ``pending`` (not filled) or ``open`` (filled, neither level hit).
+    """
+    recs = recommendations.reset_index(drop=True).copy()
+    if recs.empty:
+        return recs.assign(
+            outcome=[],
+            fill_price=[],
+            exit_price=[],
+            bars_held=[],
+            days_to_target=[],
+            return_pct=[],
+        )
+
+    dates = panel["close"].index.values
+    symbols = panel["close"].columns
+
+    cols = symbols.get_indexer(recs["symbol"])
+    starts = np.searchsorted(dates, recs["date"].values, side="right")
+    horizon = int(recs["horizon_days"].max())
+
+    steps = np.arange(horizon)
+    rows = starts[:, None] + steps[None, :]
+    valid = (
+        (cols[:, None] >= 0)
+        & (rows < len(dates))
+        & (steps[None, :] < recs["horizon_days"].values[:, None])
+    )
+    safe_rows = np.minimum(rows, len(dates) - 1)
+    safe_cols = np.maximum(cols, 0)[:, None]
+
+    def gather(field: str) -> np.ndarray:
+        values = panel[field].to_numpy(dtype=float)[safe_rows, safe_cols]
+        return np.where(valid, values, np.nan)
+
+    opens, highs, lows, closes = (
+        gather("open"),
+        gather("high"),
+        gather("low"),
+        gather("close"),
+    )
+
+    entry = recs["entry_price"].to_numpy(dtype=float)
+    target = recs["target_price"].to_numpy(dtype=float)
+    stop = recs["stop_loss"].to_numpy(dtype=float)
+
+    # BUY/SELL trade in their direction; HOLD is scored toward its target
+    reference = np.where(np.isnan(entry), opens[:, 0], entry)
+    direction = np.select(
+        [recs["action"].eq("SELL"), recs["action"].eq("HOLD") & (target < reference)],
+        [-1.0, -1.0],
+        1.0,
+    )
+    favourable = np.where(direction[:, None] > 0, highs, lows)
+    adverse = np.where(direction[:, None] > 0, lows, highs)
+
+    with np.errstate(invalid="ignore"):
+        fill_hit = np.where(
+            np.isnan(entry)[:, None],
+            valid,
+            direction[:, None] * (adverse - entry[:, None]) <= 0,
+        )
+    filled = fill_hit.any(axis=1)
+    first_fill = np.where(filled, fill_hit.argmax(axis=1), horizon)
+    fill_open = opens[np.arange(len(recs)), np.minimum(first_fill, horizon - 1)]
+    # A limit order fills at the open when the bar gaps through the entry
+    fill_price = np.where(
+        np.isnan(entry),
+        fill_open,
+        np.where(direction * (fill_open - entry) < 0, fill_open, entry),
+    )
+    fill_price = np.where(filled, fill_price, np.nan)
+
+    after_fill = steps[None, :] >= first_fill[:, None]
+    with np.errstate(invalid="ignore"):
+        target_hit = after_fill & (
+            direction[:, None] * (favourable - target[:, None]) >= 0
+        )
+        stop_hit = after_fill & (direction[:, None] * (adverse - stop[:, None]) <= 0)
+
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), horizon)
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), horizon)
+
+    bars = valid.sum(axis=1)
+    finished = bars >= recs["horizon_days"].to_numpy()
+    last_close = closes[np.arange(len(recs)), np.maximum(bars - 1, 0)]
+
+    stopped = first_stop <= first_target
+    outcome = np.select(
+        [
+            ~filled & finished,
+            ~filled,
+            (first_stop < horizon) & stopped,
+            first_target < horizon,
+            finished,
+        ],
+        ["unfilled", "pending", "stop", "target", "expired"],
+        "open",
+    )
+    exit_price = np.select(
+        [outcome == "target", outcome == "stop", outcome == "expired"],
+        [target, stop, last_close],
+        np.nan,
+    )
+
+    recs["outcome"] = outcome
+    recs["fill_price"] = fill_price
+    recs["exit_price"] = exit_price
+    recs["bars_held"] = np.select(
+        [outcome == "target", outcome == "stop", filled],
+        [first_target - first_fill + 1, first_stop - first_fill + 1, bars - first_fill],
+        0,
+    )
+    recs["days_to_target"] = np.where(outcome == "target", first_target + 1, np.nan)
+    recs["return_pct"] = direction * (exit_price / fill_price - 1) * 100
+    return recs
+
+
+def summarize_backtest(trades: pd.DataFrame) -> pd.DataFrame:
+    """Hit rate, time-to-target, stop-out rate and return distribution per action and confidence.
+
+    Only closed trades (target, stop or expired) are scored; ``unfilled`` counts
+    recommendations whose entry was never reached, and ``open``/``pending``
+    trades are left out until their horizon has passed.
+    """
+    closed = trades["outcome"].isin(["target", "stop", "expired"])
+    decided = trades[closed | trades["outcome"].eq("unfilled")].assign(
+        unfilled=lambda df: df["outcome"].eq("unfilled"),
+        hit=lambda df: df["outcome"].eq("target").where(~df["unfilled"]),
+        stopped=lambda df: df["outcome"].eq("stop").where(~df["unfilled"]),
+        won=lambda df: (df["return_pct"] > 0).where(~df["unfilled"]),
+    )
+    grouped = decided.groupby(["action", "confidence"])
+    summary = grouped.agg(
+        trades=("hit", "count"),
+        unfilled=("unfilled", "sum"),
+        hit_rate=("hit", "mean"),
+        stop_out_rate=("stopped", "mean"),
+        win_rate=("won", "mean"),
+        avg_days_to_target=("days_to_target", "mean"),
+        mean_return_pct=("return_pct", "mean"),
+        std_return_pct=("return_pct", "std"),
+    )
+    quantiles = (
+        grouped["return_pct"]
+        .quantile([0.05, 0.25, 0.5, 0.75, 0.95])
+        .unstack()
+        .rename(columns=lambda q: f"p{int(q * 100):02d}_return_pct")
+    )
+    return summary.join(quantiles)
+
+
+def adjust_recommendation_prices(
+    recommendations: pd.DataFrame, actions: FundamentalsStore
+) -> pd.DataFrame:
+    """Rescale entry, target and stop to the split/bonus adjusted price basis.
+
+    A recommendation's prices were quoted at the share count of its date, so they
+    get that date's adjustment factor, the same one applied to its bars.
+    """
+    recs = recommendations.copy()
+    symbols = recs["symbol"].unique()
+    dates = pd.DatetimeIndex(recs["date"].unique()).sort_values()
+    factors = actions.adjustment_factors(symbols, dates).to_numpy()
+    factor = factors[
+        dates.get_indexer(recs["date"]), pd.Index(symbols).get_indexer(recs["symbol"])
+    ]
+    for column in ("entry_price", "target_price", "stop_loss"):
+        recs[column] = recs[column] * factor
+    return recs
+
+
+def backtest_recommendations(
+    records: Iterable[Any] | pd.DataFrame,
+    store: Optional[PriceStore] = None,
+    as_of: Optional[str | pd.Timestamp] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Backtest stored recommendations against the local price store"""
+    store = store or PriceStore()
+    recs = (
+        records
+        if isinstance(records, pd.DataFrame)
+        else recommendations_to_frame(records, as_of)
+    )
+
+    panel = store.load_panel(recs["symbol"].unique(), start=recs["date"].min())
+    if panel["close"].empty:
+        raise ValueError("No local price history found for the recommended symbols")
+    if store.actions is not None:
+        recs = adjust_recommendation_prices(recs, store.actions)
+
+    trades = run_backtest(recs, panel)
+    logger.info(
+        "Backtest completed",
+        extra={
+            "trades": len(trades),
+            **{
+                outcome: int((trades["outcome"] == outcome).sum())
+                for outcome in ("open", "pending", "unfilled")
+            },
+        },
+    )
+    return trades, summarize_backtest(trades)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest stored recommendations")
+    parser.add_argument(
+        "recommendations", help="CSV or JSON-lines recommendation records"
+    )
+    parser.add_argument(
+        "--fundamentals",
+        help="Corporate actions database to split/bonus adjust prices with",
+    )
+    args = parser.parse_args()
+
+    if args.recommendations.endswith(".csv"):
+        records = pd.read_csv(args.recommendations).to_dict("records")
+    else:
+        records = pd.read_json(args.recommendations, lines=True).to_dict("records")
+
+    actions = FundamentalsStore(Path(args.fundamentals)) if args.fundamentals else None
+    trades, summary = backtest_recommendations(records, PriceStore(actions=actions))
+    print(summary.to_string())
+    counts = trades["outcome"].value_counts()
+    print(
+        f"\n{counts.get('unfilled', 0)} unfilled (entry never reached), "
+        f"{counts.get('open', 0) + counts.get('pending', 0)} still within their horizon "
+        "and not scored. Entries fill as limit orders; same-bar target and stop "
+        "count as a stop."
+    )
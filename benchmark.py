@@ -0,0 +1,155 @@
+"""Compare latency, tokens and cost of model routing configurations.
+
+    python benchmark.py --runs 5 --mode pipeline            # offline stub models
+    python benchmark.py --runs 2 --mode supervisor --live   # Groq + Bright Data
+    python benchmark.py --runs 20 --replay data/cassettes/run.jsonl.gz
+
+
+"single" sends every agent and the supervisor to MODEL_NAME; "tiered" uses the
+default routes from model_router (small model for routing, tool arguments and
+news, large model for recommendation synthesis). ``--replay`` instead times a
+recorded run served from its cassette, i.e. the system's own overhead without
+model or network latency.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, Dict, List
+
+from cassette import REPLAY, Cassette
+from load_test import StubChatModel, make_stub_tools
+from main import OrchestrationMode, StockResearchSystem
+from model_router import DEFAULT_ROUTES, SINGLE_MODEL_ROUTES, ModelRouter
+from tooling import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+CONFIGS = {"single": SINGLE_MODEL_ROUTES, "tiered": DEFAULT_ROUTES}
+
+# Simulated seconds per call for offline runs
+STUB_LATENCY = {"llama-3.3-70b-versatile": 0.8, "llama-3.1-8b-instant": 0.2}
+
+
+def add_usage(by_model: Dict[str, Dict[str, float]], usage: Dict[str, Any]) -> None:
+    for model, model_usage in usage["by_model"].items():
+        totals = by_model.setdefault(
+            model, {"calls": 0, "total_tokens": 0, "cost_usd": 0.0}
+        )
+        for key in totals:
+            totals[key] += model_usage[key]
+
+
+async def benchmark_config(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    system = StockResearchSystem(
+        track_daily_usage=False,
+        cache_pages=False,
+        # A fresh cache per config so both see the same tool latency
+        tool_cache=ToolResultCache(),
+    )
+    tiers = system.settings.model_tiers
+    if args.live:
+        system.router = ModelRouter(system._create_budgeted_model, tiers, CONFIGS[name])
+        await system.initialize()
+    else:
+        system.router = ModelRouter(
+            lambda model_name: StubChatModel(
+                model_name=model_name,
+                latency=STUB_LATENCY.get(model_name, 0.5) * args.latency_scale,
+                call_tools=True,
+                sessions=[],
+            ),
+            tiers,
+            CONFIGS[name],
+        )
+        await system.initialize(tools=make_stub_tools(0.1 * args.latency_scale, []))
+
+    latencies: List[float] = []
+    by_model: Dict[str, Dict[str, float]] = {}
+    try:
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            results = await system.analyze_stocks(mode=args.mode, prefetch=False)
+            latencies.append(time.perf_counter() - started)
+            add_usage(by_model, results["usage"])
+    finally:
+        await system.close()
+
+    return {"latencies": latencies, "by_model": by_model}
+
+
+def print_report(name: str, report: Dict[str, Any]) -> None:
+    latencies = report["latencies"]
+    by_model = report["by_model"]
+    print(f"\n== {name} ==")
+    print(f"runs:          {len(latencies)}")
+    print(f"latency mean:  {statistics.mean(latencies):.2f}s")
+    print(f"latency p50:   {statistics.median(latencies):.2f}s")
+    print(f"latency max:   {max(latencies):.2f}s")
+    print(f"total tokens:  {sum(m['total_tokens'] for m in by_model.values()):,}")
+    print(f"est. cost:     ${sum(m['cost_usd'] for m in by_model.values()):.4f}")
+    for model, totals in sorted(by_model.items()):
+        print(
+            f"  {model:<40} calls={totals['calls']:<4} "
+            f"tokens={totals['total_tokens']:<8,} cost=${totals['cost_usd']:.4f}"
+        )
+
+
+async def benchmark_replay(args: argparse.Namespace) -> Dict[str, Any]:
+    recorded = Cassette(args.replay, REPLAY).metadata
+    system = StockResearchSystem(track_daily_usage=False)
+    latencies: List[float] = []
+    by_model: Dict[str, Dict[str, float]] = {}
+    try:
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            results = await system.analyze_stocks(
+                recorded.get("query"),
+                mode=recorded.get("mode", args.mode),
+                replay=args.replay,
+            )
+            latencies.append(time.perf_counter() - started)
+            add_usage(by_model, results["usage"])
+    finally:
+        await system.close()
+
+    return {"latencies": latencies, "by_model": by_model}
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.replay:
+        print_report(f"replay {args.replay}", await benchmark_replay(args))
+        return
+    for name in args.configs:
+        print_report(name, await benchmark_config(name, args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--mode",
+        choices=[m.value for m in OrchestrationMode],
+        default=OrchestrationMode.PIPELINE.value,
+    )
+    parser.add_argument(
+        "--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS)
+    )
+    parser.add_argument(
+        "--live", action="store_true", help="Use Groq and Bright Data instead of stubs"
+    )
+    parser.add_argument(
+        "--replay", metavar="CASSETTE", help="Time replays of a recorded run"
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for simulated stub latency",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import messages_from_dict, message_to_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+CASSETTE_DIR = Path("data") / "cassettes"
+
+# Placeholder Groq key for systems initialized from a cassette; never sent anywhere
+OFFLINE_API_KEY = "offline-replay"
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for an LLM or tool request the cassette has no recording of"""
+
+
+def _digest(payload: Any) -> str:
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:24]
+
+
+def normalize_prompt(prompt: str) -> List[Dict[str, Any]]:
+    """Reduce LangChain's serialized prompt to the parts that decide the response.
+
+    Message and tool-call IDs are dropped: they are random per run (e.g. supervisor
+    hand-back messages), so a replayed run would never match its recording.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return [{"content": prompt}]
+
+    normalized = []
+    for message in messages if isinstance(messages, list) else [messages]:
+        kwargs = message.get("kwargs", message) if isinstance(message, dict) else {}
+        normalized.append(
+            {
+                "type": kwargs.get("type"),
+                "name": kwargs.get("name"),
+                "content": kwargs.get("content"),
+                "tool_calls": [
+                    {"name": call.get("name"), "args": call.get("args")}
+                    for call in kwargs.get("tool_calls") or []
+                ],
+            }
+        )
+    return normalized
+
+
+def tool_spec(tool: BaseTool) -> Dict[str, Any]:
+    schema = tool.args_schema
+    if schema is not None and not isinstance(schema, dict):
+        schema = schema.model_json_schema()
+    return {"name": tool.name, "description": tool.description, "args_schema": schema}
+
+
+class Cassette:
+    """Every LLM exchange and tool call of one run, stored as gzip-compressed JSON lines.
+
+    Recordings are keyed by a hash of the normalized request; identical requests are
+    replayed in the order they were recorded.
+    """
+
+    def __init__(self, path: str | Path, mode: str = RECORD):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Cassette mode must be {RECORD} or {REPLAY}, got {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.metadata: Dict[str, Any] = {}
+        self.tools: List[Dict[str, Any]] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(
+                    f"Unsupported cassette version {header.get('version')} in {self.path}"
+                )
+            self.metadata = header.get("metadata", {})
+            self.tools = header.get("tools", [])
+            for line in f:
+                entry = json.loads(line)
+                self._entries.append(entry)
+                self._by_key.setdefault(entry["key"], []).append(entry)
+        logger.info(
+            "Cassette loaded",
+            extra={"cassette": str(self.path), "entries": len(self._entries)},
+        )
+
+    def save(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": CASSETTE_VERSION,
+            "recorded_at": datetime.now().isoformat(),
+            "metadata": self.metadata,
+            "tools": self.tools,
+        }
+        with self._lock:
+            entries = list(self._entries)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for record in (header, *entries):
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        logger.info(
+            "Cassette saved",
+            extra={"cassette": str(self.path), "entries": len(entries)},
+        )
+        return self.path
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def _next(self, key: str, description: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._by_key.get(key)
+            if not entries:
+                raise CassetteMissError(f"No recording of {description} in {self.path}")
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            # Extra identical requests get the last recorded response
+            return entries[min(index, len(entries) - 1)]
+
+    def record_llm(self, prompt: str, generations: Sequence[Generation]) -> None:
+        self._record(
+            {
+                "kind": "llm",
+                "key": _digest(normalize_prompt(prompt)),
+                "messages": [
+                    message_to_dict(g.message)
+                    for g in generations
+                    if isinstance(g, ChatGeneration)
+                ],
+            }
+        )
+
+    def replay_llm(self, prompt: str) -> List[ChatGeneration]:
+        entry = self._next(_digest(normalize_prompt(prompt)), "LLM request")
+        return [
+            ChatGeneration(message=message)
+            for message in messages_from_dict(entry["messages"])
+        ]
+
+    def record_tool(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        output: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self._record(
+            {
+                "kind": "tool",
+                "key": _digest([name, args]),
+                "tool": name,
+                "args": args,
+                "output": output,
+                "error": error,
+            }
+        )
+
+    def replay_tool(self, name: str, args: Dict[str, Any]) -> Any:
+        entry = self._next(_digest([name, args]), f"{name}({args})")
+        if entry.get("error") is not None:
+            raise ToolException(entry["error"])
+        return entry["output"]
+
+    def replay_tools(self) -> List[BaseTool]:
+        """Stand-ins for the recorded tools, for running a replay without MCP"""
+
+        def make(spec: Dict[str, Any]) -> BaseTool:
+            async def call(**kwargs: Any) -> Any:
+                cassette = current_cassette.get()
+                if cassette is None or not cassette.replaying:
+                    raise CassetteMissError(f"{spec['name']} only exists in replays")
+                return cassette.replay_tool(spec["name"], kwargs)
+
+            return StructuredTool(
+                name=spec["name"],
+                description=spec.get("description") or "",
+                args_schema=spec.get("args_schema") or {"type": "object"},
+                coroutine=call,
+            )
+
+        return [make(spec) for spec in self.tools]
+
+    def stats(self) -> Dict[str, int]:
+        kinds = [entry["kind"] for entry in self._entries]
+        return {"llm": kinds.count("llm"), "tool": kinds.count("tool")}
+
+
+# Cassette of the run executing in the current task; read by the LLM cache and wrap_tool
+current_cassette: ContextVar[Optional[Cassette]] = ContextVar("cassette", default=None)
+
+
+class CassetteLLMCache(BaseCache):
+    """LLM cache that records to, or answers from, the current task's cassette.
+
+    A no-op outside a recorded or replayed run. In replay mode a request without
+    a recording raises ``CassetteMissError`` instead of calling the model.
+    """
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        cassette = current_cassette.get()
+        if cassette is None or not cassette.replaying:
+            return None
+        return cassette.replay_llm(prompt)
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        cassette = current_cassette.get()
+        if cassette is not None and not cassette.replaying:
+            cassette.record_llm(prompt, return_val)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+
+CASSETTE_LLM_CACHE = CassetteLLMCache()
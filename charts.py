@@ -0,0 +1,246 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from price_store import PriceStore
+
+DEFAULT_MAX_POINTS = 1500
+DEFAULT_MAX_CANDLES = 300
+# Bars loaded before a chart's range so SMA 200, RSI and MACD are settled at its start
+INDICATOR_WARMUP_BARS = 200
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices to keep.
+
+    Keeps the visual shape of a line (peaks and troughs) with ``threshold`` points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and next bucket mean
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(areas)) if len(areas) else start
+        selected[i + 1] = previous
+
+    return selected
+
+
+def downsample_ohlcv(frame: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """Merge consecutive daily bars into at most ``max_bars`` candles"""
+    if len(frame) <= max_bars:
+        return frame
+
+    starts = np.linspace(0, len(frame), max_bars, endpoint=False).astype(int)
+    ends = np.append(starts[1:], len(frame)) - 1
+    return pd.DataFrame(
+        {
+            "open": frame["open"].to_numpy()[starts],
+            "high": np.maximum.reduceat(frame["high"].to_numpy(), starts),
+            "low": np.minimum.reduceat(frame["low"].to_numpy(), starts),
+            "close": frame["close"].to_numpy()[ends],
+            "volume": np.add.reduceat(frame["volume"].to_numpy(), starts),
+        },
+        index=frame.index[starts],
+    )
+
+
+def compute_indicators(close: pd.Series) -> pd.DataFrame:
+    """Vectorized SMA 20/50/200, RSI(14, Wilder) and MACD(12, 26, 9)"""
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    macd = (
+        close.ewm(span=12, adjust=False).mean()
+        - close.ewm(span=26, adjust=False).mean()
+    )
+    signal = macd.ewm(span=9, adjust=False).mean()
+    return pd.DataFrame(
+        {
+            "sma_20": close.rolling(20).mean(),
+            "sma_50": close.rolling(50).mean(),
+            "sma_200": close.rolling(200).mean(),
+            "rsi": 100 - 100 / (1 + avg_gain / avg_loss),
+            "macd": macd,
+            "macd_signal": signal,
+            "macd_histogram": macd - signal,
+        },
+        index=close.index,
+    )
+
+
+def _downsampled_line(
+    series: pd.Series, max_points: int
+) -> Tuple[pd.Index, np.ndarray]:
+    series = series.dropna()
+    keep = lttb(series.index.asi8, series.to_numpy(), max_points)
+    return series.index[keep], series.to_numpy()[keep]
+
+
+def create_symbol_chart(
+    frame: pd.DataFrame,
+    symbol: str,
+    max_points: int = DEFAULT_MAX_POINTS,
+    max_candles: int = DEFAULT_MAX_CANDLES,
+    start: Optional[str | pd.Timestamp] = None,
+) -> Optional[go.Figure]:
+    """Candlestick, volume, RSI and MACD panels for one symbol.
+
+    Indicators are computed on full-resolution data, then lines are LTTB-downsampled
+    and drawn as WebGL traces; candles and volume are merged into ``max_candles`` bars.
+    Bars before ``start`` only warm up the indicators and are not drawn.
+    """
+    indicators = compute_indicators(frame["close"]) if not frame.empty else None
+    if start is not None:
+        in_range = frame.index >= pd.Timestamp(start)
+        frame = frame[in_range]
+        indicators = indicators[in_range] if indicators is not None else None
+    if frame.empty:
+        return None
+
+    candles = downsample_ohlcv(frame, max_candles)
+
+    fig = make_subplots(
+        rows=4,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        row_heights=[0.5, 0.15, 0.15, 0.2],
+        subplot_titles=(f"{symbol} Price", "Volume", "RSI (14)", "MACD (12, 26, 9)"),
+    )
+
+    fig.add_trace(
+        go.Candlestick(
+            x=candles.index,
+            open=candles["open"],
+            high=candles["high"],
+            low=candles["low"],
+            close=candles["close"],
+            name="Price",
+        ),
+        row=1,
+        col=1,
+    )
+    for column, color in (
+        ("sma_20", "orange"),
+        ("sma_50", "blue"),
+        ("sma_200", "purple"),
+    ):
+        x, y = _downsampled_line(indicators[column], max_points)
+        fig.add_trace(
+            go.Scattergl(
+                x=x, y=y, name=column.upper(), line={"color": color, "width": 1}
+            ),
+            row=1,
+            col=1,
+        )
+
+    fig.add_trace(
+        go.Bar(
+            x=candles.index,
+            y=candles["volume"],
+            name="Volume",
+            marker_color="lightblue",
+        ),
+        row=2,
+        col=1,
+    )
+
+    x, y = _downsampled_line(indicators["rsi"], max_points)
+    fig.add_trace(
+        go.Scattergl(x=x, y=y, name="RSI", line={"color": "teal"}), row=3, col=1
+    )
+    for level in (30, 70):
+        fig.add_hline(y=level, line_dash="dot", line_color="gray", row=3, col=1)
+
+    for column, color in (("macd", "darkblue"), ("macd_signal", "red")):
+        x, y = _downsampled_line(indicators[column], max_points)
+        fig.add_trace(
+            go.Scattergl(
+                x=x, y=y, name=column.upper(), line={"color": color, "width": 1}
+            ),
+            row=4,
+            col=1,
+        )
+
+    fig.update_layout(
+        height=800,
+        xaxis_rangeslider_visible=False,
+        showlegend=False,
+        margin={"t": 40, "b": 20},
+    )
+    return fig
+
+
+def create_comparison_chart(
+    closes: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS
+) -> Optional[go.Figure]:
+    """Relative performance (rebased to 100) of any number of symbols as WebGL lines"""
+    if closes.empty:
+        return None
+
+    fig = go.Figure()
+    for symbol in closes.columns:
+        series = closes[symbol].dropna()
+        if series.empty:
+            continue
+        x, y = _downsampled_line(series / series.iloc[0] * 100, max_points)
+        fig.add_trace(go.Scattergl(x=x, y=y, name=symbol, mode="lines"))
+
+    fig.update_layout(
+        title="Relative Performance (rebased to 100)",
+        yaxis_title="Rebased Price",
+        height=450,
+        hovermode="x unified",
+    )
+    return fig
+
+
+def load_chart_data(
+    store: PriceStore,
+    symbols: Iterable[str],
+    start: Optional[str | pd.Timestamp] = None,
+    end: Optional[str | pd.Timestamp] = None,
+    warmup_bars: int = 0,
+) -> Dict[str, pd.DataFrame]:
+    """Read each symbol's history from the local price store, skipping missing ones.
+
+    With ``warmup_bars``, up to that many bars before ``start`` are included as well.
+    """
+    warmup = start is not None and warmup_bars > 0
+    load_from = start
+    if warmup:
+        # Calendar slack for exchange holidays, trimmed to exact bars below
+        load_from = pd.Timestamp(start) - pd.offsets.BDay(
+            warmup_bars + warmup_bars // 5
+        )
+
+    frames = {}
+    for symbol in symbols:
+        frame = store.load(symbol, load_from, end)
+        if warmup:
+            before = int((frame.index < pd.Timestamp(start)).sum())
+            frame = frame.iloc[max(before - warmup_bars, 0) :]
+        if not frame.empty:
+            frames[symbol] = frame
+    return frames
@@ -0,0 +1,474 @@
+"""SQLite checkpoints of the research graphs, so failed runs resume where they stopped.
+
+The supervisor and pipeline graphs are compiled with ``CheckpointStore`` and run
+with ``thread_id`` = the run id. LangGraph saves the graph state after every
+completed step (agent); ``analyze_stocks(resume=run_id)`` continues a failed or
+interrupted run from its last checkpoint instead of redoing the earlier agents.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PATH = Path("data") / "checkpoints.db"
+# Failed runs stay resumable this long
+DEFAULT_RETENTION_HOURS = 24.0
+
+RUNNING, FAILED, COMPLETED = "running", "failed", "completed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    thread_id TEXT PRIMARY KEY,
+    query TEXT,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, updated_at);
+"""
+
+
+class CheckpointStore(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver on SQLite, plus a registry of checkpointed runs.
+
+    Uses one short-lived connection per call like the other stores, so a single
+    instance serves every thread and event loop; async methods run in a worker
+    thread. Checkpoints of completed runs are dropped, their results are archived.
+    """
+
+    def __init__(
+        self,
+        path: Path = CHECKPOINT_PATH,
+        retention_hours: float = DEFAULT_RETENTION_HOURS,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.retention_hours = retention_hours
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Runs executing in this process; other processes are checked by pid
+        self._live: set = set()
+        self._live_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN owner TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # LangGraph checkpoint saver interface
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: Tuple[Any, ...] = (thread_id, checkpoint_ns)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._tuple(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata_type, metadata FROM checkpoints "
+                f"{where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and limit <= 0:
+                    return
+                found = self._tuple(conn, thread_id, checkpoint_ns, row)
+                if filter and any(
+                    found.metadata.get(k) != v for k, v in filter.items()
+                ):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield found
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    value_type,
+                    value_blob,
+                    task_path,
+                )
+            )
+        # Regular writes are kept once; special ones (errors, interrupts) are replaced
+        verb = "REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "IGNORE"
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR {verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        found = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in found:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same monotonic "<counter>.<random>" strings as LangGraph's own savers
+        current_v = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def _tuple(
+        self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, row: Any
+    ) -> CheckpointTuple:
+        (
+            checkpoint_id,
+            parent_id,
+            checkpoint_type,
+            checkpoint,
+            metadata_type,
+            metadata,
+        ) = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[4], w[0], w[5]))
+
+        def config_for(checkpoint_id: str) -> RunnableConfig:
+            return {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value, _, _ in writes
+            ],
+        )
+
+    # Run registry
+
+    def start_run(
+        self,
+        thread_id: str,
+        query: Optional[str],
+        mode: str,
+        resume: bool = False,
+    ) -> None:
+        """Register a run as running in this process.
+
+        Resuming claims the run atomically: a completed run, or one still running
+        here or in another live process, raises ``ValueError``.
+        """
+        now = time.time()
+        with self._live_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if resume:
+                row = conn.execute(
+                    "SELECT status, owner FROM runs WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                if row is None:
+                    raise ValueError(f"No checkpointed run {thread_id}")
+                if row[0] == COMPLETED:
+                    raise ValueError(f"Run {thread_id} already completed")
+                if row[0] == RUNNING and self._owner_alive(thread_id, row[1]):
+                    raise ValueError(f"Run {thread_id} is still running")
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, NULL, ?, ?, ?) "
+                "ON CONFLICT (thread_id) DO UPDATE SET status = excluded.status, "
+                "error = NULL, updated_at = excluded.updated_at, "
+                "owner = excluded.owner",
+                (thread_id, query, mode, RUNNING, now, now, _owner()),
+            )
+            self._live.add(thread_id)
+
+    def _owner_alive(self, thread_id: str, owner: Optional[str]) -> bool:
+        """Whether the process that marked a run running still executes it"""
+        if not owner:
+            return False
+        host, _, pid = owner.rpartition(":")
+        if owner == _owner():
+            return thread_id in self._live
+        if host != socket.gethostname():
+            # Can't tell for another host; it stays claimed until pruned
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            return True
+        return True
+
+    def is_running(self, thread_id: str) -> bool:
+        run = self.get_run(thread_id)
+        return (
+            run is not None
+            and run["status"] == RUNNING
+            and self._owner_alive(thread_id, run["owner"])
+        )
+
+    def finish_run(
+        self, thread_id: str, status: str, error: Optional[str] = None
+    ) -> None:
+        """Record how a run ended; a completed run's checkpoints are dropped"""
+        with self._live_lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated_at = ? "
+                "WHERE thread_id = ?",
+                (status, error, time.time(), thread_id),
+            )
+            self._live.discard(thread_id)
+        if status == COMPLETED:
+            self.delete_thread(thread_id)
+
+    def get_run(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM runs WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def resumable_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Failed or interrupted runs that still have checkpoints, newest first"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM runs WHERE status != ? AND updated_at >= ? "
+                "AND thread_id IN (SELECT thread_id FROM checkpoints) "
+                "ORDER BY updated_at DESC",
+                (COMPLETED, time.time() - self.retention_hours * 3600),
+            ).fetchall()
+        runs = [
+            dict(row)
+            for row in rows
+            if row["status"] != RUNNING
+            or not self._owner_alive(row["thread_id"], row["owner"])
+        ]
+        return runs[:limit]
+
+    def prune(self) -> int:
+        """Drop runs and checkpoints older than the retention period; returns runs"""
+        cutoff = time.time() - self.retention_hours * 3600
+        with self._connect() as conn:
+            stale = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT thread_id FROM runs WHERE updated_at < ?", (cutoff,)
+                )
+            ]
+            for thread_id in stale:
+                conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                )
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM runs WHERE thread_id = ?", (thread_id,))
+        if stale:
+            logger.info("Stale checkpoints pruned", extra={"runs": len(stale)})
+        return len(stale)
+
+
+def _owner() -> str:
+    # Read per call so a forked worker gets its own pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@lru_cache(maxsize=None)
+def get_checkpoint_store(
+    path: Path = CHECKPOINT_PATH, retention_hours: float = DEFAULT_RETENTION_HOURS
+) -> CheckpointStore:
+    """One store per database path, shared by every system in the process"""
+    store = CheckpointStore(path, retention_hours)
+    store.prune()
+    return store
@@ -0,0 +1,181 @@
+"""Single-flight sharing of identical analysis runs plus a short-TTL result cache."""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import ANALYSIS_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_TTL = 300.0
+DEFAULT_BUCKET_SECONDS = 300.0
+
+# Roles of a caller in ``RunCoalescer.run``
+LEADER, FOLLOWER, CACHED = "leader", "follower", "cached"
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+CoalesceKey = Tuple[str, str, int]
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Case, whitespace and trailing punctuation don't make a query different"""
+    return re.sub(r"\s+", " ", (query or "").lower()).strip(" .!?")
+
+
+def _deliver(loop: Optional[asyncio.AbstractEventLoop], progress, event) -> None:
+    """Call ``progress`` on the subscriber's own event loop thread"""
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.call_soon_threadsafe(progress, event)
+    except RuntimeError:
+        # The subscriber's loop shut down while the run was still going
+        pass
+
+
+class Flight:
+    """One in-flight run: its events so far, subscribers and eventual result"""
+
+    def __init__(self, key: CoalesceKey):
+        self.key = key
+        self.future: Future = Future()
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, ProgressCallback]] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self.events.append(event)
+            subscribers = list(self.subscribers)
+        for loop, progress in subscribers:
+            _deliver(loop, progress, event)
+
+    def subscribe(self, progress: ProgressCallback) -> None:
+        """Replay the events so far to ``progress``, then forward new ones"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for event in self.events:
+                _deliver(loop, progress, event)
+            self.subscribers.append((loop, progress))
+
+
+class RunCoalescer:
+    """Single-flight execution and a short-TTL result cache for identical analyses.
+
+    Runs are keyed by normalized query, mode and ``bucket_seconds`` time window.
+    The first caller for a key runs it; identical callers arriving while it runs
+    attach to it, get its progress events and share its result. Completed results
+    are then served for ``ttl`` seconds within the same window.
+
+    Works across threads and event loops (one per Streamlit session), so one
+    instance can be shared by the whole process.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_RESULT_TTL,
+        bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+    ):
+        self.ttl = ttl
+        self.bucket_seconds = bucket_seconds
+        self._flights: Dict[CoalesceKey, Flight] = {}
+        self._results: Dict[CoalesceKey, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {LEADER: 0, FOLLOWER: 0, CACHED: 0}
+
+    def key(self, query: Optional[str], mode: str) -> CoalesceKey:
+        bucket = int(time.time() // self.bucket_seconds) if self.bucket_seconds else 0
+        return normalize_query(query), mode, bucket
+
+    def _cached(self, key: CoalesceKey) -> Optional[Dict[str, Any]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._results[key]
+            return None
+        return entry[1]
+
+    async def run(
+        self,
+        query: Optional[str],
+        mode: str,
+        runner: Callable[[ProgressCallback], Awaitable[Dict[str, Any]]],
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Results for ``query``, from the cache, a matching run or ``runner(publish)``.
+
+        The results carry ``coalesced``: ``"leader"`` if this call ran the analysis,
+        ``"follower"`` if it joined one in flight, ``"cached"`` if served from cache.
+        """
+        key = self.key(query, mode)
+        with self._lock:
+            cached = self._cached(key)
+            flight = None if cached is not None else self._flights.get(key)
+            role = CACHED if cached is not None else FOLLOWER if flight else LEADER
+            if role == LEADER:
+                flight = self._flights[key] = Flight(key)
+            self.stats[role] += 1
+        ANALYSIS_REQUESTS.inc(role=role)
+
+        logger.info(
+            "Analysis request coalesced" if role != LEADER else "Analysis run started",
+            extra={"role": role, "query": key[0][:80], "mode": mode},
+        )
+        if role == CACHED:
+            if progress is not None:
+                progress({"event": "cached", "run_id": cached.get("run_id")})
+            return {**cached, "coalesced": CACHED}
+
+        if role == FOLLOWER:
+            if progress is not None:
+                flight.subscribe(progress)
+            # Shielded: a follower giving up must not cancel the shared run
+            results = await asyncio.shield(asyncio.wrap_future(flight.future))
+            return {**results, "coalesced": FOLLOWER}
+
+        def publish(event: Dict[str, Any]) -> None:
+            if progress is not None:
+                progress(event)
+            flight.publish(event)
+
+        try:
+            results = await runner(publish)
+        except BaseException as e:
+            flight.future.set_exception(
+                e if isinstance(e, Exception) else RuntimeError("Analysis cancelled")
+            )
+            raise
+        else:
+            flight.future.set_result(results)
+            if results.get("status") == "completed" and self.ttl > 0:
+                with self._lock:
+                    self._results[key] = (time.monotonic() + self.ttl, results)
+            return {**results, "coalesced": LEADER}
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                self._evict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._results.items() if expires < now]:
+            del self._results[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+@lru_cache(maxsize=None)
+def shared_coalescer(
+    ttl: float = DEFAULT_RESULT_TTL, bucket_seconds: float = DEFAULT_BUCKET_SECONDS
+) -> RunCoalescer:
+    """One coalescer per configuration, shared by every session in the process"""
+    return RunCoalescer(ttl, bucket_seconds)
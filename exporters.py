@@ -0,0 +1,160 @@
+import csv
+import json
+import logging
+import math
+from enum import Enum
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PATH = Path("data") / "exports"
+DEFAULT_BATCH_SIZE = 10_000
+
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("run_id", pa.string()),
+        ("date", pa.string()),
+        ("symbol", pa.string()),
+        ("company_name", pa.string()),
+        ("action", pa.string()),
+        ("confidence", pa.string()),
+        ("current_price", pa.float64()),
+        ("target_price", pa.float64()),
+        ("stop_loss", pa.float64()),
+        ("entry_low", pa.float64()),
+        ("entry_high", pa.float64()),
+        ("time_horizon", pa.string()),
+        ("reasoning", pa.string()),
+    ]
+)
+
+EXPORT_FORMATS = {
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", ".arrow", "application/vnd.apache.arrow.file"),
+    "jsonl": ("JSON Lines", ".jsonl", "application/jsonl"),
+    "csv": ("CSV", ".csv", "text/csv"),
+}
+
+
+def record_to_row(record: Any, **extra: Any) -> Dict[str, Any]:
+    """Flatten a ``StockRecommendation`` or archived recommendation dict to an export row"""
+    source = record if isinstance(record, dict) else vars(record)
+    if "date" not in extra and source.get("date") is None:
+        extra["date"] = source.get("run_date")
+
+    values = {}
+    for name in EXPORT_SCHEMA.names:
+        value = extra[name] if name in extra else source.get(name)
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, float) and math.isnan(value):
+            value = None
+        values[name] = value
+    return values
+
+
+def iter_row_batches(
+    records: Iterable[Any], batch_size: int = DEFAULT_BATCH_SIZE, **extra: Any
+) -> Iterator[List[Dict[str, Any]]]:
+    """Chunk typed records into lists of export rows without materialising them all"""
+    rows = (record_to_row(record, **extra) for record in records)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def _write_parquet(batches: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    written = 0
+    with pq.ParquetWriter(path, EXPORT_SCHEMA, compression="zstd") as writer:
+        for batch in batches:
+            # One row group per batch keeps memory bounded by the batch size
+            writer.write_table(pa.Table.from_pylist(batch, schema=EXPORT_SCHEMA))
+            written += len(batch)
+    return written
+
+
+def _write_arrow(batches: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    written = 0
+    with pa.OSFile(str(path), "wb") as sink:
+        with ipc.new_file(sink, EXPORT_SCHEMA) as writer:
+            for batch in batches:
+                writer.write_batch(
+                    pa.RecordBatch.from_pylist(batch, schema=EXPORT_SCHEMA)
+                )
+                written += len(batch)
+    return written
+
+
+def _write_jsonl(batches: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    written = 0
+    with path.open("w", encoding="utf-8") as f:
+        for batch in batches:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+            written += len(batch)
+    return written
+
+
+def _write_csv(batches: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    written = 0
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_SCHEMA.names)
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+
+WRITERS = {
+    "parquet": _write_parquet,
+    "arrow": _write_arrow,
+    "jsonl": _write_jsonl,
+    "csv": _write_csv,
+}
+
+
+def export_batches(
+    batches: Iterable[List[Dict[str, Any]]], path: str | Path, fmt: str
+) -> Path:
+    """Stream row batches to ``path`` in the given format, one batch at a time"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = WRITERS[fmt](batches, path)
+    logger.info(
+        "Export written", extra={"path": str(path), "format": fmt, "rows": rows}
+    )
+    return path
+
+
+def export_records(
+    records: Iterable[Any],
+    path: str | Path,
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **extra: Any,
+) -> Path:
+    """Export typed recommendation records; ``extra`` fields (e.g. run_id) apply to every row"""
+    return export_batches(iter_row_batches(records, batch_size, **extra), path, fmt)
+
+
+def export_archive(
+    archive: Any,
+    path: str | Path,
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **filters: Any,
+) -> Path:
+    """Stream archived recommendations matching ``filters`` straight to disk"""
+    batches = (
+        [record_to_row(row) for row in batch]
+        for batch in archive.iter_recommendations(batch_size=batch_size, **filters)
+    )
+    return export_batches(batches, path, fmt)
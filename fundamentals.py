@@ -0,0 +1,499 @@
+"""Local corporate actions and fundamentals snapshots, with split/bonus price adjustment.
+
+    python fundamentals.py ingest data/fundamentals_inbox   # NSE exports, once each
+    python fundamentals.py lookup RELIANCE --as-of 2024-06-30
+
+Corporate actions come from NSE's corporate actions CSV export (SYMBOL, PURPOSE,
+EX-DATE, ...); the PURPOSE text is parsed into splits, bonuses, dividends and other
+announcements. Fundamentals snapshots are ``symbol,as_of,market_cap,pe,...`` CSVs.
+Both are upserted, so re-ingesting overlapping exports is harmless.
+
+Stored prices stay as traded; ``PriceStore`` multiplies bars before each split or
+bonus ex-date by the action's factor when it loads them.
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.tools import BaseTool, StructuredTool
+
+logger = logging.getLogger(__name__)
+
+FUNDAMENTALS_PATH = Path("data") / "fundamentals.db"
+FUNDAMENTALS_INBOX = Path("data") / "fundamentals_inbox"
+
+FUNDAMENTAL_FIELDS = (
+    "market_cap",
+    "pe",
+    "pb",
+    "eps",
+    "book_value",
+    "face_value",
+    "dividend_yield",
+)
+
+# Actions that change the share count; their factor rescales earlier prices
+ADJUSTING_KINDS = ("split", "bonus")
+
+# Days of corporate actions shown around the lookup date
+RECENT_ACTION_DAYS = 180
+UPCOMING_ACTION_DAYS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS corporate_actions (
+    symbol TEXT NOT NULL,
+    ex_date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    factor REAL NOT NULL DEFAULT 1.0,
+    amount REAL,
+    purpose TEXT NOT NULL,
+    record_date TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, ex_date, purpose)
+);
+CREATE INDEX IF NOT EXISTS idx_actions_date ON corporate_actions (ex_date);
+
+CREATE TABLE IF NOT EXISTS fundamentals (
+    symbol TEXT NOT NULL,
+    as_of TEXT NOT NULL,
+    market_cap REAL,
+    pe REAL,
+    pb REAL,
+    eps REAL,
+    book_value REAL,
+    face_value REAL,
+    dividend_yield REAL,
+    PRIMARY KEY (symbol, as_of)
+);
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    name TEXT PRIMARY KEY,
+    modified_at REAL NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+"""
+
+BONUS = re.compile(r"bonus\D*(\d+(?:\.\d+)?)\s*:\s*(\d+(?:\.\d+)?)", re.I)
+FACE_VALUE_CHANGE = re.compile(
+    r"(split|sub-?division|consolidation).*?from\s*(?:rs\.?|re\.?|₹)?\s*(\d+(?:\.\d+)?)"
+    r".*?to\s*(?:rs\.?|re\.?|₹)?\s*(\d+(?:\.\d+)?)",
+    re.I,
+)
+DIVIDEND = re.compile(
+    r"dividend\D*?(?:rs\.?|re\.?|₹)\s*(\d+(?:\.\d+)?)\s*(?:/-)?\s*per\s*share", re.I
+)
+RIGHTS = re.compile(r"\brights\b", re.I)
+
+
+def parse_purpose(purpose: str) -> Dict[str, Any]:
+    """Kind, price factor and cash amount of an NSE corporate action PURPOSE text.
+
+    ``factor`` multiplies prices before the ex-date: 0.5 for a 1:1 bonus, 0.2 for a
+    split from Rs 10 to Rs 2 face value. Combined purposes such as "Bonus 1:1 And
+    Dividend - Rs 5 Per Share" keep the adjusting part and the dividend amount.
+    """
+    text = " ".join(str(purpose or "").split())
+    dividend = DIVIDEND.search(text)
+    amount = float(dividend.group(1)) if dividend else None
+
+    bonus = BONUS.search(text)
+    if bonus:
+        new, held = float(bonus.group(1)), float(bonus.group(2))
+        return {"kind": "bonus", "factor": held / (new + held), "amount": amount}
+    change = FACE_VALUE_CHANGE.search(text)
+    if change and float(change.group(2)) > 0:
+        old, new = float(change.group(2)), float(change.group(3))
+        return {"kind": "split", "factor": new / old, "amount": amount}
+    if dividend:
+        return {"kind": "dividend", "factor": 1.0, "amount": amount}
+    if RIGHTS.search(text):
+        return {"kind": "rights", "factor": 1.0, "amount": None}
+    return {"kind": "other", "factor": 1.0, "amount": None}
+
+
+def _column_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_")
+
+
+def _dates(values: pd.Series) -> pd.Series:
+    """ISO dates as-is, anything else (NSE's 22-Oct-2024, 22/10/2024) day first"""
+    iso = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    other = pd.to_datetime(
+        values.where(iso.isna()), errors="coerce", format="mixed", dayfirst=True
+    )
+    return iso.fillna(other).dt.strftime("%Y-%m-%d")
+
+
+def adjustment_factors(
+    actions: pd.DataFrame, index: pd.DatetimeIndex, symbols: Iterable[str]
+) -> pd.DataFrame:
+    """Price multipliers per (date × symbol): the product of later actions' factors.
+
+    One reverse cumulative product over the ex-dates and one ``searchsorted`` of the
+    bar dates against them, for all symbols at once.
+    """
+    symbols = list(symbols)
+    factors = pd.DataFrame(1.0, index=index, columns=symbols)
+    events = actions[actions["symbol"].isin(symbols) & (actions["factor"] != 1.0)]
+    if events.empty or index.empty:
+        return factors
+
+    by_date = (
+        events.assign(ex_date=pd.to_datetime(events["ex_date"]))
+        .pivot_table(index="ex_date", columns="symbol", values="factor", aggfunc="prod")
+        .reindex(columns=symbols)
+        .fillna(1.0)
+        .sort_index()
+    )
+    # Row i: product of the factors on ex-dates i.. (later); the last row is "none left"
+    remaining = np.vstack(
+        [
+            by_date.to_numpy()[::-1].cumprod(axis=0)[::-1],
+            np.ones((1, len(symbols))),
+        ]
+    )
+    # Bars dated on or after an ex-date already trade at the new share count
+    position = np.searchsorted(by_date.index.values, index.values, side="right")
+    return pd.DataFrame(remaining[position], index=index, columns=symbols)
+
+
+def adjust_bars(frame: pd.DataFrame, factors: pd.Series) -> pd.DataFrame:
+    """Scale one symbol's OHLC by ``factors`` and its volume inversely"""
+    adjusted = frame.copy()
+    prices = [c for c in ("open", "high", "low", "close") if c in frame.columns]
+    adjusted[prices] = frame[prices].mul(factors, axis=0)
+    if "volume" in frame.columns:
+        adjusted["volume"] = frame["volume"].div(factors, axis=0)
+    return adjusted
+
+
+def adjust_panel(
+    panel: Dict[str, pd.DataFrame], factors: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    """Split/bonus adjust a wide ``{field: date × symbol}`` panel"""
+    adjusted = {}
+    for field, frame in panel.items():
+        if frame.empty:
+            adjusted[field] = frame
+        elif field == "volume":
+            adjusted[field] = frame / factors.reindex_like(frame).fillna(1.0)
+        else:
+            adjusted[field] = frame * factors.reindex_like(frame).fillna(1.0)
+    return adjusted
+
+
+class FundamentalsStore:
+    """SQLite store of corporate actions and dated fundamentals snapshots.
+
+    Lookups are point-in-time: ``fundamentals(symbol, as_of)`` returns the latest
+    snapshot on or before ``as_of``, so backtests never see later data.
+    """
+
+    def __init__(self, path: Path = FUNDAMENTALS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_actions(self, frame: pd.DataFrame) -> int:
+        """Store corporate actions from an NSE export (or symbol/purpose/ex_date rows)"""
+        frame = frame.rename(columns=_column_key)
+        missing = {"symbol", "purpose", "ex_date"} - set(frame.columns)
+        if missing:
+            raise ValueError(
+                f"Corporate actions are missing columns: {', '.join(sorted(missing))}"
+            )
+        frame = frame.assign(
+            symbol=frame["symbol"].astype(str).str.strip().str.upper(),
+            purpose=frame["purpose"].astype(str).str.strip(),
+            ex_date=_dates(frame["ex_date"]),
+            record_date=(
+                _dates(frame["record_date"]) if "record_date" in frame else None
+            ),
+        ).dropna(subset=["ex_date"])
+        parsed = pd.DataFrame(
+            [parse_purpose(p) for p in frame["purpose"]], index=frame.index
+        )
+        # Explicit kind/factor columns override the parsed purpose
+        for column in ("kind", "factor", "amount"):
+            if column in frame and column in parsed:
+                parsed[column] = frame[column].where(
+                    frame[column].notna(), parsed[column]
+                )
+
+        now = time.time()
+        rows = [
+            (
+                symbol,
+                ex_date,
+                kind,
+                float(factor),
+                None if pd.isna(amount) else float(amount),
+                purpose,
+                None if pd.isna(record_date) else record_date,
+                now,
+            )
+            for symbol, ex_date, kind, factor, amount, purpose, record_date in zip(
+                frame["symbol"],
+                frame["ex_date"],
+                parsed["kind"],
+                parsed["factor"],
+                parsed["amount"],
+                frame["purpose"],
+                frame["record_date"],
+            )
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO corporate_actions "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.info("Corporate actions stored", extra={"rows": len(rows)})
+        return len(rows)
+
+    def upsert_fundamentals(
+        self, frame: pd.DataFrame, as_of: Optional[str] = None
+    ) -> int:
+        """Store fundamentals snapshots; rows without an ``as_of`` date get ``as_of``"""
+        frame = frame.rename(columns=_column_key).rename(columns={"date": "as_of"})
+        if "symbol" not in frame.columns:
+            raise ValueError("Fundamentals are missing the symbol column")
+        if "as_of" not in frame.columns:
+            if as_of is None:
+                raise ValueError("Fundamentals need an as_of column or date")
+            frame["as_of"] = as_of
+        frame = frame.assign(
+            symbol=frame["symbol"].astype(str).str.strip().str.upper(),
+            as_of=_dates(frame["as_of"].fillna(as_of)),
+        ).dropna(subset=["as_of"])
+        values = frame.reindex(columns=FUNDAMENTAL_FIELDS).apply(
+            lambda column: pd.to_numeric(
+                column.astype(str).str.replace(",", ""), errors="coerce"
+            )
+        )
+        rows = [
+            (symbol, date, *(None if pd.isna(v) else float(v) for v in row))
+            for symbol, date, row in zip(
+                frame["symbol"], frame["as_of"], values.itertuples(index=False)
+            )
+        ]
+        placeholders = ", ".join("?" * (2 + len(FUNDAMENTAL_FIELDS)))
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO fundamentals VALUES ({placeholders})", rows
+            )
+        logger.info("Fundamentals stored", extra={"rows": len(rows)})
+        return len(rows)
+
+    def ingest_directory(self, inbox: Path = FUNDAMENTALS_INBOX) -> int:
+        """Ingest CSVs in ``inbox`` not seen before (or changed since); returns rows.
+
+        Files whose header has PURPOSE are corporate actions, the rest fundamentals
+        snapshots dated by their ``as_of`` column or the file's modification date.
+        Files that can't be read or parsed are logged and skipped.
+        """
+        inbox = Path(inbox)
+        if not inbox.exists():
+            return 0
+        with self._connect() as conn:
+            seen = dict(conn.execute("SELECT name, modified_at FROM ingested_files"))
+
+        total = 0
+        for path in sorted(inbox.glob("*.csv")):
+            modified = path.stat().st_mtime
+            if seen.get(path.name) == modified:
+                continue
+            try:
+                frame = pd.read_csv(path, dtype=str)
+                if "purpose" in {_column_key(c) for c in frame.columns}:
+                    rows = self.upsert_actions(frame)
+                else:
+                    as_of = pd.Timestamp(modified, unit="s").strftime("%Y-%m-%d")
+                    rows = self.upsert_fundamentals(frame, as_of=as_of)
+            except (OSError, ValueError, TypeError):
+                # Not recorded as ingested, so a corrected file is picked up next time
+                logger.exception("Fundamentals file skipped", extra={"file": str(path)})
+                continue
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?)",
+                    (path.name, modified, rows, time.time()),
+                )
+            total += rows
+        if total:
+            logger.info(
+                "Fundamentals inbox ingested",
+                extra={"inbox": str(inbox), "rows": total},
+            )
+        return total
+
+    def actions(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """Corporate actions as a frame, optionally filtered by symbol, ex-date and kind"""
+        clauses, params = [], []
+        for column, values in (("symbol", symbols), ("kind", kinds)):
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if start is not None:
+            clauses.append("ex_date >= ?")
+            params.append(str(pd.Timestamp(start).date()))
+        if end is not None:
+            clauses.append("ex_date <= ?")
+            params.append(str(pd.Timestamp(end).date()))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT symbol, ex_date, kind, factor, amount, purpose, record_date "
+                f"FROM corporate_actions {where} ORDER BY symbol, ex_date",
+                conn,
+                params=params,
+            )
+
+    def version(self) -> float:
+        """Changes whenever corporate actions are added or updated"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(updated_at) FROM corporate_actions"
+            ).fetchone()
+        return row[0] or 0.0
+
+    def adjustment_factors(
+        self, symbols: Iterable[str], index: pd.DatetimeIndex
+    ) -> pd.DataFrame:
+        symbols = list(symbols)
+        return adjustment_factors(
+            self.actions(symbols, kinds=ADJUSTING_KINDS), index, symbols
+        )
+
+    def fundamentals(
+        self, symbol: str, as_of: Optional[str | pd.Timestamp] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Latest snapshot of ``symbol`` on or before ``as_of`` (default: latest)"""
+        as_of = str(pd.Timestamp(as_of or pd.Timestamp.now()).date())
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM fundamentals WHERE symbol = ? AND as_of <= ? "
+                "ORDER BY as_of DESC LIMIT 1",
+                (symbol.strip().upper(), as_of),
+            ).fetchone()
+        if row is None:
+            return None
+        return {k: row[k] for k in row.keys() if row[k] is not None}
+
+    def snapshot(
+        self, symbol: str, as_of: Optional[str | pd.Timestamp] = None
+    ) -> Dict[str, Any]:
+        """Fundamentals plus recent and upcoming corporate actions as of a date"""
+        symbol = symbol.strip().upper()
+        day = pd.Timestamp(as_of or pd.Timestamp.now()).normalize()
+        actions = self.actions(
+            [symbol],
+            start=day - pd.Timedelta(days=RECENT_ACTION_DAYS),
+            end=day + pd.Timedelta(days=UPCOMING_ACTION_DAYS),
+        )
+        actions = actions.drop(columns="symbol").astype(object)
+        actions = actions.where(actions.notna(), None).to_dict("records")
+        today = str(day.date())
+        return {
+            "symbol": symbol,
+            "as_of": today,
+            "fundamentals": self.fundamentals(symbol, day),
+            "recent_actions": [a for a in actions if a["ex_date"] <= today],
+            "upcoming_actions": [a for a in actions if a["ex_date"] > today],
+        }
+
+    def symbols(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT symbol FROM fundamentals UNION SELECT symbol FROM corporate_actions"
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+
+@lru_cache(maxsize=None)
+def get_fundamentals_store(path: Path = FUNDAMENTALS_PATH) -> FundamentalsStore:
+    """One store per database path, shared by the process"""
+    return FundamentalsStore(path)
+
+
+def make_fundamentals_tool(store: FundamentalsStore) -> BaseTool:
+    """LangChain tool answering fundamentals and corporate-action questions locally"""
+
+    def fundamentals_lookup(symbol: str, as_of: str = "") -> str:
+        snapshot = store.snapshot(symbol, as_of or None)
+        if snapshot["fundamentals"] is None and not (
+            snapshot["recent_actions"] or snapshot["upcoming_actions"]
+        ):
+            return f"No local fundamentals or corporate actions for {symbol}."
+        return json.dumps(snapshot)
+
+    async def afundamentals_lookup(symbol: str, as_of: str = "") -> str:
+        return fundamentals_lookup(symbol, as_of)
+
+    return StructuredTool.from_function(
+        func=fundamentals_lookup,
+        coroutine=afundamentals_lookup,
+        name="fundamentals_lookup",
+        description=(
+            "Local fundamentals and corporate actions for an NSE symbol (no web access "
+            "needed): market cap, P/E, P/B, EPS, book value, face value and dividend "
+            "yield from the latest snapshot, plus splits, bonuses, dividends, rights "
+            "and other announcements with ex-dates in the last 6 months or next 30 "
+            "days. Optional as_of (YYYY-MM-DD) answers as of that date."
+        ),
+    )
+
+
+def fundamentals_tools(path: Path = FUNDAMENTALS_PATH) -> List[BaseTool]:
+    """The fundamentals tool, or none while the store is empty"""
+    store = get_fundamentals_store(path)
+    return [make_fundamentals_tool(store)] if store.symbols() else []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(FUNDAMENTALS_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Ingest new CSVs from a directory")
+    ingest.add_argument("inbox", nargs="?", default=str(FUNDAMENTALS_INBOX))
+    lookup = commands.add_parser("lookup", help="Point-in-time lookup")
+    lookup.add_argument("symbols", nargs="+")
+    lookup.add_argument("--as-of")
+    args = parser.parse_args()
+
+    store = FundamentalsStore(Path(args.db))
+    if args.command == "ingest":
+        print(f"{store.ingest_directory(Path(args.inbox))} rows ingested")
+    else:
+        for symbol in args.symbols:
+            print(json.dumps(store.snapshot(symbol, args.as_of), indent=2))
@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from prefetch import quote_url
+
+logger = logging.getLogger(__name__)
+
+MA_WINDOWS = (20, 50, 200)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+PRICE_PATTERN = re.compile(
+    r"(?:LTP|Last Traded Price|Last Price|Current Price)[^0-9₹]*₹?\s*([0-9][0-9,]*\.?[0-9]*)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Tick:
+    symbol: str
+    price: float
+    timestamp: datetime
+    volume: Optional[int] = None
+
+
+class _Ema:
+    """Exponential moving average updated in O(1), seeded with the first value"""
+
+    def __init__(self, period: int):
+        self.alpha = 2 / (period + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        self.value = (
+            x if self.value is None else self.value + self.alpha * (x - self.value)
+        )
+        return self.value
+
+
+@dataclass
+class RollingIndicatorState:
+    """Rolling price window with incrementally maintained RSI, SMAs and MACD.
+
+    Every ``update`` is O(1): SMAs keep running sums, RSI uses Wilder smoothing
+    and MACD is built from three EMAs.
+    """
+
+    symbol: str
+    prices: Deque[float] = field(default_factory=lambda: deque(maxlen=max(MA_WINDOWS)))
+    last_tick: Optional[Tick] = None
+    _sums: Dict[int, float] = field(
+        default_factory=lambda: dict.fromkeys(MA_WINDOWS, 0.0)
+    )
+    _avg_gain: float = 0.0
+    _avg_loss: float = 0.0
+    _changes: int = 0
+    _ema_fast: _Ema = field(default_factory=lambda: _Ema(MACD_FAST))
+    _ema_slow: _Ema = field(default_factory=lambda: _Ema(MACD_SLOW))
+    _ema_signal: _Ema = field(default_factory=lambda: _Ema(MACD_SIGNAL))
+
+    def update(self, price: float) -> None:
+        if self.prices:
+            self._update_rsi(price - self.prices[-1])
+
+        for window in MA_WINDOWS:
+            self._sums[window] += price
+            if len(self.prices) >= window:
+                self._sums[window] -= self.prices[-window]
+        self.prices.append(price)
+
+        fast = self._ema_fast.update(price)
+        slow = self._ema_slow.update(price)
+        self._ema_signal.update(fast - slow)
+
+    def _update_rsi(self, change: float) -> None:
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._changes += 1
+        # Simple average over the first period, Wilder smoothing afterwards
+        period = min(self._changes, RSI_PERIOD)
+        self._avg_gain += (gain - self._avg_gain) / period
+        self._avg_loss += (loss - self._avg_loss) / period
+
+    @property
+    def price(self) -> Optional[float]:
+        return self.prices[-1] if self.prices else None
+
+    def sma(self, window: int) -> Optional[float]:
+        if len(self.prices) < window:
+            return None
+        return self._sums[window] / window
+
+    @property
+    def rsi(self) -> Optional[float]:
+        if self._changes < RSI_PERIOD:
+            return None
+        if self._avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self._avg_gain / self._avg_loss)
+
+    @property
+    def macd(self) -> Optional[float]:
+        if self._ema_fast.value is None:
+            return None
+        return self._ema_fast.value - self._ema_slow.value
+
+    @property
+    def macd_histogram(self) -> Optional[float]:
+        if self.macd is None:
+            return None
+        return self.macd - self._ema_signal.value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "price": self.price,
+            "timestamp": (
+                self.last_tick.timestamp.isoformat() if self.last_tick else None
+            ),
+            "rsi": self.rsi,
+            **{f"sma_{window}": self.sma(window) for window in MA_WINDOWS},
+            "macd": self.macd,
+            "macd_histogram": self.macd_histogram,
+        }
+
+
+class ReplayQuoteFeed:
+    """Replay ticks from a local CSV or JSON-lines file (symbol, price, timestamp[, volume])"""
+
+    def __init__(self, path: str | Path, speed: float = 0.0):
+        self.path = Path(path)
+        self.speed = speed
+
+    def _rows(self) -> Iterable[Dict[str, Any]]:
+        with self.path.open(encoding="utf-8") as f:
+            if self.path.suffix == ".csv":
+                yield from csv.DictReader(f)
+            else:
+                yield from (json.loads(line) for line in f if line.strip())
+
+    async def __aiter__(self) -> AsyncIterator[Tick]:
+        previous = None
+        for row in self._rows():
+            tick = Tick(
+                symbol=row["symbol"],
+                price=float(row["price"]),
+                timestamp=datetime.fromisoformat(row["timestamp"]),
+                volume=int(row["volume"]) if row.get("volume") else None,
+            )
+            # speed > 0 replays with the recorded spacing compressed by that factor
+            if self.speed > 0 and previous is not None:
+                delay = (tick.timestamp - previous).total_seconds() / self.speed
+                await asyncio.sleep(max(delay, 0.0))
+            previous = tick.timestamp
+            yield tick
+
+
+class PollingQuoteFeed:
+    """Poll a quote source for the tracked symbols at a fixed interval
+
+    Runs until cancelled, or for ``max_polls`` polls when set.
+    """
+
+    def __init__(
+        self,
+        fetch_quotes: Callable[[List[str]], Awaitable[Dict[str, float]]],
+        symbols: Iterable[str],
+        interval_seconds: float = 30.0,
+        max_polls: Optional[int] = None,
+    ):
+        self.fetch_quotes = fetch_quotes
+        self.symbols = list(symbols)
+        self.interval_seconds = interval_seconds
+        self.max_polls = max_polls
+
+    async def __aiter__(self) -> AsyncIterator[Tick]:
+        polls = 0
+        while True:
+            try:
+                quotes = await self.fetch_quotes(self.symbols)
+            except Exception:
+                logger.warning("Quote poll failed", exc_info=True)
+                quotes = {}
+
+            now = datetime.now()
+            for symbol, price in quotes.items():
+                yield Tick(symbol=symbol, price=price, timestamp=now)
+            polls += 1
+            if self.max_polls is not None and polls >= self.max_polls:
+                return
+            await asyncio.sleep(self.interval_seconds)
+
+
+def parse_last_price(page: str) -> Optional[float]:
+    """Best-effort extraction of the last traded price from a scraped quote page"""
+    match = PRICE_PATTERN.search(page or "")
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
+
+
+def mcp_quote_fetcher(tools: Iterable[Any]):
+    """Build a ``fetch_quotes`` callable backed by the Bright Data scrape tool"""
+    scrape = {getattr(t, "name", str(t)): t for t in tools}.get("scrape_as_markdown")
+    if scrape is None:
+        raise ValueError("scrape_as_markdown tool is required for live quotes")
+
+    async def fetch_quotes(symbols: List[str]) -> Dict[str, float]:
+        pages = await asyncio.gather(
+            *(scrape.ainvoke({"url": quote_url(s)}) for s in symbols),
+            return_exceptions=True,
+        )
+        quotes = {}
+        for symbol, page in zip(symbols, pages):
+            price = None if isinstance(page, Exception) else parse_last_price(str(page))
+            if price is not None:
+                quotes[symbol] = price
+        return quotes
+
+    return fetch_quotes
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        number = float(str(value).replace(",", "").replace("₹", "").strip())
+    except (TypeError, ValueError):
+        return None
+    # Parsed records use NaN for a price the report didn't give
+    return None if math.isnan(number) else number
+
+
+class LiveQuoteMonitor:
+    """Track live quotes per symbol and re-score recommendations without any LLM calls"""
+
+    def __init__(self):
+        self.states: Dict[str, RollingIndicatorState] = {}
+
+    def subscribe(self, symbols: Iterable[str]) -> None:
+        for symbol in symbols:
+            self.states.setdefault(symbol, RollingIndicatorState(symbol))
+
+    def seed(self, symbol: str, closes: Iterable[float]) -> None:
+        """Warm up a symbol's indicators from historical closes"""
+        self.subscribe([symbol])
+        for close in closes:
+            self.states[symbol].update(float(close))
+
+    def seed_from_store(self, store: Any, symbols: Iterable[str]) -> None:
+        """Warm up indicators from each symbol's daily closes in a ``PriceStore``"""
+        for symbol in symbols:
+            closes = store.load(symbol).get("close")
+            if closes is not None:
+                self.seed(symbol, closes.dropna().tail(max(MA_WINDOWS)))
+
+    def on_tick(self, tick: Tick) -> None:
+        state = self.states.get(tick.symbol)
+        if state is None:
+            return
+        state.update(tick.price)
+        state.last_tick = tick
+
+    async def run(self, feed: Any, on_update: Optional[Callable[[Tick], None]] = None):
+        """Consume a quote feed until it is exhausted or cancelled"""
+        async for tick in feed:
+            self.on_tick(tick)
+            if on_update is not None:
+                on_update(tick)
+
+    def rescore(self, recommendations: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Re-evaluate recommendations against the latest prices and indicators.
+
+        Accepts parsed recommendation dicts or ``StockRecommendation`` records.
+        """
+        rescored = []
+        for rec in recommendations:
+            if not isinstance(rec, dict):
+                rec = {**vars(rec), "action": rec.action.value}
+            state = self.states.get(rec.get("symbol"))
+            if state is None or state.price is None:
+                continue
+
+            action = str(rec.get("action", "HOLD")).upper()
+            price = state.price
+            target = _to_float(rec.get("target_price"))
+            stop = _to_float(rec.get("stop_loss"))
+            direction = -1 if action == "SELL" else 1
+
+            status = "ACTIVE"
+            if target is not None and direction * (price - target) >= 0:
+                status = "TARGET_HIT"
+            elif stop is not None and direction * (price - stop) <= 0:
+                status = "STOPPED_OUT"
+
+            signals = [
+                state.rsi is not None
+                and (state.rsi < 70 if direction > 0 else state.rsi > 30),
+                state.macd_histogram is not None
+                and direction * state.macd_histogram > 0,
+                state.sma(20) is not None and direction * (price - state.sma(20)) > 0,
+            ]
+
+            rescored.append(
+                {
+                    **state.snapshot(),
+                    "action": action,
+                    "target_price": target,
+                    "stop_loss": stop,
+                    "upside_pct": (
+                        direction * (target / price - 1) * 100 if target else None
+                    ),
+                    "status": status,
+                    "technical_score": sum(signals) / len(signals),
+                }
+            )
+        return rescored
+
+
+async def _replay(replay_path: str, recommendations_path: str, speed: float) -> None:
+    recommendations = json.loads(Path(recommendations_path).read_text(encoding="utf-8"))
+    monitor = LiveQuoteMonitor()
+    monitor.subscribe(rec["symbol"] for rec in recommendations)
+    await monitor.run(ReplayQuoteFeed(replay_path, speed=speed))
+    print(json.dumps(monitor.rescore(recommendations), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-score recommendations against a local quote replay file"
+    )
+    parser.add_argument("replay", help="CSV or JSON-lines tick file")
+    parser.add_argument("recommendations", help="JSON list of recommendations")
+    parser.add_argument("--speed", type=float, default=0.0)
+    args = parser.parse_args()
+
+    asyncio.run(_replay(args.replay, args.recommendations, args.speed))
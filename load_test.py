@@ -0,0 +1,185 @@
+"""Run many concurrent analyses on one event loop with offline stub model and tools.
+
+    python load_test.py --sessions 50 --model-latency 0.5 --tool-latency 0.3
+
+Reports wall time, per-session latency, tool cache effectiveness and whether every
+model/tool call was attributed to the session (task) that made it.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections import Counter
+import uuid
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+from logging_config import session_id_ctx
+from main import OrchestrationMode, StockResearchSystem
+from tooling import RateLimiter, ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+STUB_REPORT = """Symbol: RELIANCE
+Symbol: TCS
+
+RELIANCE - Reliance Industries Limited
+📋 RECOMMENDATION: BUY
+🎯 TARGET PRICE: ₹2,650
+⏰ TIME HORIZON: 1-3 days
+📊 CONFIDENCE: HIGH
+Current Price: ₹2,450
+Stop Loss: ₹2,380
+"""
+
+
+class StubChatModel(BaseChatModel):
+    """Offline chat model that waits ``latency`` seconds and returns a canned report.
+
+    With ``call_tools`` it first calls one of its bound tools, then answers once the
+    tool result is in, like a ReAct agent turn.
+    """
+
+    latency: float = 0.5
+    model_name: str = "load-test-stub"
+    call_tools: bool = False
+    tool_names: List[str] = []
+    sessions: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "load-test-stub"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        if not self.call_tools:
+            return self
+        return self.model_copy(
+            update={"tool_names": [getattr(tool, "name", "") for tool in tools]}
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tool_calls = []
+        if self.tool_names and not isinstance(messages[-1], ToolMessage):
+            name = next(
+                (n for n in self.tool_names if n == "search_engine"), self.tool_names[0]
+            )
+            args = {"query": "NSE stocks"} if name == "search_engine" else {}
+            tool_calls = [{"name": name, "args": args, "id": str(uuid.uuid4())}]
+
+        content = "" if tool_calls else STUB_REPORT
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(content) // 4 + 10 * len(tool_calls)
+        message = AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        self.sessions.append(session_id_ctx.get())
+        await asyncio.sleep(self.latency)
+        return self._generate(messages, stop=stop)
+
+
+def make_stub_tools(latency: float, sessions: List[str]) -> List[StructuredTool]:
+    """Stand-ins for the Bright Data scrape and search tools"""
+
+    async def scrape_as_markdown(url: str) -> str:
+        sessions.append(session_id_ctx.get())
+        await asyncio.sleep(latency)
+        return f"# {url}\nLast Price: 2,450.00"
+
+    async def search_engine(query: str) -> str:
+        sessions.append(session_id_ctx.get())
+        await asyncio.sleep(latency)
+        return f"Results for {query}"
+
+    return [
+        StructuredTool.from_function(
+            coroutine=scrape_as_markdown, description="Scrape a page as markdown"
+        ),
+        StructuredTool.from_function(
+            coroutine=search_engine, description="Search the web"
+        ),
+    ]
+
+
+async def run_load_test(args: argparse.Namespace) -> None:
+    model = StubChatModel(latency=args.model_latency, sessions=[])
+    tool_sessions: List[str] = []
+    cache = ToolResultCache(ttl=args.cache_ttl)
+
+    system = StockResearchSystem(
+        track_daily_usage=False,
+        cache_pages=False,
+        tool_cache=cache,
+        rate_limiter=RateLimiter(
+            rate=args.tool_rate,
+            burst=args.tool_concurrency,
+            max_concurrency=args.tool_concurrency,
+        ),
+    )
+    await system.initialize(
+        tools=make_stub_tools(args.tool_latency, tool_sessions), model=model
+    )
+
+    async def session() -> tuple:
+        started = time.perf_counter()
+        results = await system.analyze_stocks(mode=args.mode)
+        return results["run_id"], time.perf_counter() - started
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(session() for _ in range(args.sessions)))
+    wall = time.perf_counter() - started
+
+    run_ids = {run_id for run_id, _ in outcomes}
+    latencies = sorted(latency for _, latency in outcomes)
+    model_calls = Counter(model.sessions)
+    unattributed = sum(1 for s in [*model.sessions, *tool_sessions] if s not in run_ids)
+
+    print(f"sessions:            {args.sessions} ({args.mode})")
+    print(f"wall time:           {wall:.2f}s")
+    print(f"session latency p50: {statistics.median(latencies):.2f}s")
+    print(f"session latency max: {latencies[-1]:.2f}s")
+    print(f"sequential estimate: {sum(latencies):.2f}s")
+    print(f"model calls:         {len(model.sessions)}")
+    print(f"tool calls executed: {len(tool_sessions)}")
+    print(f"tool cache:          {cache.stats()}")
+    print(f"distinct run ids:    {len(run_ids)}")
+    print(
+        f"calls per session:   {min(model_calls.values())}-{max(model_calls.values())}"
+    )
+    print(f"unattributed calls:  {unattributed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument(
+        "--mode",
+        choices=[m.value for m in OrchestrationMode],
+        default=OrchestrationMode.PIPELINE.value,
+    )
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    parser.add_argument("--tool-latency", type=float, default=0.3)
+    parser.add_argument("--tool-rate", type=float, default=50.0)
+    parser.add_argument("--tool-concurrency", type=int, default=16)
+    parser.add_argument("--cache-ttl", type=float, default=300.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run_load_test(args))
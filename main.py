@@ -1,15 +1,22 @@
 # stock_research_system.py
-import os
+import argparse
 import uuid
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import re
+import time
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
+from dataclasses import asdict, dataclass, replace
 from enum import Enum
 from datetime import datetime
+from pathlib import Path
 
 from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 
 # from langchain.chat_models import init_chat_model
@@ -21,14 +28,46 @@ from logging_config import (
     session_id_ctx,
     agent_id_ctx,
 )
-from prompts import (
-    get_supervisor_prompt,
-    get_stock_finder_prompt,
-    get_market_data_prompt,
-    get_news_analyst_prompt,
-    get_recommendation_prompt,
+from archive import RunArchive
+from checkpoints import COMPLETED, FAILED, CheckpointStore, get_checkpoint_store
+from cassette import (
+    CASSETTE_LLM_CACHE,
+    OFFLINE_API_KEY,
+    RECORD,
+    REPLAY,
+    Cassette,
+    current_cassette,
+    tool_spec,
 )
-
+from fundamentals import fundamentals_tools, get_fundamentals_store
+from live_quotes import LiveQuoteMonitor, PollingQuoteFeed, mcp_quote_fetcher
+from page_cache import SCRAPE_TOOLS, PageCache, with_page_cache
+from pipeline import PREFETCH_NODE, build_research_pipeline, with_prefetch
+from prefetch import MarketDataPrefetcher
+from price_store import PriceStore
+from profiling import Profiler, current_profiler, format_top, profiled, span
+from metrics import (
+    INITIALIZE_SECONDS,
+    MCP_SESSIONS,
+    RUN_SECONDS,
+    RUNS,
+    SESSIONS_IN_FLIGHT,
+    observe_usage,
+)
+from model_router import ModelRouter, routes_for
+from sector_index import sector_tools
+from settings import Settings, get_settings
+from symbol_master import SymbolMaster, get_symbol_master, symbol_tools
+from tooling import RateLimiter, ToolResultCache, shared_tool_cache, wrap_tool
+from usage import (
+    BudgetedModel,
+    BudgetExceededError,
+    UsageBudget,
+    UsageTracker,
+    current_tracker,
+    daily_ledger,
+)
+from prompts import PROMPTS, CompiledPrompt
 
 load_dotenv()
 
@@ -36,6 +75,13 @@ setup_logging()
 
 logger = logging.getLogger(__name__)
 
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Progress listener of the run executing in the current task
+current_progress: ContextVar[Optional[ProgressCallback]] = ContextVar(
+    "progress", default=None
+)
+
 
 class StockAction(Enum):
     BUY = "BUY"
@@ -43,6 +89,11 @@ class StockAction(Enum):
     HOLD = "HOLD"
 
 
+class OrchestrationMode(Enum):
+    SUPERVISOR = "supervisor"
+    PIPELINE = "pipeline"
+
+
 class NewsSentiment(Enum):
     POSITIVE = "POSITIVE"
     NEGATIVE = "NEGATIVE"
@@ -61,6 +112,10 @@ class StockRecommendation:
     technical_indicators: Dict[str, Any]
     news_sentiment: NewsSentiment
     volume_analysis: str
+    stop_loss: Optional[float] = None
+    entry_low: Optional[float] = None
+    entry_high: Optional[float] = None
+    time_horizon: Optional[str] = None
 
 
 @dataclass
@@ -78,16 +133,101 @@ class MarketData:
 
 
 class StockResearchSystem:
-    def __init__(self, bright_data_api_token: str, openai_api_key: str):
-        self.bright_data_api_token = bright_data_api_token
-        self.openai_api_key = openai_api_key
+    """Research agents shared by any number of concurrent ``analyze_stocks`` calls.
+
+    One instance holds a single MCP session, the compiled graphs, a rate limiter
+    and a tool result cache; per-run state lives in the calling task's context.
+    Use ``async with`` (or ``close()``) to shut the MCP session down.
+    """
+
+    def __init__(
+        self,
+        bright_data_api_token: Optional[str] = None,
+        groq_api_key: Optional[str] = None,
+        archive: Optional[RunArchive] = None,
+        settings: Optional[Settings] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        budget: Optional[UsageBudget] = None,
+        router: Optional[ModelRouter] = None,
+        track_daily_usage: bool = True,
+        cache_pages: bool = True,
+        checkpoints: Optional[CheckpointStore] = None,
+    ):
+        # Keys passed in (e.g. from the UI) take precedence over configured ones
+        self.settings = (settings or get_settings()).with_overrides(
+            bright_data_api_token=bright_data_api_token, groq_api_key=groq_api_key
+        )
+        s = self.settings
         self.client = None
         self.supervisor = None
+        self.pipeline = None
+        self.tools = []
+        self.quote_tools = []
+        self.prompt_versions: Dict[str, str] = {}
+        self.archive = archive
+        self.tool_cache = tool_cache or shared_tool_cache(
+            s.tool_cache_ttl, s.tool_cache_size
+        )
+        self.rate_limiter = rate_limiter or RateLimiter(
+            rate=s.tool_rate_per_second,
+            burst=s.tool_rate_burst,
+            max_concurrency=s.tool_max_concurrency,
+        )
+        self.page_cache = (
+            PageCache(s.page_cache_path, s.page_cache_ttl) if cache_pages else None
+        )
+        self.budget = budget or UsageBudget.from_settings(s)
+        self.usage_ledger = (
+            daily_ledger(s.usage_ledger_path) if track_daily_usage else None
+        )
+        self.router = router or ModelRouter(
+            self._create_budgeted_model, s.model_tiers, routes_for(s)
+        )
+        self.checkpoints = checkpoints or (
+            get_checkpoint_store(s.checkpoint_path, s.checkpoint_retention_hours)
+            if s.checkpoint_runs
+            else None
+        )
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._init_lock = asyncio.Lock()
 
-    async def initialize(self):
-        """Initialize the MCP client and supervisor"""
-        logger.info("Initializing StockResearchSystem")
+    async def __aenter__(self) -> "StockResearchSystem":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
+    @property
+    def ready(self) -> bool:
+        """Agents are built and the MCP session, if one was opened, is still open"""
+        return self.supervisor is not None and (
+            self.client is None or self._exit_stack is not None
+        )
+
+    async def initialize(self, tools: Optional[List[Any]] = None, model: Any = None):
+        """Initialize the MCP session, agents and supervisor once.
+
+        ``tools`` replaces the Bright Data tools and ``model`` the routed Groq models
+        (one model for every agent), e.g. for offline load tests. Concurrent callers
+        wait for the first initialization.
+        """
+        async with self._init_lock:
+            if self.supervisor is not None:
+                return
+            with INITIALIZE_SECONDS.time():
+                await self._initialize(tools, model)
+
+    async def close(self) -> None:
+        """Close the shared MCP session"""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            logger.info("MCP session closed")
+
+    @profiled("mcp_startup", "startup")
+    async def _open_mcp_tools(self) -> List[Any]:
         logger.info("Creating MCP client")
 
         self.client = MultiServerMCPClient(
@@ -96,214 +236,675 @@ class StockResearchSystem:
                     "command": "npx",
                     "args": ["@brightdata/mcp"],
                     "env": {
-                        "API_TOKEN": self.bright_data_api_token,
-                        "WEB_UNLOCKER_ZONE": os.getenv(
-                            "WEB_UNLOCKER_ZONE", "unblocker"
-                        ),
-                        "BROWSER_ZONE": os.getenv("BROWSER_ZONE", "scraping_browser"),
+                        "API_TOKEN": self.settings.bright_data_api_token,
+                        "WEB_UNLOCKER_ZONE": self.settings.web_unlocker_zone,
+                        "BROWSER_ZONE": self.settings.browser_zone,
                     },
                     "transport": "stdio",
                 },
             }
         )
 
+        # One long-lived session instead of a new server process per tool call
+        self._exit_stack = AsyncExitStack()
+        session = await self._exit_stack.enter_async_context(
+            self.client.session("bright_data")
+        )
+        MCP_SESSIONS.inc()
+        self._exit_stack.callback(MCP_SESSIONS.dec)
+
         logger.info("Fetching MCP tools")
-        tools = await self.client.get_tools()
-        logger.info("Tools loaded", extra={"tool_count": len(tools)})
+        return await load_mcp_tools(session)
+
+    @profiled("initialize", "startup")
+    async def _initialize(self, tools: Optional[List[Any]], model: Any) -> None:
+        logger.info("Initializing StockResearchSystem")
 
-        logger.info("Initializing LLM model")
-        model = ChatGroq(
-            model=os.getenv("MODEL_NAME"), api_key=os.getenv("GROQ_API_KEY")
+        if tools is None:
+            tools = await self._open_mcp_tools()
+        # Live quote polls skip the result and page caches to see current prices
+        self.quote_tools = [
+            wrap_tool(t, self.rate_limiter) for t in tools if t.name in SCRAPE_TOOLS
+        ]
+        tools = [wrap_tool(t, self.rate_limiter, self.tool_cache) for t in tools]
+        if self.page_cache is not None:
+            # Agents get extracted fields instead of full-page markdown
+            tools = [
+                (
+                    with_page_cache(
+                        t, self.page_cache, self.settings.page_extract_max_chars
+                    )
+                    if t.name in SCRAPE_TOOLS
+                    else t
+                )
+                for t in tools
+            ]
+        # Local analytics tools: no rate limit or cache, but recorded like the rest
+        local_tools = await asyncio.to_thread(
+            sector_tools,
+            self.settings.price_store_path,
+            self.settings.sector_map_path,
+            self.settings.price_adjustment_path,
         )
+        local_tools += await asyncio.to_thread(
+            fundamentals_tools, self.settings.fundamentals_path
+        )
+        local_tools += await asyncio.to_thread(
+            symbol_tools,
+            self.settings.symbol_master_path,
+            self.settings.sector_map_path,
+        )
+        names = {tool.name for tool in tools}
+        tools += [wrap_tool(t) for t in local_tools if t.name not in names]
+        self.tools = tools
+        logger.info("Tools loaded", extra={"tool_count": len(tools)})
+
+        logger.info("Initializing LLM models")
+        models = {
+            name: model if model is not None else self.router.model_for(name)
+            for name in (
+                "supervisor",
+                "stock_finder_agent",
+                "market_data_agent",
+                "news_analyst_agent",
+                "recommendation_agent",
+            )
+        }
 
         logger.info("Loading prompts")
-        stock_finder_prompt = get_stock_finder_prompt()
-        market_data_prompt = get_market_data_prompt()
-        news_analyst_prompt = get_news_analyst_prompt()
-        recommendation_prompt = get_recommendation_prompt()
-        supervisor_prompt = get_supervisor_prompt()
+        prompts = {
+            name: self._augment_prompt_with_tools(name, tools)
+            for name in models
+            if name != "supervisor"
+        }
+        prompts["supervisor"] = PROMPTS.get("supervisor")
+        self.prompt_versions = {name: p.version for name, p in prompts.items()}
+        for name, prompt in prompts.items():
+            logger.info(
+                "Prompt loaded",
+                extra={
+                    "prompt": name,
+                    "prompt_version": prompt.version,
+                    "prompt_tokens": prompt.tokens,
+                    "raw_prompt_tokens": prompt.raw_tokens,
+                },
+            )
 
         # Create specialized agents
         logger.info("Creating stock_finder_agent")
         stock_finder_agent = self._create_stock_finder_agent(
-            model, tools, stock_finder_prompt
+            models["stock_finder_agent"], tools, prompts["stock_finder_agent"].text
         )
 
         logger.info("Creating market_data_agent")
         market_data_agent = self._create_market_data_agent(
-            model, tools, market_data_prompt
+            models["market_data_agent"], tools, prompts["market_data_agent"].text
         )
 
         logger.info("Creating news_analyst_agent")
         news_analyst_agent = self._create_news_analyst_agent(
-            model, tools, news_analyst_prompt
+            models["news_analyst_agent"], tools, prompts["news_analyst_agent"].text
         )
 
         logger.info("Creating recommendation_agent")
         recommendation_agent = self._create_recommendation_agent(
-            model, tools, recommendation_prompt
+            models["recommendation_agent"], tools, prompts["recommendation_agent"].text
+        )
+
+        agents = {
+            "stock_finder_agent": stock_finder_agent,
+            "market_data_agent": market_data_agent,
+            "news_analyst_agent": news_analyst_agent,
+            "recommendation_agent": recommendation_agent,
+        }
+
+        # Create deterministic pipeline (same agents, fixed edges, no supervisor LLM)
+        logger.info("Creating pipeline")
+        self.pipeline = build_research_pipeline(agents).compile(
+            checkpointer=self.checkpoints
         )
 
         # Create supervisor
         logger.info("Creating supervisor")
         self.supervisor = create_supervisor(
-            model=ChatGroq(
-                model=os.getenv("MODEL_NAME"), api_key=os.getenv("GROQ_API_KEY")
-            ),
+            model=models["supervisor"],
+            # The finder's turn ends with the prefetched market data, as in the pipeline
             agents=[
-                stock_finder_agent,
-                market_data_agent,
-                news_analyst_agent,
-                recommendation_agent,
+                with_prefetch(agent) if name == "stock_finder_agent" else agent
+                for name, agent in agents.items()
             ],
-            prompt=supervisor_prompt,
+            prompt=prompts["supervisor"].text,
             add_handoff_back_messages=True,
             output_mode="full_history",
-        ).compile()
+        ).compile(checkpointer=self.checkpoints)
         logger.info("StockResearchSystem initialized ✅")
 
+    def _create_model(self, model_name: Optional[str]) -> ChatGroq:
+        return ChatGroq(
+            model=model_name,
+            api_key=self.settings.groq_api_key,
+            temperature=self.settings.model_temperature,
+            max_tokens=self.settings.model_max_tokens,
+            timeout=self.settings.model_timeout,
+            cache=CASSETTE_LLM_CACHE,
+        )
+
+    def _create_budgeted_model(self, model_name: str) -> Any:
+        """Routed model, switching to the fallback model once the run's budget is spent"""
+        model = self._create_model(model_name)
+        fallback = self.budget.fallback_model
+        if self.budget.on_exceed == "downgrade" and fallback and fallback != model_name:
+            model = BudgetedModel(model, self._create_model(fallback))
+        return model
+
     def _get_tool_name(self, tool: Any) -> str:
         """Safely extract a tool's name for logging and prompts."""
         return getattr(tool, "name", str(tool))
 
-    def _augment_prompt_with_tools(self, base_prompt: str, tools: Any) -> str:
+    def _augment_prompt_with_tools(self, name: str, tools: Any) -> CompiledPrompt:
         """
-        Append available tool names with STRICT instructions to prevent hallucination.
+        Registered prompt followed by the available tool names with STRICT instructions
+        to prevent hallucination; compiled once per prompt and tool set.
         """
-        if not tools:
-            return (
-                base_prompt + "\n\n" + "=" * 80 + "\n"
-                "⚠️  CRITICAL: NO EXTERNAL TOOLS AVAILABLE\n" + "=" * 80 + "\n"
-                "You MUST answer using ONLY your internal knowledge.\n"
-                "DO NOT attempt to call ANY tools or functions.\n"
-                "DO NOT use <function=...> syntax or tool_calls.\n"
-                "Provide direct answers based on your training data.\n" + "=" * 80
-            )
-
-        tool_names = sorted({self._get_tool_name(t) for t in tools})
-        tool_list_text = "\n".join(
-            f"  {i + 1}. {name}" for i, name in enumerate(tool_names)
-        )
-
-        return (
-            base_prompt + "\n\n" + "=" * 80 + "\n"
-            "🔧 AVAILABLE TOOLS (STRICTLY LIMITED)\n" + "=" * 80 + "\n"
-            f"{tool_list_text}\n\n"
-            "⚠️  CRITICAL TOOL USAGE RULES:\n"
-            "1. Use ONLY the exact tool names listed above\n"
-            "2. DO NOT invent, guess, or modify tool names\n"
-            "3. DO NOT use tools that are not in the list\n"
-            "4. If you need a capability not listed, answer directly WITHOUT tool calls\n"
-            "5. NEVER use <function=...> syntax for unlisted tools\n"
-            "6. When in doubt, provide direct answers instead of attempting tool calls\n\n"
-            "If you attempt to call a non-existent tool, your response will FAIL.\n"
-            + "="
-            * 80
-        )
+        return PROMPTS.with_tools(name, (self._get_tool_name(t) for t in tools))
 
     def _create_stock_finder_agent(self, model, tools, prompt):
-        agent_id_ctx.set("stock_finder_agent")
         return create_react_agent(
             model,
             tools,
-            prompt=self._augment_prompt_with_tools(prompt, tools),
+            prompt=prompt,
             name="stock_finder_agent",
+            # Checkpoints are per agent step of the outer graph
+            checkpointer=False,
         )
 
     def _create_market_data_agent(self, model, tools, prompt):
-        agent_id_ctx.set("market_data_agent")
         return create_react_agent(
             model,
             tools,
-            prompt=self._augment_prompt_with_tools(prompt, tools),
+            prompt=prompt,
             name="market_data_agent",
+            # Checkpoints are per agent step of the outer graph
+            checkpointer=False,
         )
 
     def _create_news_analyst_agent(self, model, tools, prompt):
-        agent_id_ctx.set("news_analyst_agent")
         return create_react_agent(
             model,
             tools,
-            prompt=self._augment_prompt_with_tools(prompt, tools),
+            prompt=prompt,
             name="news_analyst_agent",
+            # Checkpoints are per agent step of the outer graph
+            checkpointer=False,
         )
 
     def _create_recommendation_agent(self, model, tools, prompt):
-        agent_id_ctx.set("recommendation_agent")
         return create_react_agent(
             model,
             tools,
-            prompt=self._augment_prompt_with_tools(prompt, tools),
+            prompt=prompt,
             name="recommendation_agent",
+            # Checkpoints are per agent step of the outer graph
+            checkpointer=False,
         )
 
-    async def analyze_stocks(self, user_query: str = None) -> Dict[str, Any]:
-        """Main method to run the complete stock analysis workflow"""
-        # Session-level context
-        session_id = str(uuid.uuid4())
-        session_id_ctx.set(session_id)
-        agent_id_ctx.set("supervisor")
+    async def analyze_stocks(
+        self,
+        user_query: str = None,
+        mode: OrchestrationMode | str = OrchestrationMode.SUPERVISOR,
+        prefetch: Optional[bool] = None,
+        record: Optional[str | Path] = None,
+        replay: Optional[str | Path] = None,
+        progress: Optional[ProgressCallback] = None,
+        resume: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Main method to run the complete stock analysis workflow
+
+        ``prefetch`` (default: ``PREFETCH_ENABLED``) speculatively fetches market data
+        for likely picks while the stock finder agent is still running, in both modes.
+
+        ``record`` saves every LLM exchange and tool call of the run to a cassette file
+        (also when the run fails); ``replay`` serves them from one instead of Groq and
+        Bright Data. A system first used for a replay is initialized without MCP.
+
+        ``progress`` is called with an event dict when the run starts (``started``),
+        after each graph step (``node``) and when it ends (``completed``/``failed``).
+
+        With checkpointing on, the graph state is saved after every agent step under
+        the run id; ``resume`` takes the id of a failed or interrupted run and
+        continues it from its last completed step, with its original query and mode.
+        Resuming a run that is still executing raises ``ValueError``.
+        """
+        if resume:
+            if self.checkpoints is None:
+                raise ValueError("Resuming a run requires CHECKPOINT_RUNS")
+            if replay:
+                raise ValueError("Pass either resume or replay, not both")
+            run = self.checkpoints.get_run(resume)
+            if run is None:
+                raise ValueError(f"No checkpointed run {resume}")
+            if run["status"] == COMPLETED:
+                raise ValueError(f"Run {resume} already completed")
+            user_query, mode = run["query"], run["mode"]
+        mode = OrchestrationMode(mode)
+        if prefetch is None:
+            prefetch = self.settings.prefetch_enabled
+        if record and replay:
+            raise ValueError("Pass either record or replay, not both")
+        cassette = None
+        if replay:
+            cassette = Cassette(replay, REPLAY)
+        elif record:
+            cassette = Cassette(record, RECORD)
+
+        session_id = resume or str(uuid.uuid4())
+        checkpointed = self.checkpoints is not None
+        if checkpointed:
+            # Claimed before anything else, so a rejected resume leaves the live run be
+            self.checkpoints.start_run(
+                session_id, user_query, mode.value, resume=bool(resume)
+            )
 
-        logger.info("Starting stock analysis session")
+        # Session-level context, scoped to the calling task
+        session_token = session_id_ctx.set(session_id)
+        agent_token = agent_id_ctx.set("supervisor")
+        cassette_token = current_cassette.set(cassette)
+        progress_token = current_progress.set(progress)
+        started = time.perf_counter()
+        status = "error"
+        error = None
+        _report_progress(
+            "started", run_id=session_id, mode=mode.value, resumed=bool(resume)
+        )
+        try:
+            with span("analyze_stocks", "run"), SESSIONS_IN_FLIGHT.track():
+                results = await self._analyze(
+                    session_id,
+                    user_query,
+                    mode,
+                    prefetch,
+                    cassette,
+                    resume=bool(resume),
+                )
+            status = results["status"]
+            return results
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            if checkpointed:
+                self.checkpoints.finish_run(
+                    session_id, COMPLETED if status == "completed" else FAILED, error
+                )
+            _report_progress(
+                "failed" if status == "error" else "completed",
+                status=status,
+                seconds=round(time.perf_counter() - started, 3),
+            )
+            current_progress.reset(progress_token)
+            RUNS.inc(mode=mode.value, status=status)
+            RUN_SECONDS.observe(time.perf_counter() - started, mode=mode.value)
+            current_cassette.reset(cassette_token)
+            agent_id_ctx.reset(agent_token)
+            session_id_ctx.reset(session_token)
+            if cassette is not None and not cassette.replaying:
+                cassette.metadata.update(
+                    run_id=session_id, query=user_query, mode=mode.value
+                )
+                cassette.save()
+
+    async def _analyze(
+        self,
+        session_id: str,
+        user_query: Optional[str],
+        mode: OrchestrationMode,
+        prefetch: bool,
+        cassette: Optional[Cassette] = None,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        logger.info(
+            (
+                "Resuming stock analysis session"
+                if resume
+                else "Starting stock analysis session"
+            ),
+            extra={"mode": mode.value},
+        )
 
-        if not self.supervisor:
+        if cassette is not None and cassette.replaying and self.supervisor is None:
+            # Zero-network replay: recorded tool schemas, models never called
+            self.settings = self.settings.with_overrides(
+                groq_api_key=self.settings.groq_api_key or OFFLINE_API_KEY
+            )
+            await self.initialize(tools=cassette.replay_tools())
+        else:
             await self.initialize()
+        if cassette is not None and not cassette.replaying:
+            cassette.tools = [tool_spec(tool) for tool in self.tools]
 
         if not user_query:
             user_query = "Provide comprehensive stock analysis and trading recommendations for promising NSE-listed stocks suitable for short-term trading in the current market conditions."
+        symbols = await asyncio.to_thread(
+            get_symbol_master,
+            self.settings.symbol_master_path,
+            self.settings.sector_map_path,
+        )
+        # Company names in the query are resolved locally instead of by browsing
+        agent_query, query_symbols = symbols.annotate(user_query)
+
+        started_at = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        tracker = UsageTracker(self.budget, ledger=self.usage_ledger)
+        tracker_token = current_tracker.set(tracker)
+        callbacks: List[Any] = [tracker]
+        profiler = current_profiler.get()
+        if profiler is not None:
+            callbacks.append(profiler.callback())
+
+        prefetcher = None
+        # A resumed run is past the stock finder, so there is nothing to prefetch for
+        if prefetch and not resume:
+            prefetcher = MarketDataPrefetcher(
+                self.tools,
+                max_candidates=self.settings.prefetch_max_candidates,
+                max_concurrency=self.settings.prefetch_max_concurrency,
+                max_chars=self.settings.prefetch_max_chars,
+                recent_picks_path=self.settings.recent_picks_path,
+            )
+            prefetcher.start(prefetcher.candidates(user_query, query_symbols))
 
         try:
-            logger.info("Starting supervisor execution")
-            # Store all messages for processing
-            all_messages = []
-
-            async for chunk in self.supervisor.astream(
-                {"messages": [{"role": "user", "content": user_query}]}
-            ):
-                all_messages.append(chunk)
-
-            logger.info(
-                "Supervisor execution completed ✅",
-                extra={"total_chunks": len(all_messages)},
-            )
-        except Exception:
+            if mode is OrchestrationMode.PIPELINE:
+                all_messages, final_messages = await self._run_pipeline(
+                    session_id,
+                    agent_query,
+                    timings,
+                    prefetcher,
+                    callbacks=callbacks,
+                    resume=resume,
+                )
+            else:
+                all_messages, final_messages = await self._run_supervisor(
+                    session_id,
+                    agent_query,
+                    timings,
+                    prefetcher,
+                    callbacks=callbacks,
+                    resume=resume,
+                )
+        except Exception as e:
             logger.exception("Stock analysis failed")
+            self._archive_failure(
+                session_id, user_query, mode, started_at, timings, tracker, e
+            )
             raise
+        finally:
+            current_tracker.reset(tracker_token)
+            observe_usage(tracker.summary())
+            if tracker.ledger is not None:
+                tracker.ledger.save()
+            if prefetcher is not None:
+                prefetcher.cancel()
+
+        prefetched = next(
+            (
+                (chunk[PREFETCH_NODE] or {}).get("prefetched", {})
+                for chunk in all_messages
+                if PREFETCH_NODE in chunk
+            ),
+            {},
+        )
+        if prefetcher is not None and not prefetched:
+            # The supervisor's finder step resolves the prefetch inside its subgraph
+            prefetched = {
+                symbol: asdict(item) for symbol, item in prefetcher.kept.items()
+            }
+        if resume and mode is OrchestrationMode.PIPELINE and not prefetched:
+            prefetched = (await self._state(self.pipeline, session_id)).get(
+                "prefetched", {}
+            )
 
-        # Extract final results
-        final_chunk = all_messages[-1] if all_messages else {}
-        final_messages = final_chunk.get("supervisor", {}).get("messages", [])
-
+        usage = tracker.summary()
+        stopped = tracker.exceeded is not None and not tracker.downgraded
         logger.info(
             "Stock analysis completed successfully ✅",
-            extra={"message_count": len(final_messages)},
+            extra={
+                "message_count": len(final_messages),
+                "total_tokens": usage["total"]["total_tokens"],
+                "cost_usd": round(usage["total"]["cost_usd"], 6),
+            },
         )
 
-        return {
-            "status": "completed",
+        results = {
+            "status": "budget_exceeded" if stopped else "completed",
+            "run_id": session_id,
+            "query": user_query,
+            "query_symbols": query_symbols,
+            "mode": mode.value,
             "timestamp": datetime.now().isoformat(),
+            "duration_seconds": time.perf_counter() - started_at,
+            "timings": timings,
             "messages": final_messages,
+            "prefetched": prefetched,
+            "usage": usage,
+            "prompt_versions": self.prompt_versions,
+            "cassette": str(cassette.path) if cassette is not None else None,
             "raw_output": all_messages,
         }
+        report = self.format_results_for_display(results)
+        results["recommendations"], results["unknown_symbols"] = (
+            validate_recommendations(parse_stock_recommendations(report), symbols)
+        )
+
+        if self.archive is not None:
+            self.archive.save_run(results, report)
+
+        return results
+
+    def _archive_failure(
+        self,
+        session_id: str,
+        user_query: str,
+        mode: OrchestrationMode,
+        started_at: float,
+        timings: Dict[str, float],
+        tracker: UsageTracker,
+        error: Exception,
+    ) -> None:
+        """Store a failed run's timings and token usage; never masks the failure"""
+        if self.archive is None:
+            return
+        try:
+            self.archive.save_run(
+                {
+                    "status": "error",
+                    "error": repr(error),
+                    "run_id": session_id,
+                    "query": user_query,
+                    "mode": mode.value,
+                    "timestamp": datetime.now().isoformat(),
+                    "duration_seconds": time.perf_counter() - started_at,
+                    "timings": timings,
+                    "usage": tracker.summary(),
+                }
+            )
+        except Exception:
+            logger.exception("Failed run not archived")
+
+    def _graph_config(
+        self, session_id: str, callbacks: Optional[List[Any]], **configurable: Any
+    ) -> Dict[str, Any]:
+        if self.checkpoints is not None:
+            # Checkpoints of this run are stored and resumed under its id
+            configurable["thread_id"] = session_id
+        return {"configurable": configurable, "callbacks": callbacks or []}
+
+    async def _state(self, graph: Any, session_id: str) -> Dict[str, Any]:
+        """Latest checkpointed state values of a run"""
+        state = await graph.aget_state({"configurable": {"thread_id": session_id}})
+        return state.values or {}
+
+    async def _run_supervisor(
+        self,
+        session_id: str,
+        user_query: str,
+        timings: Dict[str, float],
+        prefetcher: Optional[MarketDataPrefetcher] = None,
+        callbacks: Optional[List[Any]] = None,
+        resume: bool = False,
+    ) -> Tuple[List[Any], List[Any]]:
+        """Let the supervisor LLM route between agents"""
+        logger.info("Starting supervisor execution")
+        # Store all messages for processing
+        all_messages = []
+        # None continues the checkpointed run from its last completed step
+        graph_input = (
+            None if resume else {"messages": [{"role": "user", "content": user_query}]}
+        )
+
+        try:
+            async for chunk in _timed(
+                self.supervisor.astream(
+                    graph_input,
+                    config=self._graph_config(
+                        session_id, callbacks, prefetcher=prefetcher
+                    ),
+                ),
+                timings,
+            ):
+                all_messages.append(chunk)
+        except BudgetExceededError:
+            logger.warning("Supervisor execution stopped by token budget")
+
+        logger.info(
+            "Supervisor execution completed ✅",
+            extra={"total_chunks": len(all_messages)},
+        )
+
+        # Extract final results from the last supervisor update
+        final_messages = next(
+            (
+                (chunk["supervisor"] or {}).get("messages", [])
+                for chunk in reversed(all_messages)
+                if "supervisor" in chunk
+            ),
+            [],
+        )
+        if resume and not final_messages:
+            final_messages = (await self._state(self.supervisor, session_id)).get(
+                "messages", []
+            )
+        return all_messages, final_messages
+
+    async def _run_pipeline(
+        self,
+        session_id: str,
+        user_query: str,
+        timings: Dict[str, float],
+        prefetcher: Optional[MarketDataPrefetcher] = None,
+        callbacks: Optional[List[Any]] = None,
+        resume: bool = False,
+    ) -> Tuple[List[Any], List[Any]]:
+        """Run the agents in fixed order without supervisor round-trips"""
+        logger.info("Starting pipeline execution")
+        all_messages = []
+        user_message = HumanMessage(content=user_query)
+        final_messages = [user_message]
+
+        try:
+            async for chunk in _timed(
+                self.pipeline.astream(
+                    (
+                        None
+                        if resume
+                        else {"messages": [user_message], "user_query": user_query}
+                    ),
+                    config=self._graph_config(
+                        session_id, callbacks, prefetcher=prefetcher
+                    ),
+                ),
+                timings,
+            ):
+                all_messages.append(chunk)
+                for update in chunk.values():
+                    final_messages.extend((update or {}).get("messages", []))
+        except BudgetExceededError:
+            logger.warning("Pipeline execution stopped by token budget")
+
+        logger.info(
+            "Pipeline execution completed ✅",
+            extra={"total_chunks": len(all_messages)},
+        )
+        if resume:
+            # Earlier steps' messages come from the checkpoint, not this stream
+            final_messages = (await self._state(self.pipeline, session_id)).get(
+                "messages", final_messages
+            )
+        return all_messages, final_messages
+
+    async def rescore_live(
+        self,
+        recommendations: List[Any],
+        polls: int = 1,
+        interval_seconds: float = 30.0,
+    ) -> List[Dict[str, Any]]:
+        """Re-score a run's recommendations against live quotes, without LLM calls.
+
+        Indicators are seeded from the price store's daily closes, then updated by
+        ``polls`` scrapes of each symbol's quote page, ``interval_seconds`` apart.
+        """
+        await self.initialize()
+        recommendations = list(recommendations)
+        symbols = list(
+            dict.fromkeys(
+                rec["symbol"] if isinstance(rec, dict) else rec.symbol
+                for rec in recommendations
+            )
+        )
+        monitor = LiveQuoteMonitor()
+        monitor.subscribe(symbols)
+        path = self.settings.price_adjustment_path
+        store = PriceStore(
+            self.settings.price_store_path,
+            get_fundamentals_store(path) if path else None,
+        )
+        await asyncio.to_thread(monitor.seed_from_store, store, symbols)
+        feed = PollingQuoteFeed(
+            mcp_quote_fetcher(self.quote_tools),
+            symbols,
+            interval_seconds=interval_seconds,
+            max_polls=polls,
+        )
+        await monitor.run(feed)
+        return monitor.rescore(recommendations)
 
     def format_results_for_display(self, results: Dict[str, Any]) -> str:
         """Format the analysis results for better display"""
-        if not results.get("messages"):
-            return "No analysis results available."
+        return format_results_for_display(results)
+
 
-        # Extract the final message content
-        final_messages = results["messages"]
-        if not final_messages:
-            return "Analysis completed but no recommendations generated."
+async def _timed(stream: AsyncIterator[Dict[str, Any]], timings: Dict[str, float]):
+    """Yield graph update chunks, adding the time spent producing each to its node"""
+    started = time.perf_counter()
+    async for chunk in stream:
+        now = time.perf_counter()
+        for node in chunk:
+            timings[node] = timings.get(node, 0.0) + now - started
+            _report_progress("node", node=node, seconds=round(now - started, 3))
+        started = now
+        yield chunk
 
-        # Get the last assistant message which should contain recommendations
-        for message in reversed(final_messages):
-            if hasattr(message, "content") and message.content:
-                return str(message.content)
-            elif isinstance(message, dict) and message.get("content"):
-                return str(message["content"])
 
-        return "Analysis completed. Please check the detailed output."
+def _report_progress(event: str, **fields: Any) -> None:
+    """Send a progress event to the current run's listener; its errors are logged"""
+    progress = current_progress.get()
+    if progress is None:
+        return
+    try:
+        progress({"event": event, **fields})
+    except Exception:
+        logger.warning("Progress callback failed", exc_info=True)
 
 
 # Utility functions for the Streamlit app
@@ -320,6 +921,26 @@ def pretty_print_message(message, indent=False):
     return pretty_message
 
 
+def format_results_for_display(results: Dict[str, Any]) -> str:
+    """Report text of a run: its last message with content"""
+    if not results.get("messages"):
+        return "No analysis results available."
+
+    # Extract the final message content
+    final_messages = results["messages"]
+    if not final_messages:
+        return "Analysis completed but no recommendations generated."
+
+    # Get the last assistant message which should contain recommendations
+    for message in reversed(final_messages):
+        if hasattr(message, "content") and message.content:
+            return str(message.content)
+        elif isinstance(message, dict) and message.get("content"):
+            return str(message["content"])
+
+    return "Analysis completed. Please check the detailed output."
+
+
 def extract_recommendations(final_messages) -> List[Dict[str, Any]]:
     """Extract structured recommendations from the final messages"""
     recommendations = []
@@ -364,12 +985,148 @@ def extract_recommendations(final_messages) -> List[Dict[str, Any]]:
     return recommendations
 
 
-if __name__ == "__main__":
-    BRIGHTDATA_TOKEN: str = os.getenv("BRIGHT_DATA_API_TOKEN", "")
-    GROQ_TOKEN: str = os.getenv("GROQ_API_KEY", "")
+RECOMMENDATION_HEADER = re.compile(
+    r"^\s*\**\s*([A-Z][A-Z0-9&\-]{0,19})\s+-\s+(.+?)\**\s*$", re.MULTILINE
+)
+PRICE = r"₹?\s*([0-9][0-9,]*\.?[0-9]*)"
+
+
+def _parse_price(pattern: str, text: str) -> Optional[float]:
+    match = re.search(pattern, text)
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
 
-    system = StockResearchSystem(BRIGHTDATA_TOKEN, GROQ_TOKEN)
-    results = asyncio.run(system.analyze_stocks())
+
+def parse_stock_recommendations(text: str) -> List[StockRecommendation]:
+    """Parse the recommendation agent's report into typed records.
+
+    Sections without a RECOMMENDATION line (e.g. market data or news blocks) are skipped.
+    """
+    recommendations = []
+    headers = list(RECOMMENDATION_HEADER.finditer(text or ""))
+
+    for header, following in zip(headers, [*headers[1:], None]):
+        section = text[header.end() : following.start() if following else len(text)]
+        action_match = re.search(r"RECOMMENDATION:\s*\**\s*(BUY|SELL|HOLD)", section)
+        if not action_match:
+            continue
+
+        confidence_match = re.search(r"CONFIDENCE:\s*\**\s*([A-Z]+)", section)
+        horizon_match = re.search(r"TIME HORIZON:\s*\**\s*([^\n*]+)", section)
+        entry_match = re.search(rf"Suggested Entry:\s*{PRICE}\s*-\s*{PRICE}", section)
+        rationale_match = re.search(r"RATIONALE:\s*(.+?)(?:\n\s*\n|$)", section, re.S)
+        current = _parse_price(rf"Current Price:\s*{PRICE}", section)
+        target = _parse_price(rf"TARGET PRICE:\s*\**\s*{PRICE}", section)
+
+        recommendations.append(
+            StockRecommendation(
+                symbol=header.group(1),
+                company_name=header.group(2).strip(),
+                current_price=current if current is not None else float("nan"),
+                action=StockAction(action_match.group(1)),
+                target_price=target if target is not None else float("nan"),
+                confidence=confidence_match.group(1) if confidence_match else "MEDIUM",
+                reasoning=rationale_match.group(1).strip() if rationale_match else "",
+                technical_indicators={},
+                news_sentiment=NewsSentiment.NEUTRAL,
+                volume_analysis="",
+                stop_loss=_parse_price(rf"Stop Loss:\s*{PRICE}", section),
+                entry_low=(
+                    float(entry_match.group(1).replace(",", ""))
+                    if entry_match
+                    else None
+                ),
+                entry_high=(
+                    float(entry_match.group(2).replace(",", ""))
+                    if entry_match
+                    else None
+                ),
+                time_horizon=horizon_match.group(1).strip() if horizon_match else None,
+            )
+        )
+
+    return recommendations
+
+
+def validate_recommendations(
+    recommendations: List[StockRecommendation], symbols: SymbolMaster
+) -> Tuple[List[StockRecommendation], List[str]]:
+    """Records with canonical NSE symbols, and the reported symbols that don't exist.
+
+    Near-miss symbols are corrected from the symbol master; records for unknown
+    symbols are dropped from the structured output (the report keeps them).
+    """
+    valid, unknown = [], []
+    for record in recommendations:
+        symbol = symbols.validate(record.symbol, record.company_name)
+        if symbol is None:
+            unknown.append(record.symbol)
+            continue
+        if symbol != record.symbol:
+            logger.info(
+                "Recommendation symbol corrected",
+                extra={"reported": record.symbol, "symbol": symbol},
+            )
+            record = replace(record, symbol=symbol)
+        valid.append(record)
+    if unknown:
+        logger.warning(
+            "Recommendations for unknown NSE symbols dropped",
+            extra={"symbols": unknown},
+        )
+    return valid, unknown
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one stock analysis")
+    parser.add_argument(
+        "--record", metavar="CASSETTE", help="Save every LLM and tool call to a file"
+    )
+    parser.add_argument(
+        "--replay", metavar="CASSETTE", help="Re-run a recorded analysis offline"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue a failed run from its last completed agent step",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time startup, agents, LLM and tool calls; write a flamegraph file",
+    )
+    args = parser.parse_args()
+    settings = get_settings()
+
+    async def run() -> Dict[str, Any]:
+        query, mode = None, settings.orchestration_mode
+        if args.replay:
+            recorded = Cassette(args.replay, REPLAY).metadata
+            query, mode = recorded.get("query"), recorded.get("mode", mode)
+        system = StockResearchSystem(
+            settings=settings,
+            # Replays are not new research runs
+            archive=None if args.replay else RunArchive(settings.archive_path),
+        )
+        try:
+            return await system.analyze_stocks(
+                query,
+                mode=mode,
+                record=args.record,
+                replay=args.replay,
+                resume=args.resume,
+            )
+        finally:
+            await system.close()
+
+    if args.profile:
+        profiler = Profiler(cprofile=True)
+        with profiler.activate():
+            results = asyncio.run(run())
+        profile = profiler.save(settings.profile_dir, results["run_id"])
+    else:
+        results = asyncio.run(run())
 
     print("*" * 80)
     print("*" * 80)
@@ -379,3 +1136,8 @@ if __name__ == "__main__":
     print(recommendations)
 
     print(results)
+
+    if args.profile:
+        print(format_top(profile["top"]))
+        print(f"Flamegraph stacks: {profile['folded_path']}")
+        print(f"cProfile stats: {profile['pstats_path']}")
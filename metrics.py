@@ -0,0 +1,316 @@
+"""In-process counters, gauges and histograms with a Prometheus text endpoint.
+
+Instrumented code only takes a lock and adds to a float; the HTTP server runs in
+a daemon thread and renders on scrape, so the agent loop never waits on it::
+
+    GET /metrics   Prometheus text exposition format (version 0.0.4)
+    GET /healthz   200 while the process serves requests
+    GET /readyz    200 when every readiness check passes, else 503 listing failures
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; runs take minutes, tool calls and LLM calls take seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.label_names:
+            values = [((), 0.0)]
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or (
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+            lines.append(
+                f"{self.name}_count{_labels(self.label_names, key)} {cumulative}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus readiness checks, rendered together on scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._checks: Dict[str, Callable[[], bool]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        return self._register(Histogram(name, documentation, labels, buckets=buckets))
+
+    def add_readiness_check(self, name: str, check: Callable[[], bool]) -> None:
+        with self._lock:
+            self._checks[name] = check
+
+    def remove_readiness_check(self, name: str) -> None:
+        with self._lock:
+            self._checks.pop(name, None)
+
+    def failing_checks(self) -> List[str]:
+        with self._lock:
+            checks = list(self._checks.items())
+        failing = []
+        for name, check in checks:
+            try:
+                if not check():
+                    failing.append(name)
+            except Exception:
+                failing.append(name)
+        return failing
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+RUNS = METRICS.counter(
+    "research_runs_total", "Completed analysis runs", ["mode", "status"]
+)
+RUN_SECONDS = METRICS.histogram(
+    "research_run_duration_seconds", "Wall time of analysis runs", ["mode"]
+)
+SESSIONS_IN_FLIGHT = METRICS.gauge(
+    "research_sessions_in_flight", "Analysis runs currently executing"
+)
+MCP_SESSIONS = METRICS.gauge(
+    "research_mcp_sessions_open", "Open Bright Data MCP sessions (server processes)"
+)
+INITIALIZE_SECONDS = METRICS.histogram(
+    "research_initialize_duration_seconds", "Time to start MCP and build the agents"
+)
+LLM_TOKENS = METRICS.counter(
+    "research_llm_tokens_total", "LLM tokens used", ["agent", "direction"]
+)
+LLM_CALLS = METRICS.counter("research_llm_calls_total", "LLM calls", ["agent"])
+TOOL_CALLS = METRICS.counter(
+    "research_tool_calls_total",
+    "Tool calls by outcome: cache_hit, shared (joined an identical call in "
+    "flight), fetched, error or replayed",
+    ["tool", "outcome"],
+)
+TOOL_SECONDS = METRICS.histogram(
+    "research_tool_request_duration_seconds",
+    "Tool request latency, rate-limit wait excluded",
+    ["tool"],
+)
+TOOL_QUEUE_DEPTH = METRICS.gauge(
+    "research_tool_queue_depth", "Tool requests waiting for a rate-limit slot"
+)
+TOOL_IN_FLIGHT = METRICS.gauge(
+    "research_tool_requests_in_flight", "Tool requests currently executing"
+)
+SCHEDULER_QUEUED = METRICS.gauge(
+    "research_scheduler_runs_queued", "Scheduled runs waiting for a worker"
+)
+ANALYSIS_REQUESTS = METRICS.counter(
+    "research_analysis_requests_total",
+    "Analysis requests by how they were served: leader (ran), follower (joined an "
+    "identical run in flight) or cached",
+    ["role"],
+)
+PAGE_CACHE = METRICS.counter(
+    "research_page_cache_lookups_total", "Scraped page cache lookups", ["result"]
+)
+
+
+def observe_usage(usage: Dict[str, Any]) -> None:
+    """Add a run's ``UsageTracker.summary()`` to the LLM counters"""
+    for agent, totals in usage.get("by_agent", {}).items():
+        LLM_CALLS.inc(totals["calls"], agent=agent)
+        LLM_TOKENS.inc(totals["input_tokens"], agent=agent, direction="input")
+        LLM_TOKENS.inc(totals["output_tokens"], agent=agent, direction="output")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._reply(200, self.registry.render(), "text/plain; version=0.0.4")
+        elif path == "/healthz":
+            self._reply(200, "ok\n")
+        elif path == "/readyz":
+            failing = self.registry.failing_checks()
+            if failing:
+                self._reply(503, "not ready: " + ", ".join(failing) + "\n")
+            else:
+                self._reply(200, "ready\n")
+        else:
+            self._reply(404, "not found\n")
+
+    def _reply(self, status: int, body: str, content_type: str = "text/plain"):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("Metrics request", extra={"request": format % args})
+
+
+@lru_cache(maxsize=None)
+def start_metrics_server(
+    host: str = "127.0.0.1", port: int = 9108
+) -> ThreadingHTTPServer:
+    """Serve METRICS from a daemon thread; one server per address per process"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    logger.info("Metrics server started", extra={"host": host, "port": port})
+    return server
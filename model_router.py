@@ -0,0 +1,129 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import Runnable
+
+from settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+FAST_TIER = "fast"
+LARGE_TIER = "large"
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    # Turns that route or choose tool arguments
+    tool_calls: str
+    # The agent's final answer, once it stops calling tools
+    synthesis: str
+
+
+DEFAULT_ROUTES = {
+    "supervisor": ModelRoute(FAST_TIER, FAST_TIER),
+    "stock_finder_agent": ModelRoute(FAST_TIER, FAST_TIER),
+    "market_data_agent": ModelRoute(FAST_TIER, FAST_TIER),
+    "news_analyst_agent": ModelRoute(FAST_TIER, FAST_TIER),
+    "recommendation_agent": ModelRoute(FAST_TIER, LARGE_TIER),
+}
+
+SINGLE_MODEL_ROUTES = {
+    agent: ModelRoute(LARGE_TIER, LARGE_TIER) for agent in DEFAULT_ROUTES
+}
+
+
+def routes_for(settings: Settings) -> Dict[str, ModelRoute]:
+    """Default routes, overridden per agent by ``<AGENT>_MODEL_TIER`` (e.g. "large"
+    or "fast,large" for tool-call and synthesis turns); ``MODEL_ROUTING=single``
+    sends everything to the large model."""
+    if settings.model_routing == "single":
+        return dict(SINGLE_MODEL_ROUTES)
+
+    routes = dict(DEFAULT_ROUTES)
+    for agent, value in settings.agent_model_tiers:
+        tiers = [tier.strip() for tier in value.split(",")]
+        routes[agent] = ModelRoute(tiers[0], tiers[-1])
+    return routes
+
+
+class TieredModel(Runnable):
+    """Chat model that uses the tool-call model for every turn but the final answer.
+
+    Whether a turn is the final one is only known from the reply, so the tool-call
+    model answers first; a reply without tool calls is discarded and the turn is
+    answered by the synthesis model instead. A ReAct loop's follow-up tool turns
+    therefore stay on the small model, at the cost of one small call per answer.
+    """
+
+    def __init__(self, tool_calls: Runnable, synthesis: Runnable):
+        self.tool_calls = tool_calls
+        self.synthesis = synthesis
+
+    @staticmethod
+    def is_final(reply: Any) -> bool:
+        return not getattr(reply, "tool_calls", None)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "TieredModel":
+        return TieredModel(
+            self.tool_calls.bind_tools(tools, **kwargs),
+            self.synthesis.bind_tools(tools, **kwargs),
+        )
+
+    def invoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> Any:
+        reply = self.tool_calls.invoke(input, config, **kwargs)
+        if self.is_final(reply):
+            reply = self.synthesis.invoke(input, config, **kwargs)
+        return reply
+
+    async def ainvoke(
+        self, input: Any, config: Optional[Dict] = None, **kwargs: Any
+    ) -> Any:
+        reply = await self.tool_calls.ainvoke(input, config, **kwargs)
+        if self.is_final(reply):
+            reply = await self.synthesis.ainvoke(input, config, **kwargs)
+        return reply
+
+
+class ModelRouter:
+    """Hand each agent (and the supervisor) the model tiers its route asks for.
+
+    ``factory`` builds a chat model from a model name; one instance is shared
+    per name. Tiers not listed in ``tiers`` are treated as literal model names.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Runnable],
+        tiers: Optional[Dict[str, str]] = None,
+        routes: Optional[Dict[str, ModelRoute]] = None,
+    ):
+        self.factory = factory
+        self.tiers = tiers or get_settings().model_tiers
+        self.routes = routes or routes_for(get_settings())
+        self._models: Dict[str, Runnable] = {}
+
+    def model_name(self, tier: str) -> str:
+        return self.tiers.get(tier, tier)
+
+    def model_for_tier(self, tier: str) -> Runnable:
+        name = self.model_name(tier)
+        if name not in self._models:
+            self._models[name] = self.factory(name)
+        return self._models[name]
+
+    def model_for(self, agent: str) -> Runnable:
+        route = self.routes.get(agent, ModelRoute(LARGE_TIER, LARGE_TIER))
+        tool_calls = self.model_for_tier(route.tool_calls)
+        synthesis = self.model_for_tier(route.synthesis)
+        logger.info(
+            "Model route",
+            extra={
+                "agent": agent,
+                "tool_calls_model": self.model_name(route.tool_calls),
+                "synthesis_model": self.model_name(route.synthesis),
+            },
+        )
+        if tool_calls is synthesis:
+            return tool_calls
+        return TieredModel(tool_calls, synthesis)
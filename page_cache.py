@@ -0,0 +1,318 @@
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from cassette import current_cassette
+from metrics import PAGE_CACHE
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_PATH = Path("data") / "page_cache.db"
+
+# Bump when extraction rules change so stored extracts are rebuilt
+EXTRACTOR_VERSION = 1
+
+SCRAPE_TOOLS = ("scrape_as_markdown",)
+
+# Pages shorter than this are passed through whole
+MIN_EXTRACT_CHARS = 1500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    content_hash TEXT PRIMARY KEY,
+    raw BLOB NOT NULL,
+    raw_chars INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extracts (
+    content_hash TEXT NOT NULL REFERENCES pages (content_hash) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    max_chars INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (content_hash, version, max_chars)
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL REFERENCES pages (content_hash) ON DELETE CASCADE,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_fetched_at ON urls (fetched_at);
+CREATE INDEX IF NOT EXISTS idx_urls_content_hash ON urls (content_hash);
+"""
+
+QUOTE_FIELDS = re.compile(
+    r"\b(last\s*price|ltp|prev(ious)?\.?\s*close|open|high|low|close|change|vwap|"
+    r"52\s*w(ee)?k|upper\s*band|lower\s*band|volume|traded\s*value|"
+    r"market\s*cap|p/?e|face\s*value|deliver\w*|industry|sector|series|as\s*on)\b",
+    re.IGNORECASE,
+)
+NUMBER = re.compile(r"\d[\d,]*(\.\d+)?")
+LINK_ONLY = re.compile(r"^[\s*\-•|#>]*(!?\[[^\]]*\]\([^)]*\)[\s|•·,]*)+$")
+MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+SENTENCE_END = re.compile(r"[.!?…\"”)]$")
+
+
+def page_kind(url: str) -> str:
+    url = url.lower()
+    if "get-quotes" in url or ("/quote/" in url and "/history" not in url):
+        return "quote"
+    if "/history" in url or "historical" in url:
+        return "history"
+    return "article"
+
+
+def _extract_quote(lines: List[str], max_table_rows: int = 12) -> List[str]:
+    """Tables with a price-field header, and lines naming a price field with a number"""
+    kept: List[str] = []
+    table: List[str] = []
+    for line in [*lines, ""]:
+        text = MARKDOWN_LINK.sub(r"\1", line)
+        if text.startswith("|"):
+            table.append(text)
+            continue
+        if table and QUOTE_FIELDS.search(table[0]):
+            kept.extend(table[:max_table_rows])
+        table = []
+        if QUOTE_FIELDS.search(text) and NUMBER.search(text) and len(text) < 400:
+            kept.append(text)
+    return kept
+
+
+def _extract_history(lines: List[str], max_rows: int = 40) -> List[str]:
+    """Table rows: the header plus the ``max_rows`` most recent bars"""
+    return [line for line in lines if line.startswith("|")][: max_rows + 2]
+
+
+def _extract_article(lines: List[str]) -> List[str]:
+    """Headline and body paragraphs; navigation, link lists and short fragments dropped"""
+    kept = []
+    for line in lines:
+        if LINK_ONLY.match(line):
+            continue
+        text = MARKDOWN_LINK.sub(r"\1", line).strip()
+        if text.startswith("#") and len(text) > 15:
+            kept.append(text)
+        elif len(text) >= 80 or (len(text) >= 40 and SENTENCE_END.search(text)):
+            kept.append(text)
+    return kept
+
+
+EXTRACTORS = {
+    "quote": _extract_quote,
+    "history": _extract_history,
+    "article": _extract_article,
+}
+
+
+def extract_page(url: str, markdown: str, max_chars: int = 6000) -> Tuple[str, str]:
+    """Reduce scraped markdown to the fields agents use; returns ``(kind, text)``.
+
+    Short pages, and pages where extraction finds nothing, are passed through
+    (truncated to ``max_chars``).
+    """
+    kind = page_kind(url)
+    if len(markdown) <= MIN_EXTRACT_CHARS:
+        return kind, markdown
+
+    lines = [line.strip() for line in markdown.splitlines() if line.strip()]
+    kept = list(dict.fromkeys(EXTRACTORS[kind](lines)))
+    if not kept:
+        return kind, markdown[:max_chars]
+
+    text = "\n".join(kept)
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit("\n", 1)[0]
+    return kind, f"[Extracted {kind} fields from a {len(markdown):,}-char page]\n{text}"
+
+
+def tool_output_text(output: Any) -> str:
+    """Text of a tool result: MCP tools may return a list of content blocks"""
+    if isinstance(output, list):
+        return "\n".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in output
+        )
+    return str(output)
+
+
+class PageCache:
+    """Content-addressed store of scraped pages and their extracts (SQLite).
+
+    Pages are keyed by the SHA-256 of their content, so identical pages fetched
+    from different URLs or runs are stored and extracted once. ``urls`` maps each
+    URL to the content it last returned. URLs older than ``ttl`` can't be served,
+    so they and the pages only they reference are pruned every ``ttl`` seconds.
+    """
+
+    def __init__(self, path: Path = PAGE_CACHE_PATH, ttl: float = 900.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = self.misses = self.extractions = 0
+        self._pruned_at = 0.0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(extracts)")}
+            if columns and "max_chars" not in columns:
+                # Extracts from before they were keyed by length; rebuilt on demand
+                conn.execute("DROP TABLE extracts")
+            conn.executescript(SCHEMA)
+        self.prune()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def fresh_extract(self, url: str, max_chars: int) -> Optional[str]:
+        """Extract of the page ``url`` returned within ``ttl`` seconds, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content_hash FROM urls WHERE url = ? AND fetched_at >= ?",
+                (url, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._extract(row[0], url, None, max_chars)
+
+    def put(self, url: str, markdown: str, max_chars: int) -> str:
+        """Store a freshly scraped page and return its extract"""
+        if time.time() - self._pruned_at >= self.ttl:
+            self.prune()
+        content_hash = hashlib.sha256(markdown.encode()).hexdigest()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO pages VALUES (?, ?, ?, ?)",
+                (
+                    content_hash,
+                    zlib.compress(markdown.encode()),
+                    len(markdown),
+                    time.time(),
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?)",
+                (url, content_hash, time.time()),
+            )
+        return self._extract(content_hash, url, markdown, max_chars)
+
+    def _extract(
+        self, content_hash: str, url: str, markdown: Optional[str], max_chars: int
+    ) -> str:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM extracts "
+                "WHERE content_hash = ? AND version = ? AND max_chars = ?",
+                (content_hash, EXTRACTOR_VERSION, max_chars),
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            if markdown is None:
+                raw = conn.execute(
+                    "SELECT raw FROM pages WHERE content_hash = ?", (content_hash,)
+                ).fetchone()[0]
+                markdown = zlib.decompress(raw).decode()
+
+            kind, text = extract_page(url, markdown, max_chars)
+            conn.execute(
+                "INSERT OR REPLACE INTO extracts VALUES (?, ?, ?, ?, ?)",
+                (content_hash, EXTRACTOR_VERSION, max_chars, kind, text),
+            )
+        self.extractions += 1
+        logger.debug(
+            "Page extracted",
+            extra={
+                "url": url,
+                "kind": kind,
+                "raw_chars": len(markdown),
+                "extracted_chars": len(text),
+            },
+        )
+        return text
+
+    def prune(self) -> int:
+        """Drop URLs older than the TTL and pages no URL refers to; returns pages"""
+        self._pruned_at = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM urls WHERE fetched_at < ?", (self._pruned_at - self.ttl,)
+            )
+            # Extracts go with their page (ON DELETE CASCADE)
+            pages = conn.execute(
+                "DELETE FROM pages WHERE content_hash NOT IN "
+                "(SELECT content_hash FROM urls)"
+            ).rowcount
+            conn.execute(
+                "DELETE FROM extracts WHERE version != ?", (EXTRACTOR_VERSION,)
+            )
+        if pages:
+            logger.info("Stale pages pruned", extra={"pages": pages})
+        return pages
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            pages, raw_chars = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_chars), 0) FROM pages"
+            ).fetchone()
+            urls = conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            extracted_chars = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(text)), 0) FROM extracts WHERE version = ?",
+                (EXTRACTOR_VERSION,),
+            ).fetchone()[0]
+        return {
+            "pages": pages,
+            "urls": urls,
+            "raw_chars": raw_chars,
+            "extracted_chars": extracted_chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "extractions": self.extractions,
+        }
+
+
+def with_page_cache(
+    tool: BaseTool, cache: PageCache, max_chars: int = 6000
+) -> BaseTool:
+    """Return a copy of a scrape tool that stores pages and returns their extracts.
+
+    A URL scraped within the cache TTL is answered from disk without calling
+    ``tool``, except while a cassette records or replays the run.
+    """
+
+    async def call(url: str, **kwargs: Any) -> str:
+        if current_cassette.get() is None:
+            cached = await asyncio.to_thread(cache.fresh_extract, url, max_chars)
+            PAGE_CACHE.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+        else:
+            PAGE_CACHE.inc(result="bypass")
+        output = await tool.ainvoke({"url": url, **kwargs})
+        return await asyncio.to_thread(
+            cache.put, url, tool_output_text(output), max_chars
+        )
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=call,
+        handle_tool_error=tool.handle_tool_error,
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import operator
+from dataclasses import asdict
+from typing import Annotated, Any, Dict, List, Mapping, TypedDict
+
+from langchain_core.messages import AnyMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from logging_config import agent_id_ctx
+from prefetch import extract_selected_symbols, format_prefetched_context
+from prompts import PROMPTS
+
+logger = logging.getLogger(__name__)
+
+# Fixed execution order, mirroring the WORKFLOW SEQUENCE in get_supervisor_prompt
+PIPELINE_SEQUENCE = (
+    "stock_finder_agent",
+    "market_data_agent",
+    "news_analyst_agent",
+    "recommendation_agent",
+)
+
+PREFETCH_NODE = "prefetched_market_data"
+
+
+class PipelineState(TypedDict):
+    """Typed state shared by every node of the deterministic pipeline"""
+
+    messages: Annotated[List[AnyMessage], add_messages]
+    user_query: str
+    completed_agents: Annotated[List[str], operator.add]
+    prefetched: Dict[str, Any]
+
+
+class FinderState(TypedDict):
+    """State of the stock finder step when it runs as a supervisor agent"""
+
+    messages: Annotated[List[AnyMessage], add_messages]
+    prefetched: Dict[str, Any]
+
+
+class FinderOutput(TypedDict):
+    messages: List[AnyMessage]
+
+
+def _make_agent_node(name: str, agent: Any):
+    """Wrap a compiled react agent as a pipeline node that returns only new messages."""
+    step_prompt = PROMPTS.get(f"{name}_step").text
+
+    async def run_agent(state: PipelineState) -> Dict[str, Any]:
+        token = agent_id_ctx.set(name)
+        try:
+            logger.info("Running pipeline step")
+            history = list(state["messages"])
+            handoff = HumanMessage(content=step_prompt, name="pipeline")
+            result = await agent.ainvoke({"messages": history + [handoff]})
+            new_messages = result["messages"][len(history) :]
+            logger.info(
+                "Pipeline step completed ✅",
+                extra={"new_messages": len(new_messages)},
+            )
+        finally:
+            agent_id_ctx.reset(token)
+
+        return {"messages": new_messages, "completed_agents": [name]}
+
+    return run_agent
+
+
+async def attach_prefetched_data(
+    state: PipelineState, config: RunnableConfig
+) -> Dict[str, Any]:
+    """Resolve the run's speculative prefetch against the stock finder's picks.
+
+    The prefetcher is per-run and travels in ``config["configurable"]``; without
+    one this node is a no-op.
+    """
+    prefetcher = config.get("configurable", {}).get("prefetcher")
+    if prefetcher is None:
+        return {"prefetched": {}}
+
+    finder_output = str(state["messages"][-1].content) if state["messages"] else ""
+    selected = extract_selected_symbols(finder_output)
+    kept = await prefetcher.resolve(selected)
+    await asyncio.to_thread(prefetcher.record_picks, selected)
+
+    if not kept:
+        return {"prefetched": {}}
+
+    return {
+        "messages": [
+            HumanMessage(content=format_prefetched_context(kept), name="prefetch")
+        ],
+        "prefetched": {symbol: asdict(item) for symbol, item in kept.items()},
+    }
+
+
+def with_prefetch(finder: Any) -> Any:
+    """The stock finder followed by the prefetch step, as one supervisor agent.
+
+    The supervisor only sees agents, so the prefetched context is attached inside
+    the finder's turn and reaches every later agent through the shared history.
+    """
+    graph = StateGraph(FinderState, output_schema=FinderOutput)
+    graph.add_node(finder.name, finder)
+    graph.add_node(PREFETCH_NODE, attach_prefetched_data)
+    graph.add_edge(START, finder.name)
+    graph.add_edge(finder.name, PREFETCH_NODE)
+    graph.add_edge(PREFETCH_NODE, END)
+    return graph.compile(name=finder.name)
+
+
+def build_research_pipeline(agents: Mapping[str, Any]) -> StateGraph:
+    """Build the fixed-edge research graph: finder → market data → news → recommendation.
+
+    Unlike the supervisor graph, no LLM call is spent deciding which agent runs next.
+    Speculatively prefetched market data is attached right after the finder step.
+    """
+    missing = [name for name in PIPELINE_SEQUENCE if name not in agents]
+    if missing:
+        raise ValueError(f"Missing agents for pipeline: {', '.join(missing)}")
+
+    graph = StateGraph(PipelineState)
+    for name in PIPELINE_SEQUENCE:
+        graph.add_node(name, _make_agent_node(name, agents[name]))
+
+    graph.add_node(PREFETCH_NODE, attach_prefetched_data)
+
+    sequence = (PIPELINE_SEQUENCE[0], PREFETCH_NODE, *PIPELINE_SEQUENCE[1:])
+    graph.add_edge(START, sequence[0])
+    for current, following in zip(sequence, sequence[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(sequence[-1], END)
+
+    return graph
@@ -0,0 +1,251 @@
+"""Position sizing and portfolio risk for a run's recommendations.
+
+    python portfolio_risk.py recommendations.jsonl --capital 1000000
+
+BUY and SELL calls are sized fixed-fractionally from their stops (or from volatility
+when a stop is missing), then the resulting book is measured against the local
+price store: exposures, covariance-based volatility and VaR, risk contributions,
+diversification and the historical drawdown of today's weights.
+"""
+
+import argparse
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import DEFAULT_HORIZON_DAYS, horizon_to_days, recommendations_to_frame
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_LOOKBACK_DAYS = 250
+# 95% one-sided normal quantile for parametric VaR
+VAR_Z = 1.645
+
+CONFIDENCE_SCALE = {"HIGH": 1.0, "MEDIUM": 0.75, "LOW": 0.5}
+
+
+def _horizon_days(recs: pd.DataFrame) -> pd.Series:
+    """Holding horizons, defaulted like ``recommendations_to_frame`` where missing"""
+    if "horizon_days" in recs:
+        horizon = pd.to_numeric(recs["horizon_days"], errors="coerce")
+    else:
+        horizon = pd.Series(np.nan, index=recs.index)
+    if "time_horizon" in recs:
+        return horizon.fillna(recs["time_horizon"].map(horizon_to_days))
+    return horizon.fillna(DEFAULT_HORIZON_DAYS)
+
+
+@dataclass
+class PortfolioRisk:
+    positions: pd.DataFrame
+    summary: Dict[str, Any]
+    correlation: pd.DataFrame
+
+
+def size_positions(
+    recs: pd.DataFrame,
+    daily_vol: pd.Series,
+    capital: float,
+    risk_per_trade: float = 0.01,
+    max_position: float = 0.10,
+    max_gross: float = 1.0,
+) -> pd.DataFrame:
+    """Fixed-fractional sizing: lose ``risk_per_trade`` of capital if the stop is hit.
+
+    Positions without a usable stop assume one at two daily standard deviations
+    over the holding horizon. Sizes are scaled by confidence, capped at
+    ``max_position`` of capital each, and scaled down together if gross exposure
+    would exceed ``max_gross``. BUY weights are positive, SELL weights negative.
+    """
+    entry = recs["entry_price"].to_numpy(dtype=float)
+    stop = recs["stop_loss"].to_numpy(dtype=float)
+    direction = np.where(recs["action"].eq("SELL"), -1.0, 1.0)
+    vol = daily_vol.reindex(recs["symbol"]).to_numpy(dtype=float)
+    horizon = _horizon_days(recs)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stop_distance = direction * (entry - stop) / entry
+        vol_stop = 2 * vol * np.sqrt(horizon.to_numpy(dtype=float))
+        stop_distance = np.where(stop_distance > 0, stop_distance, vol_stop)
+        weight = risk_per_trade / stop_distance
+
+    weight = np.nan_to_num(weight, nan=0.0, posinf=0.0)
+    weight *= recs["confidence"].map(CONFIDENCE_SCALE).fillna(0.75).to_numpy()
+    weight = np.minimum(weight, max_position)
+    gross = weight.sum()
+    if gross > max_gross:
+        weight *= max_gross / gross
+
+    sized = recs.assign(
+        horizon_days=horizon.astype(int),
+        stop_distance_pct=stop_distance * 100,
+        weight=direction * weight,
+        notional=weight * capital,
+    )
+    sized["shares"] = np.floor(sized["notional"] / sized["entry_price"]).fillna(0)
+    return sized
+
+
+def _covariance(returns: np.ndarray, shrinkage: float) -> np.ndarray:
+    """Sample covariance over available days, shrunk toward its diagonal"""
+    mask = ~np.isnan(returns)
+    counts = mask.T.astype(float) @ mask.astype(float)
+    centred = np.where(mask, returns - np.nanmean(returns, axis=0), 0.0)
+    cov = (centred.T @ centred) / np.maximum(counts - 1, 1)
+    return (1 - shrinkage) * cov + shrinkage * np.diag(np.diag(cov))
+
+
+def compute_portfolio_risk(
+    positions: pd.DataFrame,
+    returns: pd.DataFrame,
+    capital: float,
+    shrinkage: float = 0.1,
+) -> PortfolioRisk:
+    """Covariance-based risk of the sized positions, in one pass of matrix algebra"""
+    weights = positions.groupby("symbol")["weight"].sum()
+    weights = weights[weights != 0]
+    symbols = [s for s in weights.index if s in returns.columns]
+    missing = sorted(set(weights.index) - set(symbols))
+    if missing:
+        logger.warning(
+            "No return history, excluded from risk", extra={"symbols": missing}
+        )
+
+    w = weights[symbols].to_numpy(dtype=float)
+    r = returns[symbols].to_numpy(dtype=float)
+    cov = _covariance(r, shrinkage)
+    vol = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(vol, vol)
+
+    marginal = cov @ w
+    variance = float(w @ marginal)
+    port_vol = np.sqrt(max(variance, 0.0))
+    horizon = int(_horizon_days(positions).max()) if len(positions) else 1
+
+    # Historical path of today's book, for a drawdown estimate
+    path = np.nan_to_num(r) @ w
+    equity = np.cumprod(1 + path)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if len(path) else np.zeros(1)
+
+    stop_loss = (positions["weight"].abs() * positions["stop_distance_pct"] / 100).sum()
+    standalone = np.abs(w) * vol
+    summary = {
+        "positions": int(len(w)),
+        "long_exposure_pct": float(w[w > 0].sum() * 100),
+        "short_exposure_pct": float(-w[w < 0].sum() * 100),
+        "gross_exposure_pct": float(np.abs(w).sum() * 100),
+        "net_exposure_pct": float(w.sum() * 100),
+        # Exposure once correlations are netted: sqrt(w' C w)
+        "correlation_adjusted_exposure_pct": float(
+            np.sqrt(max(w @ np.nan_to_num(corr) @ w, 0.0)) * 100
+        ),
+        "daily_volatility_pct": float(port_vol * 100),
+        "annual_volatility_pct": float(port_vol * np.sqrt(TRADING_DAYS_PER_YEAR) * 100),
+        "horizon_days": horizon,
+        "var_95_horizon": float(VAR_Z * port_vol * np.sqrt(horizon) * capital),
+        "diversification_ratio": (
+            float(standalone.sum() / port_vol) if port_vol > 0 else None
+        ),
+        "historical_max_drawdown_pct": float(drawdown.min() * 100),
+        "all_stops_hit_loss": float(stop_loss * capital),
+        "excluded_symbols": missing,
+    }
+
+    contributions = pd.Series(
+        w * marginal / variance if variance > 0 else np.zeros_like(w), index=symbols
+    )
+    positions = positions.assign(
+        daily_volatility_pct=positions["symbol"].map(
+            pd.Series(vol * 100, index=symbols)
+        ),
+        risk_contribution_pct=positions["symbol"].map(contributions * 100),
+    )
+    return PortfolioRisk(
+        positions=positions,
+        summary=summary,
+        correlation=pd.DataFrame(corr, index=symbols, columns=symbols),
+    )
+
+
+def portfolio_risk(
+    records: Iterable[Any] | pd.DataFrame,
+    store: Optional[PriceStore] = None,
+    capital: float = 1_000_000.0,
+    risk_per_trade: float = 0.01,
+    max_position: float = 0.10,
+    as_of: Optional[str | pd.Timestamp] = None,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+) -> PortfolioRisk:
+    """Size a run's BUY/SELL calls and measure the book's risk from the local price store"""
+    store = store or PriceStore()
+    as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+    recs = (
+        records
+        if isinstance(records, pd.DataFrame)
+        else recommendations_to_frame(records, as_of)
+    )
+    recs = recs[recs["action"].isin(["BUY", "SELL"])].reset_index(drop=True)
+    if recs.empty:
+        raise ValueError("No BUY or SELL recommendations to size")
+
+    close = store.load_panel(
+        recs["symbol"].unique(),
+        start=as_of - pd.Timedelta(days=lookback_days * 2),
+        end=as_of,
+        fields=["close"],
+    )["close"]
+    if close.empty:
+        raise ValueError("No local price history found for the recommended symbols")
+
+    returns = close.pct_change(fill_method=None).iloc[1:].tail(lookback_days)
+    recs["entry_price"] = recs["entry_price"].fillna(
+        recs["symbol"].map(close.ffill().iloc[-1])
+    )
+    sized = size_positions(
+        recs,
+        returns.std(),
+        capital,
+        risk_per_trade=risk_per_trade,
+        max_position=max_position,
+    )
+    risk = compute_portfolio_risk(sized, returns, capital)
+    logger.info(
+        "Portfolio risk computed",
+        extra={
+            "positions": risk.summary["positions"],
+            "annual_volatility_pct": round(risk.summary["annual_volatility_pct"], 2),
+        },
+    )
+    return risk
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portfolio risk of recommendations")
+    parser.add_argument(
+        "recommendations", help="CSV or JSON-lines recommendation records"
+    )
+    parser.add_argument("--capital", type=float, default=1_000_000.0)
+    parser.add_argument("--risk-per-trade", type=float, default=0.01)
+    parser.add_argument("--max-position", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.recommendations.endswith(".csv"):
+        records = pd.read_csv(args.recommendations).to_dict("records")
+    else:
+        records = pd.read_json(args.recommendations, lines=True).to_dict("records")
+
+    risk = portfolio_risk(
+        records,
+        capital=args.capital,
+        risk_per_trade=args.risk_per_trade,
+        max_position=args.max_position,
+    )
+    for key, value in risk.summary.items():
+        print(f"{key:<36} {value}")
+    print(risk.positions.to_string())
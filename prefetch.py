@@ -0,0 +1,260 @@
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+RECENT_PICKS_PATH = Path("data") / "recent_picks.json"
+
+# NIFTY 50 constituents: the liquid large-cap pool most finder picks come from
+NIFTY50_SYMBOLS = (
+    "ADANIENT",
+    "ADANIPORTS",
+    "APOLLOHOSP",
+    "ASIANPAINT",
+    "AXISBANK",
+    "BAJAJ-AUTO",
+    "BAJAJFINSV",
+    "BAJFINANCE",
+    "BEL",
+    "BHARTIARTL",
+    "CIPLA",
+    "COALINDIA",
+    "DRREDDY",
+    "EICHERMOT",
+    "ETERNAL",
+    "GRASIM",
+    "HCLTECH",
+    "HDFCBANK",
+    "HDFCLIFE",
+    "HEROMOTOCO",
+    "HINDALCO",
+    "HINDUNILVR",
+    "ICICIBANK",
+    "INDUSINDBK",
+    "INFY",
+    "ITC",
+    "JIOFIN",
+    "JSWSTEEL",
+    "KOTAKBANK",
+    "LT",
+    "M&M",
+    "MARUTI",
+    "NESTLEIND",
+    "NTPC",
+    "ONGC",
+    "POWERGRID",
+    "RELIANCE",
+    "SBILIFE",
+    "SBIN",
+    "SHRIRAMFIN",
+    "SUNPHARMA",
+    "TATACONSUM",
+    "TATAMOTORS",
+    "TATASTEEL",
+    "TCS",
+    "TECHM",
+    "TITAN",
+    "TRENT",
+    "ULTRACEMCO",
+    "WIPRO",
+)
+
+SYMBOL_PATTERN = re.compile(r"\b[A-Z][A-Z0-9&\-]{1,19}\b")
+SELECTED_SYMBOL_PATTERN = re.compile(r"Symbol:\s*\[?([A-Z][A-Z0-9&\-]{0,19})")
+
+QUOTE_URL = "https://www.nseindia.com/get-quotes/equity?symbol={symbol}"
+HISTORY_URL = "https://finance.yahoo.com/quote/{symbol}.NS/history/"
+
+
+def quote_url(symbol: str) -> str:
+    """NSE quote page URL; symbols like M&M must be escaped in the query string"""
+    return QUOTE_URL.format(symbol=quote(symbol, safe=""))
+
+
+def history_url(symbol: str) -> str:
+    return HISTORY_URL.format(symbol=quote(symbol, safe=""))
+
+
+NEWS_QUERY = "{symbol} NSE share news"
+
+
+@dataclass
+class PrefetchedData:
+    symbol: str
+    quote: Optional[str] = None
+    history: Optional[str] = None
+    news: Optional[str] = None
+
+
+def extract_selected_symbols(text: str) -> List[str]:
+    """Extract the symbols listed under SELECTED_STOCKS in the stock finder output"""
+    return list(dict.fromkeys(SELECTED_SYMBOL_PATTERN.findall(text or "")))
+
+
+def load_recent_picks(path: Path = RECENT_PICKS_PATH) -> List[str]:
+    """Load the most recent finder picks, newest first"""
+    try:
+        return list(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return []
+
+
+def save_recent_picks(
+    symbols: Iterable[str], path: Path = RECENT_PICKS_PATH, limit: int = 20
+) -> None:
+    """Prepend the latest picks to the recent picks file"""
+    picks = list(dict.fromkeys([*symbols, *load_recent_picks(path)]))[:limit]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(picks), encoding="utf-8")
+
+
+def format_prefetched_context(data: Dict[str, PrefetchedData]) -> str:
+    """Render prefetched market data as context for the downstream agents"""
+    sections = []
+    for symbol, item in data.items():
+        parts = [f"[{symbol}]"]
+        if item.quote:
+            parts.append(f"Quote page:\n{item.quote}")
+        if item.history:
+            parts.append(f"Price history:\n{item.history}")
+        if item.news:
+            parts.append(f"Recent news search:\n{item.news}")
+        sections.append("\n".join(parts))
+
+    return (
+        "PREFETCHED MARKET DATA (fetched at the start of this run).\n"
+        "Use it directly and only call tools for data that is missing below.\n\n"
+        + "\n\n".join(sections)
+    )
+
+
+class MarketDataPrefetcher:
+    """Speculatively fetch quotes, history and news for likely finder picks.
+
+    Fetching starts before the stock finder agent returns; once its picks are
+    known, results for those symbols are kept and everything else is cancelled.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[Any],
+        max_candidates: int = 12,
+        max_concurrency: int = 4,
+        max_chars: int = 4000,
+        recent_picks_path: Path = RECENT_PICKS_PATH,
+    ):
+        self.tools = {getattr(tool, "name", str(tool)): tool for tool in tools}
+        self.max_candidates = max_candidates
+        self.max_chars = max_chars
+        self.recent_picks_path = recent_picks_path
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Data kept for the finder's picks, once resolved
+        self.kept: Dict[str, PrefetchedData] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return "scrape_as_markdown" in self.tools or "search_engine" in self.tools
+
+    def candidates(
+        self, user_query: Optional[str] = None, resolved: Iterable[str] = ()
+    ) -> List[str]:
+        """Likely picks: query symbols first, then recent picks, then index constituents
+
+        ``resolved`` symbols (named in the query, per the symbol master) lead the list.
+        """
+        recent = load_recent_picks(self.recent_picks_path)
+        known = set(NIFTY50_SYMBOLS) | set(recent)
+        query_symbols = [
+            s for s in SYMBOL_PATTERN.findall(user_query or "") if s in known
+        ]
+        ordered = dict.fromkeys([*resolved, *query_symbols, *recent, *NIFTY50_SYMBOLS])
+        return list(ordered)[: self.max_candidates]
+
+    def start(self, symbols: Iterable[str]) -> None:
+        """Start background fetches for each candidate symbol"""
+        if not self.enabled:
+            logger.info("Prefetch disabled: no scrape/search tools available")
+            return
+
+        started = []
+        for symbol in symbols:
+            if symbol not in self._tasks:
+                self._tasks[symbol] = asyncio.create_task(self._fetch_symbol(symbol))
+                started.append(symbol)
+
+        if started:
+            logger.info("Prefetch started", extra={"candidates": started})
+
+    async def resolve(self, selected: Iterable[str]) -> Dict[str, PrefetchedData]:
+        """Keep the fetches for the selected symbols and discard the rest.
+
+        Selected symbols that were not speculated on are fetched now, in parallel.
+        """
+        selected = list(selected)
+        self.start(symbol for symbol in selected if symbol not in self._tasks)
+        selected = [symbol for symbol in selected if symbol in self._tasks]
+        discarded = [symbol for symbol in self._tasks if symbol not in selected]
+        for symbol in discarded:
+            self._tasks.pop(symbol).cancel()
+
+        results = await asyncio.gather(
+            *(self._tasks[symbol] for symbol in selected), return_exceptions=True
+        )
+        kept = self.kept = {
+            symbol: result
+            for symbol, result in zip(selected, results)
+            if isinstance(result, PrefetchedData)
+        }
+
+        logger.info(
+            "Prefetch resolved",
+            extra={"kept": list(kept), "discarded": len(discarded)},
+        )
+        return kept
+
+    def cancel(self) -> None:
+        """Cancel every outstanding fetch"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def record_picks(self, symbols: Iterable[str]) -> None:
+        """Save the picks for the next run's candidates (blocking file write)"""
+        save_recent_picks(symbols, self.recent_picks_path)
+
+    async def _fetch_symbol(self, symbol: str) -> PrefetchedData:
+        with span(f"prefetch:{symbol}", "prefetch"):
+            quote, history, news = await asyncio.gather(
+                self._call("scrape_as_markdown", url=quote_url(symbol)),
+                self._call("scrape_as_markdown", url=history_url(symbol)),
+                self._call("search_engine", query=NEWS_QUERY.format(symbol=symbol)),
+            )
+        return PrefetchedData(symbol=symbol, quote=quote, history=history, news=news)
+
+    async def _call(self, tool_name: str, **kwargs) -> Optional[str]:
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            return None
+
+        async with self._semaphore:
+            try:
+                with span(f"tool:{tool_name}", "tool"):
+                    output = await tool.ainvoke(kwargs)
+            except Exception:
+                logger.warning(
+                    "Prefetch call failed",
+                    extra={"tool": tool_name, "tool_args": kwargs},
+                    exc_info=True,
+                )
+                return None
+
+        return str(output)[: self.max_chars]
@@ -0,0 +1,120 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from fundamentals import FundamentalsStore, adjust_bars, adjust_panel
+
+logger = logging.getLogger(__name__)
+
+PRICE_STORE_PATH = Path("data") / "prices"
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+FILE_SUFFIX = ".parquet"
+
+
+class PriceStore:
+    """Local daily OHLCV history, one Parquet file per symbol.
+
+    Files hold prices as traded. With ``actions``, loads are adjusted for splits and
+    bonuses, so a split recorded later also rescales history loaded afterwards.
+    """
+
+    def __init__(
+        self,
+        root: Path = PRICE_STORE_PATH,
+        actions: Optional[FundamentalsStore] = None,
+    ):
+        self.root = Path(root)
+        self.actions = actions
+
+    def _path(self, symbol: str) -> Path:
+        # Quote symbols such as M&M or BAJAJ-AUTO into safe file names
+        return self.root / f"{quote(symbol, safe='-')}{FILE_SUFFIX}"
+
+    def symbols(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(unquote(p.stem) for p in self.root.glob(f"*{FILE_SUFFIX}"))
+
+    def write(self, symbol: str, frame: pd.DataFrame) -> None:
+        """Merge new daily bars into the stored history (newer rows win)"""
+        frame = _normalize(frame)
+        existing = self._read(symbol)
+        if not existing.empty:
+            frame = pd.concat([existing, frame])
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(symbol)
+        frame.to_parquet(path)
+        logger.info(
+            "Price history stored", extra={"symbol": symbol, "rows": len(frame)}
+        )
+
+    def adjustment_version(self) -> Optional[float]:
+        """Changes when a newly stored corporate action rescales loaded history"""
+        return None if self.actions is None else self.actions.version()
+
+    def load(
+        self,
+        symbol: str,
+        start: Optional[str | pd.Timestamp] = None,
+        end: Optional[str | pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        frame = self._read(symbol, start, end)
+        if self.actions is None or frame.empty:
+            return frame
+        factors = self.actions.adjustment_factors([symbol], frame.index)[symbol]
+        return adjust_bars(frame, factors)
+
+    def _read(
+        self,
+        symbol: str,
+        start: Optional[str | pd.Timestamp] = None,
+        end: Optional[str | pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        path = self._path(symbol)
+        if not path.exists():
+            return pd.DataFrame(
+                columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="date")
+            )
+
+        frame = pd.read_parquet(path)
+        return frame.loc[start:end]
+
+    def load_panel(
+        self,
+        symbols: Iterable[str],
+        start: Optional[str | pd.Timestamp] = None,
+        end: Optional[str | pd.Timestamp] = None,
+        fields: Iterable[str] = OHLCV_COLUMNS,
+    ) -> Dict[str, pd.DataFrame]:
+        """Load wide (date × symbol) frames per field, aligned on a common date index"""
+        frames = {symbol: self._read(symbol, start, end) for symbol in symbols}
+        frames = {symbol: frame for symbol, frame in frames.items() if not frame.empty}
+        if not frames:
+            return {field: pd.DataFrame() for field in fields}
+
+        stacked = pd.concat(frames, axis=1, names=["symbol", "field"])
+        panel = {
+            field: stacked.xs(field, axis=1, level="field").sort_index()
+            for field in fields
+        }
+        if self.actions is None:
+            return panel
+        # One factor matrix for every symbol and date in the panel
+        index = stacked.index.sort_values()
+        return adjust_panel(panel, self.actions.adjustment_factors(frames, index))
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.rename(columns=str.lower)
+    if "date" in frame.columns:
+        frame = frame.set_index("date")
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.index), name="date")
+    missing = [column for column in OHLCV_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Price history is missing columns: {', '.join(missing)}")
+    return frame[OHLCV_COLUMNS].astype(float).sort_index()
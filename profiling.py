@@ -0,0 +1,321 @@
+"""Debug-mode profiling of runs: async-aware spans, flamegraph output and cProfile.
+
+Nothing is measured unless a ``Profiler`` is active in the current context::
+
+    profiler = Profiler(cprofile=True)
+    with profiler.activate():
+        asyncio.run(system.analyze_stocks(query))
+    profiler.save(Path("data") / "profiles", "run")
+
+Spans nest per asyncio task, so concurrent agents and tool calls each get their own
+stack. ``<name>.folded`` holds one ``frame;frame;frame <microseconds>`` line per
+stack (self time), for flamegraph.pl, inferno or speedscope; ``<name>.prof`` is a
+pstats file for snakeviz.
+"""
+
+import cProfile
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path("data") / "profiles"
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    parent: Optional["Span"] = None
+    start: float = field(default_factory=time.perf_counter)
+    duration: Optional[float] = None
+    children_time: float = 0.0
+
+    @property
+    def stack(self) -> List[str]:
+        frames, span = [], self
+        while span is not None:
+            frames.append(span.name)
+            span = span.parent
+        return frames[::-1]
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+        if self.parent is not None:
+            self.parent.children_time += self.duration
+
+
+current_profiler: ContextVar[Optional["Profiler"]] = ContextVar(
+    "profiler", default=None
+)
+_current_span: ContextVar[Optional[Span]] = ContextVar("profile_span", default=None)
+
+
+class Profiler:
+    """Collects timed spans of one profiled run, optionally alongside cProfile.
+
+    Spans come from ``span``/``profiled`` and from ``callback()``, a LangChain
+    handler that times graph nodes, LLM calls and tool calls.
+    """
+
+    def __init__(self, cprofile: bool = False):
+        self.spans: List[Span] = []
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["Profiler"]:
+        """Profile everything run in this context (tasks started here inherit it)"""
+        token = current_profiler.set(self)
+        cprofile_on = False
+        if self.cprofile is not None:
+            try:
+                self.cprofile.enable()
+                cprofile_on = True
+            except ValueError:
+                # Another profiler (e.g. a debugger) already owns the hook
+                logger.warning("cProfile unavailable, recording spans only")
+        try:
+            yield self
+        finally:
+            if cprofile_on:
+                self.cprofile.disable()
+            current_profiler.reset(token)
+
+    def open(self, name: str, category: str, parent: Optional[Span] = None) -> Span:
+        return Span(name, category, parent=parent)
+
+    def close(self, span: Span) -> None:
+        span.finish()
+        with self._lock:
+            self.spans.append(span)
+
+    def callback(self) -> "ProfilingCallbackHandler":
+        return ProfilingCallbackHandler(self)
+
+    def top(self, n: int = 20) -> List[Dict[str, Any]]:
+        """The ``n`` slowest operations"""
+        slowest = sorted(self.spans, key=lambda span: span.duration, reverse=True)
+        return [
+            {
+                "operation": span.name,
+                "category": span.category,
+                "seconds": round(span.duration, 4),
+                "self_seconds": round(max(span.duration - span.children_time, 0), 4),
+                "stack": ";".join(span.stack[:-1]),
+            }
+            for span in slowest[:n]
+        ]
+
+    def folded(self) -> str:
+        """Self time per stack in microseconds, in the folded-stacks flamegraph format"""
+        totals: Dict[str, float] = defaultdict(float)
+        for span in self.spans:
+            # Concurrent children can add up to more than their parent's wall time
+            totals[";".join(span.stack)] += max(span.duration - span.children_time, 0)
+        return "".join(
+            f"{stack} {round(seconds * 1e6)}\n"
+            for stack, seconds in sorted(totals.items())
+            if seconds > 0
+        )
+
+    def save(self, directory: Path, name: str, top_n: int = 20) -> Dict[str, Any]:
+        """Write ``<name>.folded`` (and ``<name>.prof`` with cProfile); return a summary"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        folded_path = directory / f"{name}.folded"
+        folded_path.write_text(self.folded(), encoding="utf-8")
+        pstats_path = None
+        if self.cprofile is not None:
+            pstats_path = directory / f"{name}.prof"
+            self.cprofile.dump_stats(pstats_path)
+        logger.info(
+            "Profile saved",
+            extra={"folded": str(folded_path), "spans": len(self.spans)},
+        )
+        return {
+            "folded_path": str(folded_path),
+            "pstats_path": str(pstats_path) if pstats_path else None,
+            "top": self.top(top_n),
+        }
+
+
+@contextmanager
+def span(name: str, category: str = "code") -> Iterator[None]:
+    """Time the enclosed block under the current span; free when not profiling"""
+    profiler = current_profiler.get()
+    if profiler is None:
+        yield
+        return
+    current = profiler.open(name, category, _current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        profiler.close(current)
+
+
+def profiled(name: Optional[str] = None, category: str = "code") -> Callable:
+    """Decorator form of ``span`` for sync and async functions"""
+
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(label, category):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(label, category):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class ProfilingCallbackHandler(BaseCallbackHandler):
+    """Spans for LangGraph nodes, chat model calls and tool calls of a graph run.
+
+    Other runnables are not timed; their children attach to the nearest timed
+    ancestor. The root graph run attaches to the span active when it started.
+    Nested runs with the same name as their parent are folded into it.
+    """
+
+    run_inline = True
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+        # run id -> the span its children attach to
+        self._parents: Dict[UUID, Optional[Span]] = {}
+        self._open: Dict[UUID, Span] = {}
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        name: Optional[str],
+        category: str,
+    ) -> None:
+        ambient = _current_span.get()
+        parent = ambient if parent_run_id is None else self._parents.get(parent_run_id)
+        # A subgraph run inside its own node, or a tool wrapping a tool of the same
+        # name (also one already timed by ``span``), is the same operation
+        same = next(
+            (
+                s
+                for s in (parent, ambient)
+                if s is not None and s.name == name and s.duration is None
+            ),
+            None,
+        )
+        if name is None or same is not None:
+            self._parents[run_id] = same or parent
+            return
+        current = self.profiler.open(name, category, parent)
+        self._parents[run_id] = current
+        self._open[run_id] = current
+
+    def _end(self, run_id: UUID) -> None:
+        self._parents.pop(run_id, None)
+        current = self._open.pop(run_id, None)
+        if current is not None:
+            self.profiler.close(current)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        run_name = kwargs.get("name") or (serialized or {}).get("name")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            name = f"graph:{run_name}"
+        elif node is not None and node == run_name:
+            name = f"node:{node}"
+        else:
+            name = None
+        self._start(run_id, parent_run_id, name, "graph")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "chat_model"
+        self._start(run_id, parent_run_id, f"llm:{model}", "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool:{name}", "tool")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+
+def format_top(rows: List[Dict[str, Any]]) -> str:
+    """Plain-text table of ``Profiler.top`` rows for the CLI"""
+    lines = [f"{'seconds':>9} {'self':>9}  {'category':<8} operation"]
+    for row in rows:
+        lines.append(
+            f"{row['seconds']:>9.3f} {row['self_seconds']:>9.3f}  "
+            f"{row['category']:<8} {row['operation']}  [{row['stack']}]"
+        )
+    return "\n".join(lines)
@@ -1,3 +1,13 @@
+import hashlib
+import re
+import textwrap
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+from langchain_core.messages import SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+
 def get_stock_finder_prompt():
     return """
         You are an expert NSE (National Stock Exchange) stock research analyst with deep knowledge of the Indian equity market.
@@ -238,3 +248,157 @@ def get_supervisor_prompt():
             
         Complete the entire workflow without asking for user confirmation between steps.
         """
+
+
+def get_pipeline_step_prompt(agent_name):
+    steps = {
+        "stock_finder_agent": """
+            Identify 2-3 promising NSE stocks for short-term trading based on the request above.
+            """,
+        "market_data_agent": """
+            Gather detailed market data and technical analysis for the stocks selected above.
+            Maintain the same NSE stock symbols.
+            """,
+        "news_analyst_agent": """
+            Analyze recent news and sentiment for each of the stocks selected above.
+            Maintain the same NSE stock symbols.
+            """,
+        "recommendation_agent": """
+            Synthesize the market data and news analysis above into actionable BUY/SELL/HOLD recommendations.
+            Ensure recommendations are actionable for the next trading day.
+            """,
+    }
+    return steps[agent_name]
+
+
+NO_TOOLS_RULES = """
+    ---
+    ⚠️ CRITICAL: NO EXTERNAL TOOLS AVAILABLE
+    You MUST answer using ONLY your internal knowledge.
+    DO NOT attempt to call ANY tools or functions.
+    DO NOT use <function=...> syntax or tool_calls.
+    Provide direct answers based on your training data.
+    """
+
+TOOL_RULES = """
+    ---
+    🔧 AVAILABLE TOOLS (STRICTLY LIMITED)
+    {tool_list}
+
+    ⚠️ CRITICAL TOOL USAGE RULES:
+    1. Use ONLY the exact tool names listed above
+    2. DO NOT invent, guess, or modify tool names
+    3. DO NOT use tools that are not in the list
+    4. If you need a capability not listed, answer directly WITHOUT tool calls
+    5. NEVER use <function=...> syntax for unlisted tools
+    6. When in doubt, provide direct answers instead of attempting tool calls
+
+    If you attempt to call a non-existent tool, your response will FAIL.
+    """
+
+
+def minify_prompt(template: str) -> str:
+    """Dedent, strip trailing whitespace and collapse runs of blank lines.
+
+    Relative indentation (e.g. inside OUTPUT FORMAT blocks) is kept.
+    """
+    lines = [line.rstrip() for line in textwrap.dedent(template).splitlines()]
+    text = "\n".join(lines).strip("\n")
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def count_prompt_tokens(text: str) -> int:
+    """Approximate token count of ``text`` sent as a system message"""
+    return count_tokens_approximately([SystemMessage(content=text)])
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    name: str
+    text: str
+    # Content hash; changes whenever the text sent to the model changes
+    version: str
+    tokens: int
+    raw_tokens: int
+
+
+class PromptRegistry:
+    """Prompts compiled once: minified, versioned by content hash and token counted"""
+
+    def __init__(self):
+        self._prompts: Dict[str, CompiledPrompt] = {}
+        self._with_tools: Dict[Tuple[str, Tuple[str, ...]], CompiledPrompt] = {}
+
+    def register(self, name: str, template: str) -> CompiledPrompt:
+        text = minify_prompt(template)
+        prompt = CompiledPrompt(
+            name=name,
+            text=text,
+            version=hashlib.sha256(text.encode()).hexdigest()[:12],
+            tokens=count_prompt_tokens(text),
+            raw_tokens=count_prompt_tokens(template),
+        )
+        self._prompts[name] = prompt
+        return prompt
+
+    def get(self, name: str) -> CompiledPrompt:
+        return self._prompts[name]
+
+    def with_tools(self, name: str, tool_names: Iterable[str]) -> CompiledPrompt:
+        """``name`` followed by the tool usage rules for ``tool_names``, built once per tool set"""
+        tool_names = tuple(sorted(set(tool_names)))
+        key = (name, tool_names)
+        if key not in self._with_tools:
+            base = self.get(name)
+            if tool_names:
+                tool_list = "\n".join(
+                    f"{i + 1}. {tool}" for i, tool in enumerate(tool_names)
+                )
+                rules = minify_prompt(TOOL_RULES).format(tool_list=tool_list)
+            else:
+                rules = minify_prompt(NO_TOOLS_RULES)
+            text = base.text + "\n\n" + rules
+            self._with_tools[key] = CompiledPrompt(
+                name=name,
+                text=text,
+                version=hashlib.sha256(text.encode()).hexdigest()[:12],
+                tokens=count_prompt_tokens(text),
+                raw_tokens=base.raw_tokens + count_prompt_tokens(rules),
+            )
+        return self._with_tools[key]
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Name, version and token counts (before and after minifying) per prompt"""
+        return [
+            {
+                "name": p.name,
+                "version": p.version,
+                "tokens": p.tokens,
+                "raw_tokens": p.raw_tokens,
+            }
+            for p in self._prompts.values()
+        ]
+
+
+PROMPTS = PromptRegistry()
+PROMPTS.register("supervisor", get_supervisor_prompt())
+PROMPTS.register("stock_finder_agent", get_stock_finder_prompt())
+PROMPTS.register("market_data_agent", get_market_data_prompt())
+PROMPTS.register("news_analyst_agent", get_news_analyst_prompt())
+PROMPTS.register("recommendation_agent", get_recommendation_prompt())
+for _agent in (
+    "stock_finder_agent",
+    "market_data_agent",
+    "news_analyst_agent",
+    "recommendation_agent",
+):
+    PROMPTS.register(f"{_agent}_step", get_pipeline_step_prompt(_agent))
+
+
+if __name__ == "__main__":
+    print(f"{'prompt':<26} {'version':<13} {'tokens':>7} {'raw':>7}")
+    for row in PROMPTS.report():
+        print(
+            f"{row['name']:<26} {row['version']:<13} "
+            f"{row['tokens']:>7} {row['raw_tokens']:>7}"
+        )
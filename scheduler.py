@@ -0,0 +1,285 @@
+"""End-of-day batch runner that keeps one warm StockResearchSystem between runs.
+
+    python scheduler.py                 # daemon: run the watchlist at SCHEDULE_TIMES
+    python scheduler.py --once          # run one batch now and exit
+    python scheduler.py --next 5        # print the next scheduled runs
+
+Runs are skipped on weekends and on the exchange holidays listed in
+HOLIDAY_CALENDAR_PATH: one ``YYYY-MM-DD[,description]`` per line, ``#`` comments.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from datetime import time as dt_time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from archive import RunArchive
+from fundamentals import get_fundamentals_store
+from main import StockResearchSystem
+from metrics import METRICS, SCHEDULER_QUEUED, start_metrics_server
+from sector_index import get_sector_index
+from settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+BATCH_QUERY = (
+    "End-of-day analysis of these NSE stocks after today's close: {symbols}. "
+    "Provide trading recommendations for the next trading session."
+)
+
+
+class HolidayCalendar:
+    """Trading days: weekdays that are not listed exchange holidays"""
+
+    def __init__(self, holidays: FrozenSet[date] = frozenset()):
+        self.holidays = holidays
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "HolidayCalendar":
+        path = Path(path)
+        if not path.exists():
+            logger.warning(
+                "Holiday calendar not found, skipping weekends only",
+                extra={"path": str(path)},
+            )
+            return cls()
+
+        holidays = set()
+        for number, line in enumerate(path.read_text(encoding="utf-8").splitlines()):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                holidays.add(date.fromisoformat(line.split(",", 1)[0].strip()))
+            except ValueError:
+                raise ValueError(
+                    f"{path}:{number + 1}: expected YYYY-MM-DD, got {line!r}"
+                ) from None
+        logger.info(
+            "Holiday calendar loaded",
+            extra={"path": str(path), "holidays": len(holidays)},
+        )
+        return cls(frozenset(holidays))
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+
+def next_run_time(
+    now: datetime, times: Sequence[dt_time], calendar: HolidayCalendar
+) -> datetime:
+    """First scheduled time after ``now`` (timezone-aware) on a trading day"""
+    day = now.date()
+    for _ in range(366):
+        if calendar.is_trading_day(day):
+            for at in sorted(times):
+                candidate = datetime.combine(day, at, tzinfo=now.tzinfo)
+                if candidate > now:
+                    return candidate
+        day += timedelta(days=1)
+    raise ValueError("No trading day within a year; check the holiday calendar")
+
+
+def chunk_symbols(symbols: Sequence[str], size: int) -> List[List[str]]:
+    return [list(symbols[i : i + size]) for i in range(0, len(symbols), size)]
+
+
+@dataclass
+class SchedulerMetrics:
+    started_at: str = field(
+        default_factory=lambda: datetime.now().astimezone().isoformat()
+    )
+    warmup_seconds: Optional[float] = None
+    batches: int = 0
+    runs_completed: int = 0
+    runs_failed: int = 0
+    last_batch_at: Optional[str] = None
+    last_batch_seconds: Optional[float] = None
+    next_batch_at: Optional[str] = None
+    # Durations of the runs in the last batch
+    run_seconds: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = asdict(self)
+        durations = summary.pop("run_seconds")
+        summary["last_batch_runs"] = len(durations)
+        summary["run_seconds_p50"] = statistics.median(durations) if durations else None
+        summary["run_seconds_max"] = max(durations) if durations else None
+        return summary
+
+
+class EndOfDayScheduler:
+    """Run the watchlist through one shared, already initialized system on schedule.
+
+    The watchlist is split into chunks of ``scheduler_symbols_per_run`` symbols; up
+    to ``scheduler_workers`` chunks run concurrently and every result is archived.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        system: Optional[StockResearchSystem] = None,
+        calendar: Optional[HolidayCalendar] = None,
+    ):
+        self.settings = settings or get_settings()
+        s = self.settings
+        self.system = system or StockResearchSystem(
+            settings=s, archive=RunArchive(s.archive_path)
+        )
+        self.calendar = calendar or HolidayCalendar.from_file(s.holiday_calendar_path)
+        self.timezone = ZoneInfo(s.market_timezone)
+        self.times = [dt_time.fromisoformat(value) for value in s.schedule_times]
+        self.metrics = SchedulerMetrics()
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def now(self) -> datetime:
+        return datetime.now(self.timezone)
+
+    async def warm_up(self) -> None:
+        """Start the MCP session and build the models and agents before the first batch"""
+        started = time.perf_counter()
+        await self.system.initialize()
+        self.metrics.warmup_seconds = time.perf_counter() - started
+        logger.info(
+            "Scheduler warmed up",
+            extra={"warmup_seconds": round(self.metrics.warmup_seconds, 3)},
+        )
+
+    async def run_batch(self) -> List[Dict[str, Any]]:
+        """Analyze the whole watchlist once; failed chunks are logged and counted"""
+        s = self.settings
+        chunks = chunk_symbols(s.watchlist, s.scheduler_symbols_per_run) or [[]]
+        workers = asyncio.Semaphore(s.scheduler_workers)
+        run_seconds: List[float] = []
+
+        async def run_chunk(symbols: List[str]) -> Optional[Dict[str, Any]]:
+            query = BATCH_QUERY.format(symbols=", ".join(symbols)) if symbols else None
+            with SCHEDULER_QUEUED.track():
+                await workers.acquire()
+            try:
+                started = time.perf_counter()
+                try:
+                    results = await self.system.analyze_stocks(
+                        query, mode=s.orchestration_mode
+                    )
+                except Exception:
+                    self.metrics.runs_failed += 1
+                    logger.exception("Scheduled run failed", extra={"symbols": symbols})
+                    return None
+                finally:
+                    run_seconds.append(time.perf_counter() - started)
+            finally:
+                workers.release()
+            self.metrics.runs_completed += 1
+            return results
+
+        started_at = self.now()
+        started = time.perf_counter()
+        # Pick up today's corporate actions and closes before the agents query them
+        try:
+            await asyncio.to_thread(
+                get_fundamentals_store(s.fundamentals_path).ingest_directory,
+                s.fundamentals_inbox,
+            )
+        except Exception:
+            logger.exception("Fundamentals ingest failed; using stored data")
+        try:
+            await asyncio.to_thread(
+                get_sector_index(
+                    s.price_store_path, s.sector_map_path, s.price_adjustment_path
+                ).refresh
+            )
+        except Exception:
+            logger.exception("Sector index refresh failed; using the previous index")
+        logger.info(
+            "Scheduled batch started",
+            extra={"chunks": len(chunks), "workers": s.scheduler_workers},
+        )
+        outcomes = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+        self.metrics.batches += 1
+        self.metrics.last_batch_at = started_at.isoformat()
+        self.metrics.last_batch_seconds = time.perf_counter() - started
+        self.metrics.run_seconds = run_seconds
+        self.save_metrics()
+        logger.info(
+            "Scheduled batch completed ✅",
+            extra={
+                "duration_seconds": round(self.metrics.last_batch_seconds, 3),
+                "completed": sum(1 for r in outcomes if r is not None),
+                "failed": sum(1 for r in outcomes if r is None),
+            },
+        )
+        return [r for r in outcomes if r is not None]
+
+    def save_metrics(self) -> None:
+        path = self.settings.scheduler_metrics_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.metrics.summary(), indent=2))
+
+    async def run_forever(self) -> None:
+        """Sleep until each scheduled time, run a batch, repeat until ``stop()``"""
+        await self.warm_up()
+        while not self._stop.is_set():
+            due = next_run_time(self.now(), self.times, self.calendar)
+            self.metrics.next_batch_at = due.isoformat()
+            self.save_metrics()
+            logger.info("Next scheduled batch", extra={"at": due.isoformat()})
+            try:
+                delay = (due - self.now()).total_seconds()
+                await asyncio.wait_for(self._stop.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                await self.run_batch()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    scheduler = EndOfDayScheduler()
+    if args.next:
+        now = scheduler.now()
+        for _ in range(args.next):
+            now = next_run_time(now, scheduler.times, scheduler.calendar)
+            print(now.isoformat())
+        return
+
+    if scheduler.settings.metrics_port:
+        start_metrics_server(
+            scheduler.settings.metrics_host, scheduler.settings.metrics_port
+        )
+        METRICS.add_readiness_check("research_system", lambda: scheduler.system.ready)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    try:
+        if args.once:
+            await scheduler.warm_up()
+            await scheduler.run_batch()
+        else:
+            await scheduler.run_forever()
+    finally:
+        await scheduler.system.close()
+        logger.info("Scheduler stopped", extra=scheduler.metrics.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="Run one batch now")
+    parser.add_argument(
+        "--next", type=int, default=0, metavar="N", help="Print the next N run times"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(_main(args))
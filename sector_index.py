@@ -0,0 +1,380 @@
+import argparse
+import asyncio
+import csv
+import difflib
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.tools import BaseTool, StructuredTool
+
+from fundamentals import get_fundamentals_store
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+SECTOR_MAP_PATH = Path("data") / "sector_map.csv"
+
+# Trading-day windows for returns; the 20-day window drives relative strength
+RETURN_WINDOWS = (1, 5, 20, 60)
+RS_WINDOW = 20
+CORRELATION_WINDOW = 60
+TOP_PEERS = 3
+# Long-lived UI and API processes pick up newly stored days this often
+REFRESH_SECONDS = 300.0
+SUGGESTIONS = 3
+
+# NSE industry classification of the NIFTY 50; extend or override with SECTOR_MAP_PATH
+NIFTY50_SECTORS = {
+    "ADANIENT": "Metals & Mining",
+    "ADANIPORTS": "Services",
+    "APOLLOHOSP": "Healthcare",
+    "ASIANPAINT": "Consumer Durables",
+    "AXISBANK": "Financial Services",
+    "BAJAJ-AUTO": "Automobile",
+    "BAJAJFINSV": "Financial Services",
+    "BAJFINANCE": "Financial Services",
+    "BEL": "Capital Goods",
+    "BHARTIARTL": "Telecommunication",
+    "CIPLA": "Healthcare",
+    "COALINDIA": "Oil Gas & Consumable Fuels",
+    "DRREDDY": "Healthcare",
+    "EICHERMOT": "Automobile",
+    "ETERNAL": "Consumer Services",
+    "GRASIM": "Construction Materials",
+    "HCLTECH": "Information Technology",
+    "HDFCBANK": "Financial Services",
+    "HDFCLIFE": "Financial Services",
+    "HEROMOTOCO": "Automobile",
+    "HINDALCO": "Metals & Mining",
+    "HINDUNILVR": "FMCG",
+    "ICICIBANK": "Financial Services",
+    "INDUSINDBK": "Financial Services",
+    "INFY": "Information Technology",
+    "ITC": "FMCG",
+    "JIOFIN": "Financial Services",
+    "JSWSTEEL": "Metals & Mining",
+    "KOTAKBANK": "Financial Services",
+    "LT": "Construction",
+    "M&M": "Automobile",
+    "MARUTI": "Automobile",
+    "NESTLEIND": "FMCG",
+    "NTPC": "Power",
+    "ONGC": "Oil Gas & Consumable Fuels",
+    "POWERGRID": "Power",
+    "RELIANCE": "Oil Gas & Consumable Fuels",
+    "SBILIFE": "Financial Services",
+    "SBIN": "Financial Services",
+    "SHRIRAMFIN": "Financial Services",
+    "SUNPHARMA": "Healthcare",
+    "TATACONSUM": "FMCG",
+    "TATAMOTORS": "Automobile",
+    "TATASTEEL": "Metals & Mining",
+    "TCS": "Information Technology",
+    "TECHM": "Information Technology",
+    "TITAN": "Consumer Durables",
+    "TRENT": "Consumer Services",
+    "ULTRACEMCO": "Construction Materials",
+    "WIPRO": "Information Technology",
+}
+
+
+def load_sector_map(path: Path = SECTOR_MAP_PATH) -> Dict[str, str]:
+    """Built-in NIFTY 50 sectors, updated from a ``symbol,sector`` CSV if present"""
+    sectors = dict(NIFTY50_SECTORS)
+    path = Path(path)
+    if path.exists():
+        with path.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get("symbol") or "").strip().upper()
+                sector = (row.get("sector") or "").strip()
+                if symbol and sector:
+                    sectors[symbol] = sector
+    return sectors
+
+
+def _pct(value: Any) -> Optional[float]:
+    return None if value is None or pd.isna(value) else round(float(value) * 100, 2)
+
+
+def _rating(percentile: Any) -> Optional[int]:
+    return None if pd.isna(percentile) else int(np.ceil(percentile * 99))
+
+
+class SectorIndex:
+    """Sector returns, relative-strength ranks and peer correlations from the price store.
+
+    Everything is computed in one vectorized pass over the last ``lookback`` closes and
+    kept as plain dicts, so ``lookup`` is a dictionary read. ``refresh`` appends only
+    the days stored since ``as_of`` and recomputes over the same bounded window.
+    """
+
+    def __init__(self, store: PriceStore, sectors: Dict[str, str]):
+        self.store = store
+        self.sectors = sectors
+        self.lookback = max(*RETURN_WINDOWS, CORRELATION_WINDOW) + 1
+        self.as_of: Optional[pd.Timestamp] = None
+        self.symbols: Dict[str, Dict[str, Any]] = {}
+        self.sector_stats: Dict[str, Dict[str, Any]] = {}
+        self.correlations: Dict[str, pd.DataFrame] = {}
+        self._close = pd.DataFrame()
+        self._adjustment_version = store.adjustment_version()
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+
+    @property
+    def empty(self) -> bool:
+        return not self.symbols
+
+    def _tracked_symbols(self) -> List[str]:
+        return [s for s in self.store.symbols() if s in self.sectors]
+
+    def build(self) -> "SectorIndex":
+        """Load the last ``lookback`` days of every stored symbol with a known sector"""
+        close = self.store.load_panel(self._tracked_symbols(), fields=["close"])[
+            "close"
+        ]
+        window = close.tail(self.lookback)
+        with self._lock:
+            self._compute(window)
+            self._close = window
+        return self
+
+    def refresh(self) -> bool:
+        """Add the days stored since the last build; returns whether anything changed"""
+        version = self.store.adjustment_version()
+        if (
+            self.as_of is None
+            or set(self._tracked_symbols()) != set(self._close)
+            # A new split or bonus rescales the closes already in the window
+            or version != self._adjustment_version
+        ):
+            self.build()
+            self._adjustment_version = version
+            return True
+
+        start = self.as_of + pd.Timedelta(days=1)
+        new = self.store.load_panel(self._close.columns, start=start, fields=["close"])
+        new = new["close"]
+        if new.empty:
+            return False
+        window = pd.concat([self._close, new]).tail(self.lookback)
+        with self._lock:
+            self._compute(window)
+            self._close = window
+        logger.info("Sector index refreshed", extra={"new_days": len(new)})
+        return True
+
+    def refresh_if_stale(self, max_age: float = REFRESH_SECONDS) -> bool:
+        """``refresh`` at most once per ``max_age`` seconds; a failure keeps the index"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < max_age:
+                return False
+            self._checked_at = now
+        try:
+            return self.refresh()
+        except Exception:
+            logger.exception("Sector index refresh failed; using the previous index")
+            return False
+
+    def _compute(self, window: pd.DataFrame) -> None:
+        # State is only replaced once everything is computed, so a failure keeps the
+        # previous index and window
+        close = window.sort_index().ffill()
+        if close.empty or len(close) < 2:
+            self.symbols, self.sector_stats, self.correlations = {}, {}, {}
+            return
+
+        returns = close.pct_change().iloc[1:]
+        sector_of = pd.Series({s: self.sectors[s] for s in close.columns})
+        # One-hot symbol × sector matrix: sector daily returns are member means
+        membership = pd.get_dummies(sector_of).astype(float)
+        valid = returns.notna().astype(float)
+        member_counts = valid.to_numpy() @ membership.to_numpy()
+        sector_returns = pd.DataFrame(
+            (returns.fillna(0).to_numpy() @ membership.to_numpy())
+            / np.where(member_counts > 0, member_counts, np.nan),
+            index=returns.index,
+            columns=membership.columns,
+        )
+
+        window_returns = {}
+        sector_window_returns = {}
+        for window in RETURN_WINDOWS:
+            if len(close) > window:
+                window_returns[window] = close.iloc[-1] / close.iloc[-1 - window] - 1
+                sector_window_returns[window] = (
+                    1 + sector_returns.iloc[-window:]
+                ).prod() - 1
+        rs_window = RS_WINDOW if RS_WINDOW in window_returns else max(window_returns)
+        own = window_returns[rs_window]
+        relative = own - sector_window_returns[rs_window].reindex(sector_of).to_numpy()
+        market_rank = own.rank(pct=True)
+        sector_rank = relative.groupby(sector_of).rank(pct=True)
+
+        recent = returns.tail(CORRELATION_WINDOW)
+        correlations = {
+            sector: recent[members].corr()
+            for sector, members in sector_of.groupby(sector_of).groups.items()
+        }
+
+        sector_stats = {
+            sector: {
+                "sector": sector,
+                "members": int(membership[sector].sum()),
+                **{
+                    f"return_{w}d_pct": _pct(r[sector])
+                    for w, r in sector_window_returns.items()
+                },
+            }
+            for sector in membership.columns
+        }
+        leaders = sector_window_returns[rs_window].rank(ascending=False)
+        for sector, stats in sector_stats.items():
+            stats["rank"] = int(leaders[sector])
+            stats["of"] = len(sector_stats)
+
+        symbols = {}
+        for symbol in close.columns:
+            sector = sector_of[symbol]
+            peers = correlations[sector][symbol].drop(symbol).dropna()
+            symbols[symbol] = {
+                "symbol": symbol,
+                "sector": sector,
+                "close": round(float(close[symbol].iloc[-1]), 2),
+                **{
+                    f"return_{w}d_pct": _pct(r[symbol])
+                    for w, r in window_returns.items()
+                },
+                f"relative_to_sector_{rs_window}d_pct": _pct(relative[symbol]),
+                # 1-99, like exchange RS ratings
+                "rs_rating_market": _rating(market_rank[symbol]),
+                "rs_rating_sector": _rating(sector_rank[symbol]),
+                "top_peers": [
+                    {"symbol": peer, "correlation": round(float(value), 2)}
+                    for peer, value in peers.nlargest(TOP_PEERS).items()
+                ],
+            }
+
+        self.as_of = close.index[-1]
+        self.symbols = symbols
+        self.sector_stats = sector_stats
+        self.correlations = correlations
+        logger.info(
+            "Sector index computed",
+            extra={
+                "as_of": str(self.as_of.date()),
+                "symbols": len(symbols),
+                "sectors": len(sector_stats),
+            },
+        )
+
+    def lookup(self, symbol: str) -> Optional[Dict[str, Any]]:
+        stats = self.symbols.get(symbol.strip().upper())
+        if stats is None:
+            return None
+        return {**stats, "sector_stats": self.sector_stats[stats["sector"]]}
+
+    def closest(self, symbol: str, limit: int = SUGGESTIONS) -> List[str]:
+        """Indexed symbols spelled most like ``symbol``"""
+        return difflib.get_close_matches(
+            symbol.strip().upper(), list(self.symbols), n=limit, cutoff=0.5
+        )
+
+    def leaderboard(self) -> List[Dict[str, Any]]:
+        return sorted(self.sector_stats.values(), key=lambda stats: stats["rank"])
+
+    def peer_correlations(self, sector: str) -> pd.DataFrame:
+        return self.correlations.get(sector, pd.DataFrame())
+
+
+@lru_cache(maxsize=None)
+def get_sector_index(
+    store_path: Path,
+    sector_map_path: Path = SECTOR_MAP_PATH,
+    fundamentals_path: Optional[Path] = None,
+) -> SectorIndex:
+    """Process-wide index per price store, built on first use.
+
+    The scheduler refreshes it after each ingest; the sector tool refreshes it on a
+    ``REFRESH_SECONDS`` TTL so other processes see new days too.
+
+    With ``fundamentals_path`` closes are adjusted for splits and bonuses.
+    """
+    actions = get_fundamentals_store(fundamentals_path) if fundamentals_path else None
+    store = PriceStore(store_path, actions)
+    return SectorIndex(store, load_sector_map(sector_map_path)).build()
+
+
+def make_sector_tool(index: SectorIndex) -> BaseTool:
+    """LangChain tool answering sector and peer questions from the precomputed index"""
+
+    def sector_analytics(symbol: str = "") -> str:
+        index.refresh_if_stale()
+        return _answer(symbol)
+
+    def _answer(symbol: str) -> str:
+        if not symbol.strip():
+            payload: Any = {
+                "as_of": str(index.as_of.date()),
+                "sectors": index.leaderboard(),
+            }
+        else:
+            payload = index.lookup(symbol)
+            if payload is None:
+                closest = index.closest(symbol)
+                hint = f" Did you mean: {', '.join(closest)}?" if closest else ""
+                return f"No sector data for {symbol}.{hint}"
+            payload["as_of"] = str(index.as_of.date())
+        return json.dumps(payload)
+
+    async def asector_analytics(symbol: str = "") -> str:
+        await asyncio.to_thread(index.refresh_if_stale)
+        return _answer(symbol)
+
+    return StructuredTool.from_function(
+        func=sector_analytics,
+        coroutine=asector_analytics,
+        name="sector_analytics",
+        description=(
+            "Local sector analytics for NSE stocks (no web access needed). With an NSE "
+            "symbol: its sector, 1/5/20/60-day returns vs. its sector, relative-strength "
+            "ratings (1-99) within the sector and the market, and its most correlated "
+            "peers. Without a symbol: all sectors ranked by 20-day return."
+        ),
+    )
+
+
+def sector_tools(
+    store_path: Path,
+    sector_map_path: Path = SECTOR_MAP_PATH,
+    fundamentals_path: Optional[Path] = None,
+) -> List[BaseTool]:
+    """The sector tool, or none when the price store has no data for known sectors"""
+    index = get_sector_index(store_path, sector_map_path, fundamentals_path)
+    return [] if index.empty else [make_sector_tool(index)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sector index and query it")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--store", default=str(Path("data") / "prices"))
+    parser.add_argument("--sector-map", default=str(SECTOR_MAP_PATH))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = get_sector_index(Path(args.store), Path(args.sector_map))
+    print(f"built in {time.perf_counter() - started:.3f}s, as of {index.as_of}")
+    for row in index.leaderboard():
+        print(row)
+    for symbol in args.symbols:
+        started = time.perf_counter()
+        result = index.lookup(symbol)
+        print(f"{symbol} ({(time.perf_counter() - started) * 1e6:.1f}µs): {result}")
@@ -0,0 +1,251 @@
+import dataclasses
+import os
+import typing
+from dataclasses import dataclass, field
+from datetime import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from dotenv import dotenv_values
+
+AGENT_TIER_SUFFIX = "_MODEL_TIER"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """All runtime configuration, loaded once and passed through the system.
+
+    Frozen and hashable, so a ``Settings`` instance can be used as a cache key.
+    Each field is read from the environment variable of the same name in upper case.
+    """
+
+    # Credentials
+    groq_api_key: str = field(default="", repr=False)
+    bright_data_api_token: str = field(default="", repr=False)
+    web_unlocker_zone: str = "unblocker"
+    browser_zone: str = "scraping_browser"
+
+    # Models
+    model_name: str = "llama-3.3-70b-versatile"
+    fast_model_name: str = "llama-3.1-8b-instant"
+    model_routing: str = "tiered"
+    # ((agent, "tier" or "tool-call tier,synthesis tier"), ...) from <AGENT>_MODEL_TIER
+    agent_model_tiers: Tuple[Tuple[str, str], ...] = ()
+    model_temperature: float = 0.1
+    model_max_tokens: int = 1000
+    model_timeout: float = 60.0
+    orchestration_mode: str = "supervisor"
+
+    # Token budgets
+    max_tokens_per_run: Optional[int] = None
+    max_tokens_per_day: Optional[int] = None
+    budget_action: str = "stop"
+    fallback_model_name: Optional[str] = None
+
+    # Tool calls
+    tool_rate_per_second: float = 10.0
+    tool_rate_burst: int = 10
+    tool_max_concurrency: int = 8
+    tool_cache_ttl: float = 300.0
+    tool_cache_size: int = 1024
+    # Scraped pages: content-addressed store, URL freshness and extract size
+    page_cache_path: Path = Path("data") / "page_cache.db"
+    page_cache_ttl: float = 900.0
+    page_extract_max_chars: int = 6000
+
+    # Speculative prefetch
+    prefetch_enabled: bool = True
+    prefetch_max_candidates: int = 12
+    prefetch_max_concurrency: int = 4
+    prefetch_max_chars: int = 4000
+
+    # Storage
+    archive_path: Path = Path("data") / "research_archive.db"
+    price_store_path: Path = Path("data") / "prices"
+    export_path: Path = Path("data") / "exports"
+    usage_ledger_path: Path = Path("data") / "usage_ledger.db"
+    recent_picks_path: Path = Path("data") / "recent_picks.json"
+    sector_map_path: Path = Path("data") / "sector_map.csv"
+    # NSE equity list (EQUITY_L.csv) for offline symbol and company-name lookups
+    symbol_master_path: Path = Path("data") / "EQUITY_L.csv"
+    # Corporate actions and fundamentals; CSVs dropped in the inbox are ingested daily
+    fundamentals_path: Path = Path("data") / "fundamentals.db"
+    fundamentals_inbox: Path = Path("data") / "fundamentals_inbox"
+    adjust_prices: bool = True
+
+    # Portfolio risk: position sizing of a run's BUY/SELL calls
+    portfolio_capital: float = 1_000_000.0
+    risk_per_trade: float = 0.01
+    max_position_weight: float = 0.10
+
+    # Checkpoint graph state after every agent step so failed runs can be resumed
+    checkpoint_runs: bool = True
+    checkpoint_path: Path = Path("data") / "checkpoints.db"
+    checkpoint_retention_hours: float = 24.0
+
+    # Record every UI run to a replayable cassette in cassette_dir
+    record_runs: bool = False
+    cassette_dir: Path = Path("data") / "cassettes"
+
+    # End-of-day scheduler (comma-separated lists in the environment)
+    schedule_times: Tuple[str, ...] = ("16:00",)
+    watchlist: Tuple[str, ...] = ()
+    scheduler_symbols_per_run: int = 3
+    scheduler_workers: int = 4
+    market_timezone: str = "Asia/Kolkata"
+    holiday_calendar_path: Path = Path("data") / "nse_holidays.csv"
+    scheduler_metrics_path: Path = Path("data") / "scheduler_metrics.json"
+
+    # Identical analyses: share in-flight runs per time window, then cache results
+    coalesce_window_seconds: float = 300.0
+    coalesce_result_ttl: float = 300.0
+
+    # HTTP API (python api.py)
+    api_host: str = "127.0.0.1"
+    api_port: int = 8000
+    api_max_concurrent_runs: int = 8
+    api_max_jobs: int = 500
+
+    # Prometheus /metrics, /healthz and /readyz; disabled unless a port is set
+    metrics_host: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+
+    # Profiled runs (main.py --profile, the UI's profiling toggle)
+    profile_dir: Path = Path("data") / "profiles"
+
+    def __post_init__(self):
+        errors = []
+        choices = {
+            "model_routing": ("tiered", "single"),
+            "orchestration_mode": ("supervisor", "pipeline"),
+            "budget_action": ("stop", "downgrade"),
+        }
+        for name, allowed in choices.items():
+            if getattr(self, name) not in allowed:
+                errors.append(f"{name.upper()} must be one of {', '.join(allowed)}")
+        for name in (
+            "model_max_tokens",
+            "model_timeout",
+            "tool_rate_burst",
+            "tool_max_concurrency",
+            "tool_cache_size",
+            "prefetch_max_concurrency",
+            "prefetch_max_chars",
+            "page_extract_max_chars",
+            "scheduler_symbols_per_run",
+            "scheduler_workers",
+            "api_max_concurrent_runs",
+            "api_max_jobs",
+        ):
+            if getattr(self, name) <= 0:
+                errors.append(f"{name.upper()} must be positive")
+        if self.metrics_port is not None and not 0 < self.metrics_port < 65536:
+            errors.append("METRICS_PORT must be a TCP port (1-65535) when set")
+        for name in ("max_tokens_per_run", "max_tokens_per_day"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                errors.append(f"{name.upper()} must be positive when set")
+        if not 0 <= self.model_temperature <= 2:
+            errors.append("MODEL_TEMPERATURE must be between 0 and 2")
+        if self.portfolio_capital <= 0:
+            errors.append("PORTFOLIO_CAPITAL must be positive")
+        for name in ("risk_per_trade", "max_position_weight"):
+            if not 0 < getattr(self, name) <= 1:
+                errors.append(f"{name.upper()} must be a fraction between 0 and 1")
+        for name in (
+            "tool_rate_per_second",
+            "tool_cache_ttl",
+            "page_cache_ttl",
+            "coalesce_window_seconds",
+            "coalesce_result_ttl",
+            "checkpoint_retention_hours",
+        ):
+            if getattr(self, name) < 0:
+                errors.append(f"{name.upper()} must not be negative")
+        for value in self.schedule_times:
+            try:
+                time.fromisoformat(value)
+            except ValueError:
+                errors.append(f"SCHEDULE_TIMES entry {value!r} is not HH:MM")
+        if errors:
+            raise ValueError("Invalid settings: " + "; ".join(errors))
+
+    @classmethod
+    def load(
+        cls,
+        env_file: Optional[str | Path] = ".env",
+        environ: Optional[Mapping[str, str]] = None,
+        **overrides: Any,
+    ) -> "Settings":
+        """Build settings from an env file, overlaid by the environment, then ``overrides``"""
+        values: Dict[str, Optional[str]] = {}
+        if env_file and Path(env_file).exists():
+            values.update(dotenv_values(env_file))
+        values.update(os.environ if environ is None else environ)
+
+        hints = typing.get_type_hints(cls)
+        kwargs: Dict[str, Any] = {}
+        errors = []
+        for f in dataclasses.fields(cls):
+            raw = values.get(f.name.upper())
+            if raw is None or f.name == "agent_model_tiers":
+                continue
+            try:
+                kwargs[f.name] = _convert(raw, hints[f.name])
+            except ValueError:
+                errors.append(
+                    f"{f.name.upper()}={raw!r} is not a valid {hints[f.name]}"
+                )
+        if errors:
+            raise ValueError("Invalid settings: " + "; ".join(errors))
+
+        kwargs["agent_model_tiers"] = tuple(
+            sorted(
+                (key[: -len(AGENT_TIER_SUFFIX)].lower(), value.strip())
+                for key, value in values.items()
+                if key.endswith(AGENT_TIER_SUFFIX) and value
+            )
+        )
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    def with_overrides(self, **overrides: Any) -> "Settings":
+        """Copy with the given fields replaced; empty values (e.g. blank UI inputs) are ignored"""
+        return dataclasses.replace(
+            self, **{k: v for k, v in overrides.items() if v not in (None, "")}
+        )
+
+    @property
+    def model_tiers(self) -> Dict[str, str]:
+        return {"large": self.model_name, "fast": self.fast_model_name}
+
+    @property
+    def price_adjustment_path(self) -> Optional[Path]:
+        """Corporate actions database used to split/bonus adjust prices, if enabled"""
+        return self.fundamentals_path if self.adjust_prices else None
+
+
+def _convert(raw: str, hint: Any) -> Any:
+    raw = raw.strip()
+    if typing.get_origin(hint) is typing.Union:
+        if not raw:
+            return None
+        hint = next(arg for arg in typing.get_args(hint) if arg is not type(None))
+    if hint is bool:
+        if raw.lower() in ("1", "true", "yes", "on"):
+            return True
+        if raw.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(raw)
+    if hint in (int, float, Path):
+        return hint(raw)
+    if typing.get_origin(hint) is tuple:
+        return tuple(item.strip() for item in raw.split(",") if item.strip())
+    return raw
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide settings, read from ``.env`` and the environment on first use"""
+    return Settings.load()
@@ -0,0 +1,511 @@
+"""Local NSE equity symbol master with offline company-name resolution.
+
+    python symbol_master.py search "tata motrs"
+    python symbol_master.py resolve "analyze Tata Motors and M&M"
+
+Securities are loaded from NSE's equity list (``EQUITY_L.csv``, saved to
+``SYMBOL_MASTER_PATH``) with sectors from the sector map. Without the file only the
+built-in NIFTY 50 is known. Names are indexed twice: a token trie finds company
+names mentioned in free text such as queries, and a trigram index ranks fuzzy
+matches for misspelled or partial names.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import re
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from sector_index import NIFTY50_SECTORS, SECTOR_MAP_PATH, load_sector_map
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_MASTER_PATH = Path("data") / "EQUITY_L.csv"
+
+# Fallback names of the NIFTY 50 while no equity list has been downloaded
+NIFTY50_NAMES = {
+    "ADANIENT": "Adani Enterprises Limited",
+    "ADANIPORTS": "Adani Ports and Special Economic Zone Limited",
+    "APOLLOHOSP": "Apollo Hospitals Enterprise Limited",
+    "ASIANPAINT": "Asian Paints Limited",
+    "AXISBANK": "Axis Bank Limited",
+    "BAJAJ-AUTO": "Bajaj Auto Limited",
+    "BAJAJFINSV": "Bajaj Finserv Limited",
+    "BAJFINANCE": "Bajaj Finance Limited",
+    "BEL": "Bharat Electronics Limited",
+    "BHARTIARTL": "Bharti Airtel Limited",
+    "CIPLA": "Cipla Limited",
+    "COALINDIA": "Coal India Limited",
+    "DRREDDY": "Dr. Reddy's Laboratories Limited",
+    "EICHERMOT": "Eicher Motors Limited",
+    "ETERNAL": "Eternal Limited",
+    "GRASIM": "Grasim Industries Limited",
+    "HCLTECH": "HCL Technologies Limited",
+    "HDFCBANK": "HDFC Bank Limited",
+    "HDFCLIFE": "HDFC Life Insurance Company Limited",
+    "HEROMOTOCO": "Hero MotoCorp Limited",
+    "HINDALCO": "Hindalco Industries Limited",
+    "HINDUNILVR": "Hindustan Unilever Limited",
+    "ICICIBANK": "ICICI Bank Limited",
+    "INDUSINDBK": "IndusInd Bank Limited",
+    "INFY": "Infosys Limited",
+    "ITC": "ITC Limited",
+    "JIOFIN": "Jio Financial Services Limited",
+    "JSWSTEEL": "JSW Steel Limited",
+    "KOTAKBANK": "Kotak Mahindra Bank Limited",
+    "LT": "Larsen & Toubro Limited",
+    "M&M": "Mahindra & Mahindra Limited",
+    "MARUTI": "Maruti Suzuki India Limited",
+    "NESTLEIND": "Nestle India Limited",
+    "NTPC": "NTPC Limited",
+    "ONGC": "Oil & Natural Gas Corporation Limited",
+    "POWERGRID": "Power Grid Corporation of India Limited",
+    "RELIANCE": "Reliance Industries Limited",
+    "SBILIFE": "SBI Life Insurance Company Limited",
+    "SBIN": "State Bank of India",
+    "SHRIRAMFIN": "Shriram Finance Limited",
+    "SUNPHARMA": "Sun Pharmaceutical Industries Limited",
+    "TATACONSUM": "Tata Consumer Products Limited",
+    "TATAMOTORS": "Tata Motors Limited",
+    "TATASTEEL": "Tata Steel Limited",
+    "TCS": "Tata Consultancy Services Limited",
+    "TECHM": "Tech Mahindra Limited",
+    "TITAN": "Titan Company Limited",
+    "TRENT": "Trent Limited",
+    "ULTRACEMCO": "UltraTech Cement Limited",
+    "WIPRO": "Wipro Limited",
+}
+
+# Common short names of NIFTY 50 companies that aren't a prefix of the listed name
+NAME_ALIASES = {
+    "BHARTIARTL": ("Airtel",),
+    "ETERNAL": ("Zomato",),
+    "HINDUNILVR": ("HUL",),
+    "LT": ("L&T", "Larsen"),
+    "MARUTI": ("Maruti",),
+    "NESTLEIND": ("Nestle",),
+    "RELIANCE": ("Reliance", "RIL"),
+    "SBIN": ("SBI", "State Bank"),
+    "SUNPHARMA": ("Sun Pharma",),
+    "TATACONSUM": ("Tata Consumer",),
+    "ULTRACEMCO": ("UltraTech",),
+}
+
+SYMBOL_TOKEN = re.compile(r"(?<![\w&-])[A-Z][A-Z0-9&-]{0,19}(?![\w&-])")
+NAME_TOKEN = re.compile(r"[A-Za-z0-9]+|&")
+NAME_SUFFIXES = {"limited", "ltd"}
+# Query and sector words never taken alone as a company name
+COMMON_WORDS = {
+    "analyse",
+    "analysis",
+    "analyze",
+    "and",
+    "auto",
+    "bank",
+    "best",
+    "buy",
+    "cement",
+    "company",
+    "current",
+    "energy",
+    "finance",
+    "financial",
+    "general",
+    "hold",
+    "india",
+    "indian",
+    "it",
+    "market",
+    "metal",
+    "metals",
+    "news",
+    "nse",
+    "oil",
+    "pharma",
+    "power",
+    "price",
+    "provide",
+    "sector",
+    "sell",
+    "share",
+    "shares",
+    "state",
+    "steel",
+    "stock",
+    "stocks",
+    "tech",
+    "the",
+    "today",
+    "top",
+    "trading",
+}
+# Minimum trigram similarity for fuzzy resolution and for correcting reported symbols
+RESOLVE_SCORE = 0.6
+VALIDATE_SCORE = 0.8
+
+
+@dataclass(frozen=True)
+class Security:
+    symbol: str
+    name: str
+    isin: Optional[str] = None
+    series: str = "EQ"
+    sector: Optional[str] = None
+    market_lot: Optional[int] = None
+    face_value: Optional[float] = None
+    listed_on: Optional[str] = None
+
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    """(normalized, original) word tokens; ``&`` reads as "and" """
+    return [
+        ("and" if word == "&" else word.lower(), word)
+        for word in NAME_TOKEN.findall((text or "").replace("'", ""))
+    ]
+
+
+def name_key(name: str) -> Tuple[str, ...]:
+    """Normalized name tokens without a leading "the" or a trailing "limited" """
+    words = [word for word, _ in _tokens(name)]
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return tuple(words)
+
+
+def _squash(symbol: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", symbol.upper())
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+class _TrieNode:
+    __slots__ = ("children", "symbols", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Symbols whose name starts with / is exactly the path to this node
+        self.symbols: Set[str] = set()
+        self.terminal: Set[str] = set()
+
+
+class SymbolMaster:
+    """Securities by symbol and ISIN, with name lookups that need no network.
+
+    ``complete`` is False while only the built-in NIFTY 50 is loaded; symbols the
+    master doesn't know are then not treated as invalid. ``preferred`` symbols
+    (the NIFTY 50) break ties between companies sharing a name prefix, and
+    ``aliases`` adds other names a company goes by.
+    """
+
+    def __init__(
+        self,
+        securities: Iterable[Security],
+        complete: bool = True,
+        preferred: Iterable[str] = (),
+        aliases: Optional[Mapping[str, Iterable[str]]] = None,
+    ):
+        self.securities: Dict[str, Security] = {s.symbol: s for s in securities}
+        self.complete = complete
+        self.preferred = set(preferred) & set(self.securities)
+        self._isins = {s.isin: s.symbol for s in self.securities.values() if s.isin}
+        squashed = defaultdict(set)
+        for symbol in self.securities:
+            squashed[_squash(symbol)].add(symbol)
+        self._squashed = {k: next(iter(v)) for k, v in squashed.items() if len(v) == 1}
+
+        self._trie = _TrieNode()
+        self._keys: List[Tuple[str, str]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        names = [(s.symbol, s.name) for s in self.securities.values()]
+        names += [
+            (symbol, alias)
+            for symbol, symbol_aliases in (aliases or {}).items()
+            if symbol in self.securities
+            for alias in symbol_aliases
+        ]
+        for symbol, name in names:
+            key = name_key(name)
+            node = self._trie
+            for word in key:
+                node = node.children.setdefault(word, _TrieNode())
+                node.symbols.add(symbol)
+            node.terminal.add(symbol)
+            for text in {" ".join(key), symbol.lower()}:
+                for gram in _trigrams(text):
+                    self._postings[gram].append(len(self._keys))
+                self._keys.append((text, symbol))
+
+    def __len__(self) -> int:
+        return len(self.securities)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.securities
+
+    def get(self, symbol: str) -> Optional[Security]:
+        return self.securities.get(symbol.strip().upper())
+
+    def by_isin(self, isin: str) -> Optional[Security]:
+        symbol = self._isins.get(isin.strip().upper())
+        return self.securities[symbol] if symbol else None
+
+    def search(
+        self, text: str, limit: int = 5, min_score: float = 0.3
+    ) -> List[Tuple[Security, float]]:
+        """Closest securities to a name or symbol by trigram (Dice) similarity"""
+        query = " ".join(name_key(text))
+        grams = _trigrams(query)
+        if not query:
+            return []
+        overlap: Counter = Counter()
+        for gram, count in grams.items():
+            for entry in self._postings.get(gram, ()):
+                overlap[entry] += count
+        size = sum(grams.values())
+        best: Dict[str, float] = {}
+        for entry, shared in overlap.items():
+            key, symbol = self._keys[entry]
+            score = 2 * shared / (size + len(key) + 2)
+            if score >= min_score and score > best.get(symbol, 0):
+                best[symbol] = score
+        ranked = sorted(best.items(), key=lambda item: -item[1])[:limit]
+        return [(self.securities[symbol], round(score, 3)) for symbol, score in ranked]
+
+    def resolve(self, text: str) -> Optional[Security]:
+        """One security for a symbol, ISIN or company name, if it is unambiguous"""
+        text = (text or "").strip()
+        exact = self.get(text) or self.by_isin(text)
+        if exact is not None:
+            return exact
+        symbol = self._squashed.get(_squash(text))
+        if symbol and not text.count(" "):
+            return self.securities[symbol]
+        mentions = self.find_mentions(text)
+        if len(mentions) == 1:
+            return mentions[0][1]
+        matches = self.search(text, limit=2, min_score=RESOLVE_SCORE)
+        if len(matches) == 1 or (len(matches) == 2 and matches[0][1] > matches[1][1]):
+            return matches[0][0]
+        return None
+
+    def find_mentions(self, text: str) -> List[Tuple[str, Security]]:
+        """Securities named in free text: symbols as written, then company names.
+
+        Company names are matched on whole words, longest first: a full name
+        (without "Limited") or alias, or a leading part of one at least two words
+        long that only one company (or one preferred company) has. A single word
+        must be a whole name or alias, capitalized and not a common query word.
+        """
+        found: Dict[str, str] = {}
+        for symbol in SYMBOL_TOKEN.findall(text or ""):
+            if symbol in self.securities:
+                found.setdefault(symbol, symbol)
+
+        tokens = _tokens(text)
+        i = 0
+        while i < len(tokens):
+            node, match = self._trie, None
+            for j in range(i, len(tokens)):
+                node = node.children.get(tokens[j][0])
+                if node is None:
+                    break
+                words = j - i + 1
+                if words == 1 and (
+                    tokens[i][0] in COMMON_WORDS or not tokens[i][1][0].isupper()
+                ):
+                    continue
+                # "Asian" or "Coal" alone name no company, however unique the prefix
+                candidates = (
+                    node.terminal if words == 1 else node.terminal or node.symbols
+                )
+                if len(candidates) > 1:
+                    candidates = candidates & self.preferred
+                if len(candidates) == 1:
+                    match = (j + 1, next(iter(candidates)))
+            if match is None:
+                i += 1
+                continue
+            end, symbol = match
+            found.setdefault(symbol, " ".join(word for _, word in tokens[i:end]))
+            i = end
+        return [(phrase, self.securities[symbol]) for symbol, phrase in found.items()]
+
+    def annotate(self, query: str) -> Tuple[str, List[str]]:
+        """The query with the companies it names resolved to symbols, and all symbols"""
+        mentions = self.find_mentions(query)
+        named = [(phrase, s) for phrase, s in mentions if phrase != s.symbol]
+        if not named:
+            return query, [s.symbol for _, s in mentions]
+        lines = [
+            f"- {phrase} = {s.symbol} ({', '.join(filter(None, (s.name, s.isin, s.sector)))})"
+            for phrase, s in named
+        ]
+        note = "RESOLVED NSE SYMBOLS (from the local symbol master; no lookup needed):"
+        return f"{query}\n\n{note}\n" + "\n".join(lines), [
+            s.symbol for _, s in mentions
+        ]
+
+    def validate(self, symbol: str, company: Optional[str] = None) -> Optional[str]:
+        """Canonical symbol for a reported symbol and company name, None if unknown.
+
+        Near-miss symbols (``BAJAJAUTO``) and wrong symbols with a recognizable
+        company name are corrected; only a complete master corrects by name.
+        """
+        symbol = (symbol or "").strip().upper()
+        if symbol in self.securities:
+            return symbol
+        if symbol and _squash(symbol) in self._squashed:
+            return self._squashed[_squash(symbol)]
+        if not self.complete:
+            return symbol or None
+        if company:
+            matches = self.search(company, limit=2, min_score=VALIDATE_SCORE)
+            if matches and (len(matches) == 1 or matches[0][1] > matches[1][1]):
+                return matches[0][0].symbol
+        return None
+
+
+def _int(value: str) -> Optional[int]:
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def _float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _listing_date(value: str) -> Optional[str]:
+    try:
+        return datetime.strptime(value, "%d-%b-%Y").date().isoformat()
+    except ValueError:
+        return value or None
+
+
+def load_securities(path: Path, sectors: Dict[str, str]) -> List[Security]:
+    """Securities from an NSE ``EQUITY_L.csv`` (headers may carry stray spaces)"""
+    securities = []
+    with Path(path).open(newline="", encoding="utf-8-sig") as f:
+        for raw in csv.DictReader(f):
+            row = {(k or "").strip().upper(): (v or "").strip() for k, v in raw.items()}
+            symbol = row.get("SYMBOL", "").upper()
+            if not symbol:
+                continue
+            securities.append(
+                Security(
+                    symbol=symbol,
+                    name=row.get("NAME OF COMPANY") or symbol,
+                    isin=row.get("ISIN NUMBER") or None,
+                    series=row.get("SERIES") or "EQ",
+                    sector=sectors.get(symbol),
+                    market_lot=_int(row.get("MARKET LOT", "")),
+                    face_value=_float(row.get("FACE VALUE", "")),
+                    listed_on=_listing_date(row.get("DATE OF LISTING", "")),
+                )
+            )
+    return securities
+
+
+def load_symbol_master(
+    path: Path = SYMBOL_MASTER_PATH, sector_map_path: Path = SECTOR_MAP_PATH
+) -> SymbolMaster:
+    """Master from the NSE equity list if present, else the built-in NIFTY 50"""
+    sectors = load_sector_map(sector_map_path)
+    path = Path(path)
+    if path.exists():
+        securities = load_securities(path, sectors)
+        logger.info(
+            "Symbol master loaded", extra={"path": str(path), "count": len(securities)}
+        )
+        return SymbolMaster(securities, preferred=NIFTY50_SECTORS, aliases=NAME_ALIASES)
+    securities = [
+        Security(symbol=symbol, name=name, sector=sectors.get(symbol))
+        for symbol, name in NIFTY50_NAMES.items()
+    ]
+    return SymbolMaster(
+        securities, complete=False, preferred=NIFTY50_SECTORS, aliases=NAME_ALIASES
+    )
+
+
+@lru_cache(maxsize=4)
+def _cached_master(
+    path: Path, sector_map_path: Path, mtime: Optional[float]
+) -> SymbolMaster:
+    return load_symbol_master(path, sector_map_path)
+
+
+def get_symbol_master(
+    path: Path = SYMBOL_MASTER_PATH, sector_map_path: Path = SECTOR_MAP_PATH
+) -> SymbolMaster:
+    """Process-wide master per equity list, reloaded when the file changes"""
+    path = Path(path)
+    mtime = path.stat().st_mtime if path.exists() else None
+    return _cached_master(path, Path(sector_map_path), mtime)
+
+
+def make_symbol_tool(master: SymbolMaster) -> BaseTool:
+    """LangChain tool resolving company names, symbols and ISINs locally"""
+
+    def symbol_lookup(query: str) -> str:
+        exact = master.resolve(query)
+        matches = [(exact, 1.0)] if exact else master.search(query)
+        if not matches:
+            return f"No NSE security matches {query!r}."
+        return json.dumps([{**asdict(s), "score": score} for s, score in matches])
+
+    async def asymbol_lookup(query: str) -> str:
+        return symbol_lookup(query)
+
+    return StructuredTool.from_function(
+        func=symbol_lookup,
+        coroutine=asymbol_lookup,
+        name="symbol_lookup",
+        description=(
+            "Resolve an NSE company name, symbol or ISIN locally (no web access "
+            "needed), tolerating misspellings: returns the symbol, company name, "
+            "ISIN, series, sector, market lot and listing date of the best matches."
+        ),
+    )
+
+
+def symbol_tools(
+    path: Path = SYMBOL_MASTER_PATH, sector_map_path: Path = SECTOR_MAP_PATH
+) -> List[BaseTool]:
+    return [make_symbol_tool(get_symbol_master(path, sector_map_path))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=str(SYMBOL_MASTER_PATH))
+    parser.add_argument("--sector-map", default=str(SECTOR_MAP_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="Fuzzy name or symbol search")
+    search.add_argument("text")
+    resolve = commands.add_parser("resolve", help="Symbols named in a query")
+    resolve.add_argument("text")
+    args = parser.parse_args()
+
+    master = load_symbol_master(Path(args.path), Path(args.sector_map))
+    if args.command == "search":
+        for security, score in master.search(args.text):
+            print(f"{score:.3f}  {security.symbol:<12} {security.name}")
+    else:
+        for phrase, security in master.find_mentions(args.text):
+            print(f"{phrase!r} -> {security.symbol} ({security.name})")
+        print(master.annotate(args.text)[0])
@@ -0,0 +1,40 @@
+import asyncio
+
+from api import PENDING, RUNNING, AnalysisService
+from coalescing import RunCoalescer
+
+
+class FakeSystem:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.runs = 0
+
+    async def analyze_stocks(self, query, mode, progress, resume=None):
+        self.runs += 1
+        progress({"event": "started", "run_id": "run-1", "mode": mode})
+        await self.release.wait()
+        return {"run_id": "run-1", "status": "completed"}
+
+
+def test_job_attached_to_a_running_analysis_reports_running():
+    async def run():
+        system = FakeSystem()
+        service = AnalysisService(
+            system, max_concurrent_runs=1, coalescer=RunCoalescer(ttl=0)
+        )
+        leader = service.submit("Analyze TCS", "pipeline")
+        await asyncio.sleep(0.01)
+        follower = service.submit("analyze tcs", "pipeline")
+        queued = service.submit("Analyze INFY", "pipeline")
+        await asyncio.sleep(0.01)
+        statuses = leader.status, follower.status, queued.status
+
+        system.release.set()
+        await asyncio.sleep(0.01)
+        await service.close()
+        return statuses, follower, system.runs
+
+    statuses, follower, runs = asyncio.run(run())
+    assert statuses == (RUNNING, RUNNING, PENDING)
+    assert follower.results["coalesced"] == "follower"
+    assert runs == 2
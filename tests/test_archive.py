@@ -0,0 +1,52 @@
+import sqlite3
+
+from archive import RunArchive
+
+
+def run(run_id, status="completed", **fields):
+    return {
+        "run_id": run_id,
+        "timestamp": "2026-10-19T10:00:00",
+        "query": "Analyze RELIANCE",
+        "mode": "pipeline",
+        "status": status,
+        "duration_seconds": 1.5,
+        "timings": {"stock_finder": 1.0},
+        "usage": {"total": {"total_tokens": 120}},
+        **fields,
+    }
+
+
+def test_failed_runs_are_archived_and_filterable(tmp_path):
+    archive = RunArchive(tmp_path / "archive.db")
+    archive.save_run(run("ok"), "report")
+    archive.save_run(run("bad", "error", error="RuntimeError('groq 503')"))
+
+    assert archive.count_runs() == 2
+    assert [r["run_id"] for r in archive.list_runs(status="error")] == ["bad"]
+    assert archive.count_runs(status="completed") == 1
+
+    failed = archive.get_run("bad")
+    assert failed["error"] == "RuntimeError('groq 503')"
+    assert failed["timings"] == {"stock_finder": 1.0}
+    assert failed["usage"]["total"]["total_tokens"] == 120
+
+    # A resumed run replaces its failure
+    archive.save_run(run("bad"), "report")
+    assert archive.count_runs(status="error") == 0
+    assert archive.get_run("bad")["error"] is None
+
+
+def test_archive_without_error_column_is_migrated(tmp_path):
+    path = tmp_path / "archive.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE runs (run_id TEXT PRIMARY KEY, created_at TEXT NOT NULL, "
+            "run_date TEXT NOT NULL, query TEXT, mode TEXT, status TEXT, "
+            "duration_seconds REAL, total_tokens INTEGER, timings TEXT, usage TEXT, "
+            "report TEXT)"
+        )
+
+    archive = RunArchive(path)
+    archive.save_run(run("bad", "error", error="boom"))
+    assert archive.list_runs(status="error")[0]["error"] == "boom"
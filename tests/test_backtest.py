@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import adjust_recommendation_prices, run_backtest, summarize_backtest
+from fundamentals import FundamentalsStore
+
+DATES = pd.bdate_range("2026-01-05", periods=6)
+
+
+def make_panel(bars):
+    """Wide OHLC panel for one symbol from (open, high, low, close) tuples"""
+    frame = pd.DataFrame(
+        bars, columns=["open", "high", "low", "close"], index=DATES[: len(bars)]
+    )
+    return {field: frame[[field]].rename(columns={field: "TCS"}) for field in frame}
+
+
+def make_recs(*recs):
+    rows = [
+        {
+            "date": DATES[0] - pd.Timedelta(days=3),
+            "symbol": "TCS",
+            "action": "BUY",
+            "confidence": "HIGH",
+            "entry_price": 100.0,
+            "target_price": 110.0,
+            "stop_loss": 95.0,
+            "horizon_days": 5,
+            **rec,
+        }
+        for rec in recs
+    ]
+    return pd.DataFrame(rows)
+
+
+FLAT = (100, 101, 99, 100)
+
+
+def backtest(bars, **rec):
+    return run_backtest(make_recs(rec), make_panel(bars)).iloc[0]
+
+
+def test_target_hit():
+    trade = backtest([FLAT, (100, 105, 99, 104), (104, 111, 103, 110)] + [FLAT] * 3)
+    assert trade["outcome"] == "target"
+    assert trade["bars_held"] == 3
+    assert trade["days_to_target"] == 3
+    assert trade["return_pct"] == pytest.approx(10.0)
+
+
+def test_stop_hit():
+    trade = backtest([FLAT, (99, 100, 94, 95)] + [FLAT] * 4)
+    assert trade["outcome"] == "stop"
+    assert trade["bars_held"] == 2
+    assert trade["return_pct"] == pytest.approx(-5.0)
+
+
+def test_same_bar_target_and_stop_counts_as_stop():
+    trade = backtest([FLAT, (100, 112, 94, 100)] + [FLAT] * 4)
+    assert trade["outcome"] == "stop"
+
+
+def test_expired_exits_at_last_close():
+    trade = backtest([FLAT] * 4 + [(100, 103, 99, 102)] + [FLAT])
+    assert trade["outcome"] == "expired"
+    assert trade["bars_held"] == 5
+    assert trade["exit_price"] == 102
+    assert trade["return_pct"] == pytest.approx(2.0)
+
+
+def test_unfinished_horizon_is_open_and_not_scored():
+    trade = backtest([FLAT, (100, 103, 99, 102)], horizon_days=10)
+    assert trade["outcome"] == "open"
+    assert trade["bars_held"] == 2
+    assert np.isnan(trade["return_pct"])
+
+    trades = run_backtest(
+        make_recs({"horizon_days": 10}, {"horizon_days": 2}),
+        make_panel([FLAT, (100, 103, 99, 102)]),
+    )
+    assert list(trades["outcome"]) == ["open", "expired"]
+    summary = summarize_backtest(trades)
+    assert summary.loc[("BUY", "HIGH"), "trades"] == 1
+
+
+def test_entry_never_reached_is_unfilled():
+    bars = [(104, 106, 103, 105)] * 6
+    trade = backtest(bars)
+    assert trade["outcome"] == "unfilled"
+    assert np.isnan(trade["fill_price"])
+    assert backtest(bars[:2])["outcome"] == "pending"
+
+    summary = summarize_backtest(run_backtest(make_recs({}), make_panel(bars)))
+    assert summary.loc[("BUY", "HIGH"), "trades"] == 0
+    assert summary.loc[("BUY", "HIGH"), "unfilled"] == 1
+
+
+def test_fill_waits_for_entry_and_gaps_fill_at_open():
+    # Fills on the third bar, which opens below the limit
+    trade = backtest([(104, 106, 103, 105)] * 2 + [(98, 111, 97, 110)] + [FLAT] * 3)
+    assert trade["outcome"] == "target"
+    assert trade["fill_price"] == 98
+    assert trade["bars_held"] == 1
+    assert trade["return_pct"] == pytest.approx((110 / 98 - 1) * 100)
+
+
+def test_sell_trades_the_other_way():
+    sell = {"action": "SELL", "target_price": 90.0, "stop_loss": 105.0}
+    trade = backtest([FLAT, (100, 101, 89, 90)] + [FLAT] * 4, **sell)
+    assert trade["outcome"] == "target"
+    assert trade["return_pct"] == pytest.approx(10.0)
+
+    trade = backtest([FLAT, (100, 106, 99, 105)] + [FLAT] * 4, **sell)
+    assert trade["outcome"] == "stop"
+    assert trade["return_pct"] == pytest.approx(-5.0)
+
+
+def test_recommendation_prices_follow_split_and_bonus(tmp_path):
+    actions = FundamentalsStore(tmp_path / "fundamentals.db")
+    actions.upsert_actions(
+        pd.DataFrame(
+            {
+                "symbol": ["TCS", "TCS"],
+                "purpose": ["Bonus 1:1", "Face Value Split From Rs 10 To Rs 2"],
+                "ex_date": ["2026-01-06", "2026-01-08"],
+            }
+        )
+    )
+    recs = make_recs(
+        {"entry_price": 1000.0, "target_price": 1100.0, "stop_loss": 950.0},
+        {"date": DATES[2], "entry_price": 500.0},
+        {"date": DATES[4], "symbol": "INFY"},
+    )
+
+    adjusted = adjust_recommendation_prices(recs, actions)
+
+    # Before the bonus and the split: a tenth; between them: a fifth; other symbols as-is
+    prices = adjusted[["entry_price", "target_price", "stop_loss"]]
+    assert prices.iloc[0].tolist() == pytest.approx([100.0, 110.0, 95.0])
+    assert prices.iloc[1].tolist() == pytest.approx([100.0, 22.0, 19.0])
+    assert prices.iloc[2].tolist() == [100.0, 110.0, 95.0]
+    assert recs["entry_price"].tolist() == [1000.0, 500.0, 100.0]
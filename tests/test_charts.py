@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from charts import create_symbol_chart, load_chart_data
+from price_store import PriceStore
+
+
+def make_bars(days):
+    index = pd.bdate_range("2024-01-01", periods=days, name="date")
+    close = 100 + np.sin(np.arange(days) / 10) * 10
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1000.0,
+        },
+        index=index,
+    )
+
+
+def test_short_range_charts_settled_indicators(tmp_path):
+    store = PriceStore(tmp_path)
+    bars = make_bars(400)
+    store.write("TCS", bars)
+    start, end = bars.index[350], bars.index[-1]
+
+    frame = load_chart_data(store, ["TCS"], start, end, warmup_bars=200)["TCS"]
+    assert (frame.index < start).sum() == 200
+    assert frame.index[-1] == end
+
+    fig = create_symbol_chart(frame, "TCS", start=start)
+    traces = {trace.name: trace for trace in fig.data}
+    assert pd.Timestamp(traces["Price"].x[0]) == start
+    assert pd.Timestamp(traces["SMA_200"].x[0]) == start
+    assert not np.isnan(traces["SMA_200"].y).any()
+
+
+def test_warmup_is_limited_to_available_history(tmp_path):
+    store = PriceStore(tmp_path)
+    bars = make_bars(60)
+    store.write("TCS", bars)
+
+    frame = load_chart_data(store, ["TCS"], bars.index[30], None, warmup_bars=200)
+    assert frame["TCS"].index[0] == bars.index[0]
+    assert load_chart_data(store, ["INFY"], bars.index[30], None, warmup_bars=200) == {}
@@ -0,0 +1,75 @@
+import socket
+import sqlite3
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from checkpoints import COMPLETED, FAILED, CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(tmp_path / "checkpoints.db")
+
+
+def _checkpoint(store, thread_id):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    store.put(config, empty_checkpoint(), {}, {})
+
+
+def _set_owner(store, thread_id, owner):
+    with sqlite3.connect(store.path) as conn:
+        conn.execute(
+            "UPDATE runs SET owner = ? WHERE thread_id = ?", (owner, thread_id)
+        )
+
+
+def test_live_run_cannot_be_resumed(store):
+    store.start_run("run-1", "Analyze INFY", "pipeline")
+    _checkpoint(store, "run-1")
+
+    assert store.is_running("run-1")
+    assert store.resumable_runs() == []
+    with pytest.raises(ValueError, match="still running"):
+        store.start_run("run-1", "Analyze INFY", "pipeline", resume=True)
+
+    store.finish_run("run-1", FAILED, "groq 503")
+    assert [run["thread_id"] for run in store.resumable_runs()] == ["run-1"]
+    store.start_run("run-1", "Analyze INFY", "pipeline", resume=True)
+    assert store.is_running("run-1")
+
+
+def test_interrupted_run_of_dead_process_is_resumable(store):
+    store.start_run("run-1", "Analyze INFY", "pipeline")
+    _checkpoint(store, "run-1")
+    # A process that was killed mid-run never records how the run ended
+    _set_owner(store, "run-1", f"{socket.gethostname()}:999999999")
+
+    assert not store.is_running("run-1")
+    assert [run["thread_id"] for run in store.resumable_runs()] == ["run-1"]
+    store.start_run("run-1", "Analyze INFY", "pipeline", resume=True)
+
+    _set_owner(store, "run-1", "other-host:1")
+    assert store.is_running("run-1")
+
+
+def test_completed_or_unknown_run_cannot_be_resumed(store):
+    store.start_run("run-1", "Analyze INFY", "pipeline")
+    store.finish_run("run-1", COMPLETED)
+    with pytest.raises(ValueError, match="already completed"):
+        store.start_run("run-1", "Analyze INFY", "pipeline", resume=True)
+    with pytest.raises(ValueError, match="No checkpointed run"):
+        store.start_run("run-2", "Analyze INFY", "pipeline", resume=True)
+
+
+def test_runs_table_gains_owner_column(tmp_path):
+    path = tmp_path / "checkpoints.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE runs (thread_id TEXT PRIMARY KEY, query TEXT, mode TEXT "
+            "NOT NULL, status TEXT NOT NULL, error TEXT, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+    store = CheckpointStore(path)
+    store.start_run("run-1", None, "supervisor")
+    assert store.get_run("run-1")["owner"]
@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+
+from fundamentals import (
+    FundamentalsStore,
+    adjust_bars,
+    adjust_panel,
+    adjustment_factors,
+    parse_purpose,
+)
+
+
+def test_ingest_skips_malformed_file(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "actions.csv").write_text(
+        "SYMBOL,PURPOSE,EX-DATE\nINFY,Bonus 1:1,2024-01-05\n", encoding="utf-8"
+    )
+    (inbox / "broken.csv").write_text("PURPOSE,EX-DATE\nBonus 1:1,2024-01-05\n")
+    store = FundamentalsStore(tmp_path / "fundamentals.db")
+
+    assert store.ingest_directory(inbox) == 1
+    assert list(store.actions(["INFY"])["kind"]) == ["bonus"]
+
+    # The skipped file is retried once it is fixed
+    (inbox / "broken.csv").write_text(
+        "SYMBOL,PURPOSE,EX-DATE\nTCS,Bonus 1:1,2024-02-05\n", encoding="utf-8"
+    )
+    assert store.ingest_directory(inbox) == 1
+
+
+@pytest.mark.parametrize(
+    "purpose, expected",
+    [
+        ("Bonus 1:1", {"kind": "bonus", "factor": 0.5, "amount": None}),
+        ("BONUS 2:3", {"kind": "bonus", "factor": 0.6, "amount": None}),
+        (
+            "Face Value Split (Sub-Division) - From Rs 10/- Per Share To Rs 2/- Per Share",
+            {"kind": "split", "factor": 0.2, "amount": None},
+        ),
+        (
+            "Bonus 1:1 And Dividend - Rs 5 Per Share",
+            {"kind": "bonus", "factor": 0.5, "amount": 5.0},
+        ),
+        (
+            "Interim Dividend - Rs 18 Per Share",
+            {"kind": "dividend", "factor": 1.0, "amount": 18.0},
+        ),
+        (
+            "Rights 1:5 @ Premium Rs 100/-",
+            {"kind": "rights", "factor": 1.0, "amount": None},
+        ),
+        ("Annual General Meeting", {"kind": "other", "factor": 1.0, "amount": None}),
+    ],
+)
+def test_parse_purpose(purpose, expected):
+    assert parse_purpose(purpose) == pytest.approx(expected)
+
+
+DATES = pd.bdate_range("2024-01-03", periods=6)
+# INFY: 1:1 bonus ex 2024-01-05, then a Rs 10 -> Rs 2 split ex 2024-01-09.
+# TCS: a dividend only, which leaves prices alone.
+ACTIONS = pd.DataFrame(
+    {
+        "symbol": ["INFY", "INFY", "TCS"],
+        "purpose": [
+            "Bonus 1:1",
+            "Face Value Split From Rs 10 To Rs 2",
+            "Dividend - Rs 10 Per Share",
+        ],
+        "ex_date": ["2024-01-05", "09-Jan-2024", "2024-01-04"],
+    }
+)
+
+
+def test_adjustment_factors_compound_later_actions(tmp_path):
+    store = FundamentalsStore(tmp_path / "fundamentals.db")
+    store.upsert_actions(ACTIONS)
+
+    factors = store.adjustment_factors(["INFY", "TCS"], DATES)
+
+    # Jan 3-4 are before both, Jan 5-8 before the split only, Jan 9 on are adjusted
+    assert list(factors["INFY"]) == pytest.approx([0.1, 0.1, 0.2, 0.2, 1.0, 1.0])
+    assert list(factors["TCS"]) == [1.0] * 6
+
+
+def test_adjust_bars_and_panel_rescale_prices_and_volume():
+    actions = ACTIONS.assign(
+        factor=[parse_purpose(p)["factor"] for p in ACTIONS["purpose"]],
+        ex_date=["2024-01-05", "2024-01-09", "2024-01-04"],
+    )
+    factors = adjustment_factors(actions, DATES, ["INFY", "TCS"])
+    # Unadjusted INFY trades at 1000 before the bonus, 500 until the split, then 100
+    close = [1000.0, 1000.0, 500.0, 500.0, 100.0, 100.0]
+    bars = pd.DataFrame(
+        {
+            "open": close,
+            "high": [c * 1.02 for c in close],
+            "low": [c * 0.98 for c in close],
+            "close": close,
+            "volume": [100.0, 100.0, 200.0, 200.0, 1000.0, 1000.0],
+        },
+        index=DATES,
+    )
+
+    adjusted = adjust_bars(bars, factors["INFY"])
+    assert list(adjusted["close"]) == pytest.approx([100.0] * 6)
+    assert list(adjusted["high"]) == pytest.approx([102.0] * 6)
+    assert list(adjusted["low"]) == pytest.approx([98.0] * 6)
+    assert list(adjusted["volume"]) == pytest.approx([1000.0] * 6)
+    assert list(bars["close"]) == close
+
+    panel = {
+        "close": pd.DataFrame({"INFY": close, "TCS": [3500.0] * 6}, index=DATES),
+        "volume": pd.DataFrame({"INFY": bars["volume"], "TCS": 50.0}, index=DATES),
+        "open": pd.DataFrame(),
+    }
+    adjusted = adjust_panel(panel, factors)
+    assert list(adjusted["close"]["INFY"]) == pytest.approx([100.0] * 6)
+    assert list(adjusted["close"]["TCS"]) == [3500.0] * 6
+    assert list(adjusted["volume"]["INFY"]) == pytest.approx([1000.0] * 6)
+    assert adjusted["open"].empty
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from live_quotes import (
+    LiveQuoteMonitor,
+    PollingQuoteFeed,
+    ReplayQuoteFeed,
+    mcp_quote_fetcher,
+)
+
+
+class FakeScrape:
+    name = "scrape_as_markdown"
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.urls = []
+
+    async def ainvoke(self, kwargs):
+        self.urls.append(kwargs["url"])
+        symbol = next(s for s in self.prices if s.replace("&", "%26") in kwargs["url"])
+        return f"Last Traded Price ₹ {self.prices[symbol]:,.2f}"
+
+
+class FakePriceStore:
+    def load(self, symbol):
+        return pd.DataFrame({"close": [100.0 + i for i in range(250)] + [float("nan")]})
+
+
+def test_polling_feed_rescores_seeded_symbols():
+    scrape = FakeScrape({"RELIANCE": 1400.0, "M&M": 3000.0})
+    monitor = LiveQuoteMonitor()
+    monitor.subscribe(scrape.prices)
+    monitor.seed_from_store(FakePriceStore(), ["RELIANCE"])
+
+    feed = PollingQuoteFeed(
+        mcp_quote_fetcher([scrape]), scrape.prices, interval_seconds=0, max_polls=2
+    )
+    asyncio.run(monitor.run(feed))
+
+    assert len(scrape.urls) == 4
+    rescored = {
+        row["symbol"]: row
+        for row in monitor.rescore(
+            [
+                {"symbol": "RELIANCE", "action": "BUY", "target_price": 1300.0},
+                {"symbol": "M&M", "action": "BUY", "target_price": float("nan")},
+            ]
+        )
+    }
+    assert rescored["RELIANCE"]["status"] == "TARGET_HIT"
+    assert rescored["RELIANCE"]["sma_200"] is not None
+    assert rescored["M&M"]["price"] == 3000.0
+    assert rescored["M&M"]["target_price"] is None
+    assert rescored["M&M"]["upside_pct"] is None
+
+
+def write_ticks(path, ticks):
+    start = datetime(2026, 10, 19, 9, 15)
+    rows = [
+        {
+            "symbol": symbol,
+            "price": price,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+        }
+        for i, (symbol, price) in enumerate(ticks)
+    ]
+    if path.suffix == ".csv":
+        pd.DataFrame(rows).to_csv(path, index=False)
+    else:
+        path.write_text("\n".join(json.dumps(row) for row in rows))
+
+
+REPLAY_RECOMMENDATIONS = [
+    {"symbol": "RELIANCE", "action": "BUY", "target_price": 120.0, "stop_loss": 95.0},
+    {"symbol": "TCS", "action": "SELL", "target_price": 90.0, "stop_loss": "105"},
+    {"symbol": "INFY", "action": "BUY", "target_price": 1600.0},
+]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_replay_file_rescores_recommendations(tmp_path, suffix):
+    reliance = [100.0 + i - 2 * (i % 3 == 0) for i in range(25)]
+    tcs = [100.0, 102.0, 104.0, 106.0]
+    path = tmp_path / f"ticks{suffix}"
+    write_ticks(path, [("RELIANCE", p) for p in reliance] + [("TCS", p) for p in tcs])
+
+    monitor = LiveQuoteMonitor()
+    monitor.subscribe(rec["symbol"] for rec in REPLAY_RECOMMENDATIONS)
+    asyncio.run(monitor.run(ReplayQuoteFeed(path)))
+    rescored = {row["symbol"]: row for row in monitor.rescore(REPLAY_RECOMMENDATIONS)}
+
+    # No ticks for INFY, so it is left out
+    assert set(rescored) == {"RELIANCE", "TCS"}
+
+    row = rescored["RELIANCE"]
+    assert row["price"] == reliance[-1]
+    assert row["status"] == "TARGET_HIT"
+    assert row["sma_20"] == pytest.approx(pd.Series(reliance).tail(20).mean())
+    assert row["sma_50"] is None
+    assert 50 < row["rsi"] < 100
+    assert row["macd"] > 0
+    assert row["upside_pct"] == pytest.approx((120.0 / reliance[-1] - 1) * 100)
+    assert row["timestamp"] == "2026-10-19T09:15:24"
+
+    row = rescored["TCS"]
+    assert row["status"] == "STOPPED_OUT"
+    assert row["stop_loss"] == 105.0
+    assert row["rsi"] is None
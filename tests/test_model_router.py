@@ -0,0 +1,74 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import Runnable
+
+from model_router import (
+    DEFAULT_ROUTES,
+    FAST_TIER,
+    LARGE_TIER,
+    ModelRoute,
+    ModelRouter,
+    TieredModel,
+)
+
+TIERS = {FAST_TIER: "small", LARGE_TIER: "large"}
+
+
+class FakeModel(Runnable):
+    """Replies with a tool call while ``tool_turns`` last, then with an answer"""
+
+    def __init__(self, name, tool_turns=0):
+        self.name = name
+        self.tool_turns = tool_turns
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.tool_turns:
+            call = {"name": "search_engine", "args": {"query": "TCS"}, "id": "1"}
+            return AIMessage(content="", tool_calls=[call], name=self.name)
+        return AIMessage(content=f"answer from {self.name}", name=self.name)
+
+
+def test_follow_up_tool_turns_stay_on_the_tool_call_model():
+    small, large = FakeModel("small", tool_turns=2), FakeModel("large")
+    model = TieredModel(small, large)
+    history = [HumanMessage(content="Analyze TCS")]
+
+    first = model.invoke(history)
+    history += [first, ToolMessage(content="result", tool_call_id="1")]
+    follow_up = asyncio.run(model.ainvoke(history))
+    history += [follow_up, ToolMessage(content="result", tool_call_id="1")]
+    final = model.invoke(history)
+
+    assert [first.name, follow_up.name, final.name] == ["small", "small", "large"]
+    assert final.content == "answer from large"
+    # The small model's draft of the final answer is the only extra call
+    assert (small.calls, large.calls) == (3, 1)
+
+
+def test_only_recommendation_synthesis_uses_the_large_model():
+    router = ModelRouter(FakeModel, tiers=TIERS, routes=DEFAULT_ROUTES)
+
+    for agent in DEFAULT_ROUTES:
+        model = router.model_for(agent)
+        if agent == "recommendation_agent":
+            assert isinstance(model, TieredModel)
+            assert (model.tool_calls.name, model.synthesis.name) == ("small", "large")
+        else:
+            assert model.name == "small"
+
+    unknown = router.model_for("unknown_agent")
+    assert unknown.name == "large"
+
+
+def test_tier_override_names_a_model():
+    router = ModelRouter(
+        FakeModel,
+        tiers=TIERS,
+        routes={"news_analyst_agent": ModelRoute(FAST_TIER, "qwen/qwen3-32b")},
+    )
+    model = router.model_for("news_analyst_agent")
+    assert model.synthesis.name == "qwen/qwen3-32b"
+    assert router.model_for_tier(FAST_TIER) is model.tool_calls
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+from page_cache import PageCache
+
+URL = "https://www.example.com/markets/article"
+
+
+def article(paragraphs):
+    return "\n\n".join(
+        f"Paragraph {i} about the market moves today, with enough words to keep it."
+        for i in range(paragraphs)
+    )
+
+
+def test_extract_is_keyed_by_max_chars(tmp_path):
+    cache = PageCache(tmp_path / "page_cache.db")
+    short = cache.put(URL, article(100), max_chars=500)
+    long = cache.fresh_extract(URL, max_chars=4000)
+
+    assert len(short) < 600
+    assert len(long) > 3000
+    assert cache.fresh_extract(URL, max_chars=500) == short
+    assert cache.stats()["extractions"] == 2
+
+
+def test_prune_drops_expired_urls_and_their_pages(tmp_path):
+    cache = PageCache(tmp_path / "page_cache.db", ttl=60)
+    cache.put(URL, article(100), max_chars=500)
+    cache.put(URL + "/fresh", article(50), max_chars=500)
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute(
+            "UPDATE urls SET fetched_at = ? WHERE url = ?", (time.time() - 120, URL)
+        )
+
+    assert cache.prune() == 1
+    assert cache.stats()["pages"] == cache.stats()["urls"] == 1
+    assert cache.fresh_extract(URL + "/fresh", max_chars=500) is not None
+
+
+def test_extracts_from_before_max_chars_are_dropped(tmp_path):
+    path = tmp_path / "page_cache.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE extracts (content_hash TEXT, version INTEGER, "
+            "kind TEXT, text TEXT, PRIMARY KEY (content_hash, version))"
+        )
+
+    cache = PageCache(path)
+    assert cache.put(URL, article(100), max_chars=500)
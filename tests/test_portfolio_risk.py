@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_risk import VAR_Z, compute_portfolio_risk, size_positions
+
+RECS = pd.DataFrame(
+    {
+        "symbol": ["INFY", "TCS", "WIPRO"],
+        "action": ["BUY", "SELL", "BUY"],
+        "confidence": ["HIGH", "MEDIUM", "LOW"],
+        "entry_price": [100.0, 50.0, 200.0],
+        "stop_loss": [95.0, 52.0, np.nan],
+        "horizon_days": [10, 10, np.nan],
+    }
+)
+DAILY_VOL = pd.Series({"INFY": 0.02, "TCS": 0.02, "WIPRO": 0.01})
+# WIPRO has no stop: two daily deviations over the default 5-day horizon
+WIPRO_STOP = 2 * 0.01 * np.sqrt(5)
+
+
+def test_size_positions_risks_a_fixed_fraction_per_stop():
+    sized = size_positions(RECS, DAILY_VOL, 1_000_000, max_position=0.15)
+
+    assert sized["stop_distance_pct"].tolist() == pytest.approx(
+        [5.0, 4.0, WIPRO_STOP * 100]
+    )
+    # 1% risk / stop distance x confidence, capped at 15%; SELL weights are negative
+    assert sized["weight"].tolist() == pytest.approx(
+        [0.15, -0.15, 0.01 / WIPRO_STOP * 0.5]
+    )
+    assert sized["notional"].tolist() == pytest.approx(
+        [150_000, 150_000, 0.01 / WIPRO_STOP * 0.5 * 1_000_000]
+    )
+    assert sized["shares"].tolist()[:2] == [1500, 3000]
+    assert sized["horizon_days"].tolist() == [10, 10, 5]
+
+
+def test_size_positions_scales_down_to_the_gross_cap():
+    sized = size_positions(RECS, DAILY_VOL, 1_000_000, max_position=1.0, max_gross=0.3)
+    raw = np.array([0.2, 0.25 * 0.75, 0.01 / WIPRO_STOP * 0.5])
+
+    assert sized["weight"].abs().sum() == pytest.approx(0.3)
+    assert sized["weight"].tolist() == pytest.approx(
+        (raw * 0.3 / raw.sum() * [1, -1, 1]).tolist()
+    )
+
+
+def test_compute_portfolio_risk_matches_hand_computed_covariance():
+    returns = pd.DataFrame(
+        {"INFY": [0.01, -0.01, 0.02, 0.0], "TCS": [0.02, 0.0, -0.01, 0.01]}
+    )
+    positions = pd.DataFrame(
+        {
+            "symbol": ["INFY", "TCS"],
+            "weight": [0.5, -0.25],
+            "stop_distance_pct": [5.0, 4.0],
+            "horizon_days": [np.nan, np.nan],
+        }
+    )
+    w = np.array([0.5, -0.25])
+    cov = np.cov(returns.to_numpy(), rowvar=False)
+    shrunk = 0.5 * cov + 0.5 * np.diag(np.diag(cov))
+
+    risk = compute_portfolio_risk(positions, returns, 1_000_000, shrinkage=0.5)
+    summary = risk.summary
+
+    port_vol = np.sqrt(w @ shrunk @ w)
+    assert summary["daily_volatility_pct"] == pytest.approx(port_vol * 100)
+    assert summary["horizon_days"] == 5
+    assert summary["var_95_horizon"] == pytest.approx(
+        VAR_Z * port_vol * np.sqrt(5) * 1_000_000
+    )
+    assert summary["long_exposure_pct"] == pytest.approx(50.0)
+    assert summary["short_exposure_pct"] == pytest.approx(25.0)
+    assert summary["gross_exposure_pct"] == pytest.approx(75.0)
+    assert summary["net_exposure_pct"] == pytest.approx(25.0)
+    assert summary["all_stops_hit_loss"] == pytest.approx(35_000)
+
+    vol = np.sqrt(np.diag(shrunk))
+    assert risk.correlation.to_numpy() == pytest.approx(shrunk / np.outer(vol, vol))
+    contributions = risk.positions["risk_contribution_pct"]
+    assert contributions.tolist() == pytest.approx(
+        (w * (shrunk @ w) / port_vol**2 * 100).tolist()
+    )
+    assert contributions.sum() == pytest.approx(100.0)
@@ -0,0 +1,72 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from pipeline import with_prefetch
+from prefetch import MarketDataPrefetcher, load_recent_picks, quote_url
+
+
+class FakeTool:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = []
+
+    async def ainvoke(self, kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise RuntimeError("scrape failed")
+        return f"{self.name} ok"
+
+
+def test_failed_tool_keeps_other_results(tmp_path):
+    tools = [FakeTool("scrape_as_markdown", fail=True), FakeTool("search_engine")]
+    prefetcher = MarketDataPrefetcher(
+        tools, recent_picks_path=tmp_path / "recent_picks.json"
+    )
+
+    async def run():
+        prefetcher.start(["RELIANCE"])
+        return await prefetcher.resolve(["RELIANCE"])
+
+    kept = asyncio.run(run())
+
+    assert list(kept) == ["RELIANCE"]
+    assert kept["RELIANCE"].news == "search_engine ok"
+    assert kept["RELIANCE"].quote is None
+    assert kept["RELIANCE"].history is None
+
+
+def test_quote_url_escapes_symbol():
+    assert quote_url("M&M").endswith("?symbol=M%26M")
+    assert quote_url("BAJAJ-AUTO").endswith("?symbol=BAJAJ-AUTO")
+
+
+def test_supervisor_finder_step_attaches_prefetched_data(tmp_path):
+    def finder(state):
+        return {"messages": [AIMessage(content="SELECTED_STOCKS:\nSymbol: [TCS]")]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("finder", finder)
+    graph.add_edge(START, "finder")
+    agent = with_prefetch(graph.compile(name="stock_finder_agent"))
+
+    tools = [FakeTool("scrape_as_markdown"), FakeTool("search_engine")]
+    picks_path = tmp_path / "recent_picks.json"
+    prefetcher = MarketDataPrefetcher(tools, recent_picks_path=picks_path)
+
+    async def run():
+        prefetcher.start(["RELIANCE", "TCS"])
+        return await agent.ainvoke(
+            {"messages": [HumanMessage(content="Find stocks")]},
+            {"configurable": {"prefetcher": prefetcher}},
+        )
+
+    output = asyncio.run(run())
+    assert agent.name == "stock_finder_agent"
+    assert set(output) == {"messages"}
+    assert output["messages"][-1].name == "prefetch"
+    assert "[TCS]" in output["messages"][-1].content
+    assert list(prefetcher.kept) == ["TCS"]
+    assert load_recent_picks(picks_path) == ["TCS"]
@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+import pytest
+
+from price_store import PriceStore
+from sector_index import SectorIndex, make_sector_tool
+
+
+def _bars(start, days, base):
+    dates = pd.bdate_range(start, periods=days)
+    close = [base + i for i in range(days)]
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": 1000,
+        }
+    )
+
+
+def test_failed_refresh_keeps_previous_index(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path)
+    for symbol, base in (("INFY", 100.0), ("TCS", 200.0)):
+        store.write(symbol, _bars("2024-01-01", 30, base))
+    index = SectorIndex(store, {"INFY": "IT", "TCS": "IT"}).build()
+    as_of, stats = index.as_of, index.lookup("INFY")
+
+    for symbol, base in (("INFY", 130.0), ("TCS", 230.0)):
+        store.write(symbol, _bars(as_of + pd.Timedelta(days=1), 5, base))
+
+    def fail(window):
+        raise RuntimeError("compute failed")
+
+    monkeypatch.setattr(index, "_compute", fail)
+    with pytest.raises(RuntimeError):
+        index.refresh()
+    assert index.as_of == as_of
+    assert index.lookup("INFY") == stats
+
+    # The days that failed are picked up by the next refresh
+    monkeypatch.undo()
+    assert index.refresh()
+    assert index.as_of > as_of
+
+
+def _index(tmp_path):
+    store = PriceStore(tmp_path)
+    for symbol, base in (("INFY", 100.0), ("TCS", 200.0), ("TECHM", 300.0)):
+        store.write(symbol, _bars("2024-01-01", 30, base))
+    return store, SectorIndex(store, dict.fromkeys(["INFY", "TCS", "TECHM"], "IT"))
+
+
+def test_unknown_symbol_suggests_closest_matches(tmp_path):
+    _, index = _index(tmp_path)
+    tool = make_sector_tool(index.build())
+
+    assert tool.invoke({"symbol": "TECM"}) == (
+        "No sector data for TECM. Did you mean: TECHM, TCS?"
+    )
+    assert tool.invoke({"symbol": "ZZZZ"}) == "No sector data for ZZZZ."
+    assert json.loads(tool.invoke({"symbol": "tcs"}))["sector"] == "IT"
+
+
+def test_tool_refreshes_stale_index(tmp_path, monkeypatch):
+    store, index = _index(tmp_path)
+    tool = make_sector_tool(index.build())
+    as_of = index.as_of
+    for symbol, base in (("INFY", 130.0), ("TCS", 230.0), ("TECHM", 330.0)):
+        store.write(symbol, _bars(as_of + pd.Timedelta(days=1), 5, base))
+
+    # Within the TTL the index is served as built
+    assert json.loads(tool.invoke({"symbol": "INFY"}))["as_of"] == str(as_of.date())
+
+    monkeypatch.setattr(index, "_checked_at", index._checked_at - 3600)
+    payload = json.loads(tool.invoke({"symbol": "INFY"}))
+    assert payload["as_of"] == str(index.as_of.date())
+    assert index.as_of > as_of
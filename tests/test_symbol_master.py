@@ -0,0 +1,69 @@
+import pytest
+
+from symbol_master import Security, SymbolMaster, load_symbol_master
+
+
+@pytest.fixture
+def builtin(tmp_path):
+    return load_symbol_master(tmp_path / "EQUITY_L.csv", tmp_path / "sector_map.csv")
+
+
+def mentioned(master, text):
+    return [security.symbol for _, security in master.find_mentions(text)]
+
+
+@pytest.mark.parametrize(
+    "text, symbols",
+    [
+        ("analyze Tata Motors and M&M", ["M&M", "TATAMOTORS"]),
+        (
+            "Compare Reliance with Infosys and BAJAJ-AUTO",
+            ["BAJAJ-AUTO", "RELIANCE", "INFY"],
+        ),
+        ("Is Sun Pharma a buy?", ["SUNPHARMA"]),
+        ("State Bank of India and power grid", ["SBIN", "POWERGRID"]),
+        ("Asian Paints results", ["ASIANPAINT"]),
+    ],
+)
+def test_find_mentions(builtin, text, symbols):
+    assert mentioned(builtin, text) == symbols
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Asian markets are weak",
+        "Hero of the day",
+        "Coal prices are rising",
+        "General Market Analysis",
+        "Provide comprehensive stock analysis for promising NSE-listed stocks",
+    ],
+)
+def test_single_word_prefixes_are_not_mentions(builtin, text):
+    assert mentioned(builtin, text) == []
+    assert builtin.annotate(text) == (text, [])
+
+
+def test_preferred_breaks_ties_between_prefixes():
+    master = SymbolMaster(
+        [
+            Security("RELIANCE", "Reliance Industries Limited"),
+            Security("RPOWER", "Reliance Power Limited"),
+        ],
+        preferred=["RELIANCE"],
+    )
+    assert mentioned(master, "Reliance Power and Reliance Industries") == [
+        "RPOWER",
+        "RELIANCE",
+    ]
+    assert mentioned(master, "Reliance results") == []
+
+
+def test_validate(builtin):
+    assert builtin.validate("BAJAJAUTO") == "BAJAJ-AUTO"
+    assert builtin.validate("INFY") == "INFY"
+    # Only a complete master rejects symbols it doesn't know
+    assert builtin.validate("TATAELXSI", "Tata Elxsi") == "TATAELXSI"
+    master = SymbolMaster([Security("TATAMOTORS", "Tata Motors Limited")])
+    assert master.validate("TATAMOTOR", "Tata Motors Ltd") == "TATAMOTORS"
+    assert master.validate("XYZ", "Unknown Company") is None
@@ -0,0 +1,34 @@
+import json
+from datetime import date
+
+from usage import DailyUsageLedger
+
+
+def test_ledgers_sharing_a_file_add_up(tmp_path):
+    path = tmp_path / "usage_ledger.db"
+    # Two processes (API worker, scheduler) each holding their own ledger
+    worker, scheduler = DailyUsageLedger(path), DailyUsageLedger(path)
+
+    worker.add(100)
+    scheduler.add(50)
+    assert worker.used_today() == 100
+    worker.save()
+    scheduler.save()
+    scheduler.save()
+
+    assert worker.used_today() == 150
+    assert scheduler.used_today() == 150
+    assert DailyUsageLedger(path).used_today() == 150
+
+
+def test_json_ledger_is_imported(tmp_path):
+    legacy = tmp_path / "usage_ledger.json"
+    legacy.write_text(json.dumps({date.today().isoformat(): 70, "2026-01-02": 5}))
+
+    ledger = DailyUsageLedger(legacy)
+    ledger.add(30)
+    ledger.save()
+
+    assert ledger.path == tmp_path / "usage_ledger.db"
+    assert not legacy.exists()
+    assert DailyUsageLedger(legacy).used_today() == 100
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from cassette import current_cassette
+from metrics import TOOL_CALLS, TOOL_IN_FLIGHT, TOOL_QUEUE_DEPTH, TOOL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_CACHE_SIZE = 1024
+
+_MISSING = object()
+
+
+class ToolResultCache:
+    """TTL + LRU cache of tool outputs keyed by tool name and arguments.
+
+    Holds no asyncio primitives, so one instance can be shared by every session,
+    thread and event loop in the process.
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_CACHE_TTL, max_entries: int = DEFAULT_CACHE_SIZE
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool_name: str, args: Dict[str, Any]) -> Hashable:
+        return tool_name, json.dumps(args, sort_keys=True, default=str)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class RateLimiter:
+    """Token-bucket rate limit plus a concurrency cap for outbound tool calls.
+
+    Uses asyncio primitives, so an instance belongs to a single event loop.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 10, max_concurrency: int = 8):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _acquire_token(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        with TOOL_QUEUE_DEPTH.track():
+            await self._semaphore.acquire()
+            try:
+                await self._acquire_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+@lru_cache(maxsize=None)
+def shared_tool_cache(
+    ttl: float = DEFAULT_CACHE_TTL, max_entries: int = DEFAULT_CACHE_SIZE
+) -> ToolResultCache:
+    """One cache per configuration, shared by every StockResearchSystem in the process"""
+    return ToolResultCache(ttl, max_entries)
+
+
+def wrap_tool(
+    tool: BaseTool,
+    limiter: Optional[RateLimiter] = None,
+    cache: Optional[ToolResultCache] = None,
+) -> BaseTool:
+    """Return a copy of ``tool`` whose calls go through the shared cache and rate limiter.
+
+    Identical calls already in flight on this event loop share one request; a
+    cancelled caller does not cancel the request for the others. Calls are recorded
+    to, or replayed from, the current task's cassette.
+    """
+    in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def request(kwargs: Dict[str, Any]) -> Any:
+        with TOOL_IN_FLIGHT.track(), TOOL_SECONDS.time(tool=tool.name):
+            try:
+                output = await tool.ainvoke(kwargs)
+            except Exception:
+                TOOL_CALLS.inc(tool=tool.name, outcome="error")
+                raise
+        TOOL_CALLS.inc(tool=tool.name, outcome="fetched")
+        return output
+
+    async def fetch(key: Hashable, kwargs: Dict[str, Any]) -> Any:
+        try:
+            if limiter is not None:
+                async with limiter.slot():
+                    output = await request(kwargs)
+            else:
+                output = await request(kwargs)
+            if cache is not None:
+                cache.set(key, output)
+            return output
+        finally:
+            in_flight.pop(key, None)
+
+    async def shared_call(kwargs: Dict[str, Any]) -> Any:
+        key = ToolResultCache.key(tool.name, kwargs)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not _MISSING:
+                logger.debug("Tool cache hit", extra={"tool": tool.name})
+                TOOL_CALLS.inc(tool=tool.name, outcome="cache_hit")
+                return cached
+
+        task = in_flight.get(key)
+        if task is None:
+            task = in_flight[key] = asyncio.ensure_future(fetch(key, kwargs))
+        else:
+            TOOL_CALLS.inc(tool=tool.name, outcome="shared")
+        return await asyncio.shield(task)
+
+    async def call(**kwargs: Any) -> Any:
+        cassette = current_cassette.get()
+        if cassette is None:
+            return await shared_call(kwargs)
+        if cassette.replaying:
+            TOOL_CALLS.inc(tool=tool.name, outcome="replayed")
+            return cassette.replay_tool(tool.name, kwargs)
+        try:
+            output = await shared_call(kwargs)
+        except Exception as e:
+            cassette.record_tool(tool.name, kwargs, error=str(e))
+            raise
+        cassette.record_tool(tool.name, kwargs, output)
+        return output
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=call,
+        handle_tool_error=tool.handle_tool_error,
+    )
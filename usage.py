@@ -0,0 +1,315 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable
+
+from logging_config import agent_id_ctx
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+USAGE_LEDGER_PATH = Path("data") / "usage_ledger.db"
+
+# USD per million (input, output) tokens
+MODEL_PRICING = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "meta-llama/llama-4-scout-17b-16e-instruct": (0.11, 0.34),
+    "meta-llama/llama-4-maverick-17b-128e-instruct": (0.20, 0.60),
+    "openai/gpt-oss-120b": (0.15, 0.75),
+    "openai/gpt-oss-20b": (0.10, 0.50),
+    "qwen/qwen3-32b": (0.29, 0.59),
+}
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised before an LLM call when a run has no token budget left"""
+
+
+@dataclass(frozen=True)
+class UsageBudget:
+    max_run_tokens: Optional[int] = None
+    max_daily_tokens: Optional[int] = None
+    # "stop" ends the run, "downgrade" switches remaining calls to fallback_model
+    on_exceed: str = "stop"
+    fallback_model: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "UsageBudget":
+        return cls(
+            max_run_tokens=settings.max_tokens_per_run,
+            max_daily_tokens=settings.max_tokens_per_day,
+            on_exceed=settings.budget_action,
+            fallback_model=settings.fallback_model_name,
+        )
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICING.get(model or "", (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "cost_usd": 0.0,
+    }
+
+
+class DailyUsageLedger:
+    """Tokens used per calendar day, persisted to SQLite.
+
+    The API workers, the scheduler and the Streamlit app share one ledger file:
+    ``save`` adds this process's unsaved tokens to the stored totals in a single
+    statement, so concurrent writers never overwrite each other.
+    """
+
+    def __init__(self, path: Path = USAGE_LEDGER_PATH):
+        self.path = Path(path)
+        if self.path.suffix == ".json":
+            # Configs from before the SQLite ledger; its totals are imported below
+            self.path = self.path.with_suffix(".db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Tokens added in this process since the last save, per day
+        self._unsaved: Dict[str, int] = {}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_usage "
+                "(day TEXT PRIMARY KEY, tokens INTEGER NOT NULL)"
+            )
+        self._import_json(self.path.with_suffix(".json"))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_json(self, legacy: Path) -> None:
+        """Carry totals over from the JSON ledger used by earlier versions"""
+        try:
+            days = json.loads(legacy.read_text())
+        except (OSError, ValueError):
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO daily_usage (day, tokens) VALUES (?, ?)",
+                [(day, int(tokens)) for day, tokens in days.items()],
+            )
+        legacy.rename(legacy.with_suffix(".json.imported"))
+        logger.info("Usage ledger imported", extra={"file": str(legacy)})
+
+    def used_today(self) -> int:
+        """Today's tokens across every process sharing the ledger"""
+        today = date.today().isoformat()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT tokens FROM daily_usage WHERE day = ?", (today,)
+            ).fetchone()
+        with self._lock:
+            return (row[0] if row else 0) + self._unsaved.get(today, 0)
+
+    def add(self, tokens: int) -> None:
+        with self._lock:
+            today = date.today().isoformat()
+            self._unsaved[today] = self._unsaved.get(today, 0) + tokens
+
+    def save(self) -> None:
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        if not unsaved:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO daily_usage (day, tokens) VALUES (?, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET tokens = tokens + excluded.tokens",
+                    list(unsaved.items()),
+                )
+        except sqlite3.Error:
+            # Keep the tokens for the next save rather than losing them
+            with self._lock:
+                for day, tokens in unsaved.items():
+                    self._unsaved[day] = self._unsaved.get(day, 0) + tokens
+            raise
+
+
+@lru_cache(maxsize=None)
+def daily_ledger(path: Path = USAGE_LEDGER_PATH) -> DailyUsageLedger:
+    """The process-wide ledger for ``path``, shared by every run"""
+    return DailyUsageLedger(path)
+
+
+# Tracker of the run executing in the current task; read by BudgetedModel
+current_tracker: ContextVar[Optional["UsageTracker"]] = ContextVar(
+    "usage_tracker", default=None
+)
+
+
+class UsageTracker(AsyncCallbackHandler):
+    """Collect token usage from LLM response metadata and enforce the run's budget.
+
+    Attach as a callback to a graph run; every agent and supervisor call is
+    attributed to the top-level graph node that made it.
+    """
+
+    raise_error = True
+
+    def __init__(
+        self,
+        budget: Optional[UsageBudget] = None,
+        ledger: Optional[DailyUsageLedger] = None,
+    ):
+        self.budget = budget or UsageBudget()
+        self.ledger = ledger
+        self.total = _empty_totals()
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.exceeded: Optional[str] = None
+        self._pending: Dict[UUID, tuple] = {}
+
+    @property
+    def downgraded(self) -> bool:
+        return self.exceeded is not None and self.budget.on_exceed == "downgrade"
+
+    def check_budget(self) -> None:
+        """Mark the run as over budget and, in "stop" mode, refuse further calls"""
+        self.update_budget()
+        if self.exceeded and not self.downgraded:
+            raise BudgetExceededError(f"{self.exceeded} token budget exceeded")
+
+    def update_budget(self) -> Optional[str]:
+        """Record which budget (``"run"`` or ``"daily"``) has been exceeded, if any"""
+        if self.exceeded is None:
+            budget = self.budget
+            if (
+                budget.max_run_tokens
+                and self.total["total_tokens"] >= budget.max_run_tokens
+            ):
+                self.exceeded = "run"
+            elif (
+                budget.max_daily_tokens
+                and self.ledger is not None
+                and self.ledger.used_today() >= budget.max_daily_tokens
+            ):
+                self.exceeded = "daily"
+            if self.exceeded:
+                logger.warning(
+                    "Token budget exceeded",
+                    extra={
+                        "budget": self.exceeded,
+                        "action": budget.on_exceed,
+                        "total_tokens": self.total["total_tokens"],
+                    },
+                )
+        return self.exceeded
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.check_budget()
+        params = kwargs.get("invocation_params") or {}
+        # checkpoint_ns looks like "market_data_agent:<id>|agent:<id>"
+        namespace = (metadata or {}).get("checkpoint_ns", "")
+        agent = namespace.split(":", 1)[0] or agent_id_ctx.get()
+        self._pending[run_id] = (agent, params.get("model") or params.get("model_name"))
+
+    async def on_llm_end(
+        self, response: LLMResult, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        agent, model = self._pending.pop(run_id, (agent_id_ctx.get(), None))
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                model = model or (getattr(message, "response_metadata", {}) or {}).get(
+                    "model_name"
+                )
+
+        cost = estimate_cost(model, input_tokens, output_tokens)
+        for totals in (
+            self.total,
+            self.by_agent.setdefault(agent, _empty_totals()),
+            self.by_model.setdefault(model or "unknown", _empty_totals()),
+        ):
+            totals["calls"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["total_tokens"] += input_tokens + output_tokens
+            totals["cost_usd"] += cost
+
+        if self.ledger is not None:
+            self.ledger.add(input_tokens + output_tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._pending.pop(run_id, None)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": dict(self.total),
+            "by_agent": {name: dict(t) for name, t in self.by_agent.items()},
+            "by_model": {name: dict(t) for name, t in self.by_model.items()},
+            "budget": {
+                "max_run_tokens": self.budget.max_run_tokens,
+                "max_daily_tokens": self.budget.max_daily_tokens,
+                "on_exceed": self.budget.on_exceed,
+                "exceeded": self.exceeded,
+            },
+        }
+
+
+class BudgetedModel(Runnable):
+    """Chat model that switches to ``fallback`` once the current run's budget is exceeded"""
+
+    def __init__(self, primary: Runnable, fallback: Runnable):
+        self.primary = primary
+        self.fallback = fallback
+
+    def _select(self) -> Runnable:
+        tracker = current_tracker.get()
+        if tracker is not None and tracker.update_budget() and tracker.downgraded:
+            return self.fallback
+        return self.primary
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "BudgetedModel":
+        return BudgetedModel(
+            self.primary.bind_tools(tools, **kwargs),
+            self.fallback.bind_tools(tools, **kwargs),
+        )
+
+    def invoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> Any:
+        return self._select().invoke(input, config, **kwargs)
+
+    async def ainvoke(
+        self, input: Any, config: Optional[Dict] = None, **kwargs: Any
+    ) -> Any:
+        return await self._select().ainvoke(input, config, **kwargs)